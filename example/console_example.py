@@ -1,32 +1,26 @@
 import argparse
-import datetime
 import json
 
 from src.factory import MemoNestFactory, MemoNestMode
 from src.interaction import (
+    MemoChangesData,
+    MemoCountByDateData,
     MemoCreateData,
     MemoDeleteData,
+    MemoGetAllData,
     MemoGetData,
+    MemoQueryData,
+    MemoSearchData,
+    MemoSuggestData,
     MemoUpdateData,
     OutputHandler,
 )
 
 
-def convert_datetime(obj):
-    if isinstance(obj, datetime.datetime):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {k: convert_datetime(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [convert_datetime(item) for item in obj]
-    return obj
-
-
 class ConsoleJsonOutput(OutputHandler):
 
     def output(self, data: dict) -> None:
-        converted_data = convert_datetime(data)
-        json_data = json.dumps(converted_data, indent=4)
+        json_data = json.dumps(data, indent=4)
         print(json_data)
         print("\n")
 
@@ -48,8 +42,12 @@ memo_nest = memo_nest_factory.create_memo_nest()
 memo_nest.set_output(ConsoleJsonOutput())
 
 
-def create_memo(title):
+def create_memo(title, ttl, idempotency_key):
     data = MemoCreateData(title=title)
+    if ttl is not None:
+        data["ttl"] = ttl
+    if idempotency_key is not None:
+        data["idempotency_key"] = idempotency_key
     memo_nest.create_memo(data)
 
 
@@ -58,12 +56,17 @@ def get_memo(memo_id):
     memo_nest.get_memo(data)
 
 
-def get_memos():
-    memo_nest.get_memos()
+def get_memos(fields):
+    data = MemoGetAllData()
+    if fields is not None:
+        data["fields"] = fields.split(",")
+    memo_nest.get_memos(data)
 
 
-def update_memo(memo_id, new_title):
+def update_memo(memo_id, new_title, ttl):
     data = MemoUpdateData(id=memo_id, title=new_title)
+    if ttl is not None:
+        data["ttl"] = ttl
     memo_nest.update_memo(data)
 
 
@@ -72,84 +75,199 @@ def delete_memo(memo_id):
     memo_nest.delete_memo(data)
 
 
-def print_help(parsers: list) -> None:
-    for parser in parsers:
-        print("\n----------------------------------")
-        parser.print_help()
-    print("\n")
+def get_changes(seq, limit):
+    data = MemoChangesData(seq=seq, limit=limit)
+    memo_nest.get_changes(data)
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Memo management console application")
-    subparsers = parser.add_subparsers(dest="command")
+def search_memos(query, limit):
+    data = MemoSearchData(query=query)
+    if limit is not None:
+        data["limit"] = limit
+    memo_nest.search_memos(data)
+
+
+def suggest_titles(prefix, limit):
+    data = MemoSuggestData(prefix=prefix)
+    if limit is not None:
+        data["limit"] = limit
+    memo_nest.suggest_titles(data)
+
+
+def to_query_data(data, args):
+    for name in ("date_field", "since", "until", "bucket"):
+        value = getattr(args, name, None)
+        if value is not None:
+            data[name] = value
+    return data
+
+
+def count_memos(args):
+    memo_nest.count_memos(to_query_data(MemoQueryData(), args))
+
 
+def count_memos_by_date(args):
+    memo_nest.count_memos_by_date(to_query_data(MemoCountByDateData(), args))
+
+
+def get_memo_date_range(args):
+    memo_nest.get_memo_date_range(to_query_data(MemoQueryData(), args))
+
+
+QUERY_COMMANDS = {
+    "count": count_memos,
+    "count_by_date": count_memos_by_date,
+    "date_range": get_memo_date_range,
+}
+
+# every command but help and exit, called with the parsed arguments
+COMMANDS = {
+    "create": lambda args: create_memo(args.title, args.ttl, args.idempotency_key),
+    "get": lambda args: get_memo(args.id),
+    "get_all": lambda args: get_memos(args.fields),
+    "update": lambda args: update_memo(args.id, args.title, args.ttl),
+    "delete": lambda args: delete_memo(args.id),
+    "changes": lambda args: get_changes(args.seq, args.limit),
+    "search": lambda args: search_memos(args.query, args.limit),
+    "suggest": lambda args: suggest_titles(args.prefix, args.limit),
+    **QUERY_COMMANDS,
+}
+
+
+def add_memo_parsers(subparsers) -> list:
     create_parser = subparsers.add_parser("create", help="Create a new memo")
     create_parser.add_argument(
         "--title", type=str, required=True, help="Title of the memo"
     )
+    create_parser.add_argument(
+        "--ttl", type=str, help="Seconds until the memo expires, never by default"
+    )
+    create_parser.add_argument(
+        "--idempotency_key", type=str, help="Key that makes retries return the memo"
+    )
 
     get_parser = subparsers.add_parser("get", help="Get a memo by ID")
     get_parser.add_argument("--id", type=str, required=True, help="ID of the memo")
 
     get_all_parser = subparsers.add_parser("get_all", help="Get all memos")
+    get_all_parser.add_argument(
+        "--fields", type=str, help="Comma separated fields to get, e.g. id,title"
+    )
 
     update_parser = subparsers.add_parser("update", help="Update a memo by ID")
     update_parser.add_argument("--id", type=str, required=True, help="ID of the memo")
     update_parser.add_argument(
         "--title", type=str, required=True, help="New title of the memo"
     )
+    update_parser.add_argument(
+        "--ttl", type=str, help="Seconds until the memo expires, unchanged by default"
+    )
 
     delete_parser = subparsers.add_parser("delete", help="Delete a memo by ID")
     delete_parser.add_argument("--id", type=str, required=True, help="ID of the memo")
 
-    help_parser = subparsers.add_parser("help", help="Show this help message and exit")
+    changes_parser = subparsers.add_parser(
+        "changes", help="Get the memo changes after a sequence number"
+    )
+    changes_parser.add_argument(
+        "--seq", type=str, required=True, help="Last sequence number seen"
+    )
+    changes_parser.add_argument(
+        "--limit", type=str, required=True, help="Maximum number of changes"
+    )
+
+    return [
+        create_parser,
+        get_parser,
+        get_all_parser,
+        update_parser,
+        delete_parser,
+        changes_parser,
+        *add_search_parsers(subparsers),
+    ]
+
+
+def add_search_parsers(subparsers) -> list:
+    search_parser = subparsers.add_parser(
+        "search", help="Search memos by title, tolerating typos"
+    )
+    search_parser.add_argument(
+        "--query", type=str, required=True, help="Text to search for"
+    )
+    search_parser.add_argument(
+        "--limit", type=str, help="Maximum number of memos, 10 by default"
+    )
 
-    exit_parser = subparsers.add_parser("exit", help="Exit the application")
+    suggest_parser = subparsers.add_parser(
+        "suggest", help="Suggest memo titles starting with a prefix"
+    )
+    suggest_parser.add_argument(
+        "--prefix", type=str, required=True, help="Start of the title"
+    )
+    suggest_parser.add_argument(
+        "--limit", type=str, help="Maximum number of titles, 10 by default"
+    )
+
+    return [search_parser, suggest_parser]
+
+
+def add_query_parsers(subparsers) -> list:
+    count_parser = subparsers.add_parser("count", help="Count memos")
+    count_by_date_parser = subparsers.add_parser(
+        "count_by_date", help="Count memos per day, month or year"
+    )
+    count_by_date_parser.add_argument(
+        "--bucket", choices=["day", "month", "year"], help="Period to count by"
+    )
+    date_range_parser = subparsers.add_parser(
+        "date_range", help="Get the earliest and latest memo date"
+    )
+
+    query_parsers = [count_parser, count_by_date_parser, date_range_parser]
+    for query_parser in query_parsers:
+        query_parser.add_argument(
+            "--date_field",
+            choices=["create_date", "update_date"],
+            help="Date to select memos by",
+        )
+        query_parser.add_argument("--since", type=str, help="First day, YYYY-MM-DD")
+        query_parser.add_argument("--until", type=str, help="Last day, YYYY-MM-DD")
+    return query_parsers
+
+
+def print_help(parsers: list) -> None:
+    for parser in parsers:
+        print("\n----------------------------------")
+        parser.print_help()
+    print("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memo management console application")
+    subparsers = parser.add_subparsers(dest="command")
+
+    parsers = [*add_memo_parsers(subparsers), *add_query_parsers(subparsers)]
+    parsers.append(
+        subparsers.add_parser("help", help="Show this help message and exit")
+    )
+    parsers.append(subparsers.add_parser("exit", help="Exit the application"))
 
     while True:
         try:
             args = parser.parse_args(input("Enter command: ").split())
 
-            if args.command == "create":
-                create_memo(args.title)
-            elif args.command == "get":
-                get_memo(args.id)
-            elif args.command == "get_all":
-                get_memos()
-            elif args.command == "update":
-                update_memo(args.id, args.title)
-            elif args.command == "delete":
-                delete_memo(args.id)
-            elif args.command == "help":
-                print_help(
-                    [
-                        create_parser,
-                        get_parser,
-                        get_all_parser,
-                        update_parser,
-                        delete_parser,
-                        help_parser,
-                        exit_parser,
-                    ]
-                )
-            elif args.command == "exit":
+            if args.command == "exit":
                 print("Exiting the application.")
                 break
+            if args.command == "help":
+                print_help(parsers)
+            elif args.command in COMMANDS:
+                COMMANDS[args.command](args)
 
         except SystemExit as e:
             print(e)
             print("\n")
-            print_help(
-                [
-                    create_parser,
-                    get_parser,
-                    get_all_parser,
-                    update_parser,
-                    delete_parser,
-                    help_parser,
-                    exit_parser,
-                ]
-            )
+            print_help(parsers)
 
 
 if __name__ == "__main__":
@@ -1,60 +1,324 @@
+import os
+import re
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request, Response, status
 
 from src.factory import MemoNestFactory, MemoNestMode
-from src.interaction import MemoCreateData, MemoDeleteData, MemoGetData, MemoUpdateData
+from src.interaction import (
+    MemoChangesData,
+    MemoCountByDateData,
+    MemoCreateData,
+    MemoDeleteData,
+    MemoGetAllData,
+    MemoGetData,
+    MemoQueryData,
+    MemoryOutput,
+    MemoSearchData,
+    MemoSuggestData,
+    MemoUpdateData,
+)
+from src.repository.common import RepositoryErrorCode
+from src.service.memo_admission import AdmissionErrorCode
+
+
+def create_config(mode: MemoNestMode, path: str) -> dict:
+    return {
+        "sqlite": {
+            "mode": mode,
+            "fixed_path": path,
+            "isolated_path": lambda: path,
+            "workers": None,
+        }
+    }
+
+
+# the mode and database can be chosen when the server is started, e.g.
+# MEMONEST_MODE=PROCESS_POOL MEMONEST_DATABASE=memo.db python -m example.http_example
+config = create_config(
+    MemoNestMode[os.environ.get("MEMONEST_MODE", "COLLABORATION")],
+    os.environ.get("MEMONEST_DATABASE", ":memory:"),
+)
+
+# a database file can be written on a thread of its own and read on several
+# connections at once, e.g. MEMONEST_DATABASE=memo.db MEMONEST_READ_CONNECTIONS=4
+if "MEMONEST_READ_CONNECTIONS" in os.environ:
+    config["sqlite"]["read_connections"] = int(os.environ["MEMONEST_READ_CONNECTIONS"])
 
-config = {
-    "sqlite": {
-        "mode": MemoNestMode.COLLABORATION,
-        "fixed_path": ":memory:",
-        "isolated_path": None,
+# sampled requests, and requests with the X-MemoNest-Profile header, are profiled into
+# a directory, e.g. MEMONEST_PROFILE_DIR=profiles MEMONEST_PROFILE_RATE=0.01
+PROFILE_HEADER = "X-MemoNest-Profile"
+profile_requested = ContextVar("profile_requested", default=False)
+if "MEMONEST_PROFILE_DIR" in os.environ:
+    config["profiling"] = {
+        "directory": os.environ["MEMONEST_PROFILE_DIR"],
+        "sample_rate": float(os.environ.get("MEMONEST_PROFILE_RATE", "0")),
+        "memory": os.environ.get("MEMONEST_PROFILE_MEMORY") == "1",
+        "trigger": profile_requested.get,
     }
-}
 
-memo_nest_factory = MemoNestFactory(config)
+
+# use cases beyond the read and write limits wait in bounded queues, and are answered
+# with 503 once the queue is full or the wait timed out, e.g. MEMONEST_READ_LIMIT=8
+if "MEMONEST_READ_LIMIT" in os.environ:
+    config["admission"] = {
+        "read_limit": int(os.environ["MEMONEST_READ_LIMIT"]),
+        "write_limit": int(os.environ.get("MEMONEST_WRITE_LIMIT", "1")),
+        "timeout": float(os.environ.get("MEMONEST_ADMISSION_TIMEOUT", "1")),
+    }
+ADMISSION_ERROR_CODES = {code.value for code in AdmissionErrorCode}
+
+
+def run_use_case(use_case: str, data: dict) -> MemoryOutput:
+    # one shared MemoNest serves every request, each with an output of its own.
+    # The handlers calling it are plain functions, which FastAPI runs on its thread
+    # pool, so a use case waiting for an admission slot, a worker process or the
+    # database blocks its own thread and never the event loop.
+    memo_nest = app.state.memo_nest_factory.get_concurrent_memo_nest()
+    with memo_nest.output_to(MemoryOutput()) as output_handler:
+        getattr(memo_nest, use_case)(data)
+
+    if output_handler.error_code in ADMISSION_ERROR_CODES:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=output_handler.data["error"],
+            headers={"Retry-After": "1"},
+        )
+
+    return output_handler
+
+
+def to_etag(validator: str) -> str:
+    return f'"{validator}"'
+
+
+def from_etag(etag: str) -> str:
+    return etag.strip().removeprefix("W/").strip('"')
+
+
+# the ETag of a memo, see `get_memo_validator`
+MEMO_ETAG_PATTERN = re.compile(r'(?:W/)?"(\d+)-(\d+)"')
+
+
+def get_if_match_version(if_match: str, memo_id) -> Optional[str]:
+    # only one version of a memo can be compared and set at once, so a list of ETags,
+    # an ETag of another memo or one that is not an ETag of a memo give None
+    match = MEMO_ETAG_PATTERN.fullmatch(if_match.strip())
+    if match is None or match.group(1) != str(memo_id):
+        return None
+    return match.group(2)
+
+
+def set_etag(response: Response, output_handler: MemoryOutput) -> None:
+    if output_handler.validator is not None:
+        response.headers["ETag"] = to_etag(output_handler.validator)
+
+
+def not_modified_response(output_handler: MemoryOutput) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": to_etag(output_handler.validator)},
+    )
 
 
-def get_memo_nest():
-    return memo_nest_factory.create_memo_nest()
+def to_query_data(data: dict, **params: Optional[str]) -> dict:
+    data.update({name: value for name, value in params.items() if value is not None})
+    return data
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(fastapi_app: FastAPI):
+    # connections, schema and formatters are ready before the first request
+    memo_nest_factory = fastapi_app.state.memo_nest_factory
+    memo_nest_factory.warm_up()
+    # expired memos are hidden at once, and deleted in the background when on disk
+    if config["sqlite"]["fixed_path"] != ":memory:":
+        memo_nest_factory.background.start_purger()
+    yield
+    # the purger, worker processes and connections stop with the server
+    memo_nest_factory.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.state.memo_nest_factory = MemoNestFactory(config)
+
+
+@app.middleware("http")
+async def request_profile(request: Request, call_next):
+    token = profile_requested.set(PROFILE_HEADER in request.headers)
+    try:
+        return await call_next(request)
+    finally:
+        profile_requested.reset(token)
 
 
 @app.post("/memo/create")
-async def create_memo(data: MemoCreateData):
-    memo_nest = get_memo_nest()
-    memo_nest.create_memo(data)
-    return memo_nest.output_handler.data
+def create_memo(
+    data: MemoCreateData,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    # a client retrying with the same Idempotency-Key header gets the first memo back
+    if idempotency_key is not None:
+        data["idempotency_key"] = idempotency_key
+    output_handler = run_use_case("create_memo", data)
+
+    reused_code = RepositoryErrorCode.IDEMPOTENCY_KEY_REUSED.value
+    deleted_code = RepositoryErrorCode.CREATED_MEMO_DELETED.value
+    if output_handler.error_code == reused_code:
+        response.status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    elif output_handler.error_code == deleted_code:
+        response.status_code = status.HTTP_410_GONE
+    set_etag(response, output_handler)
+    return output_handler.data
 
 
 @app.get("/memo/get")
-async def get_memo(data: MemoGetData):
-    memo_nest = get_memo_nest()
-    memo_nest.get_memo(data)
-    return memo_nest.output_handler.data
+def get_memo(
+    data: MemoGetData,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+):
+    if if_none_match is not None:
+        data["validator"] = from_etag(if_none_match)
+
+    output_handler = run_use_case("get_memo", data)
+
+    if output_handler.not_modified:
+        return not_modified_response(output_handler)
+    set_etag(response, output_handler)
+    return output_handler.data
 
 
 @app.get("/memo/get_all")
-async def get_memos():
-    memo_nest = get_memo_nest()
-    memo_nest.get_memos()
-    return memo_nest.output_handler.data
+def get_memos(
+    response: Response,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+):
+    data = MemoGetAllData()
+    if fields is not None:
+        data["fields"] = fields.split(",")
+    if if_none_match is not None:
+        data["validator"] = from_etag(if_none_match)
+
+    output_handler = run_use_case("get_memos", data)
+
+    if output_handler.not_modified:
+        return not_modified_response(output_handler)
+    set_etag(response, output_handler)
+    return output_handler.data
 
 
 @app.put("/memo/update")
-async def update_memo(data: MemoUpdateData):
-    memo_nest = get_memo_nest()
-    memo_nest.update_memo(data)
-    return memo_nest.output_handler.data
+def update_memo(
+    data: MemoUpdateData,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+):
+    if if_match is not None and if_match.strip() != "*":
+        version = get_if_match_version(if_match, data.get("id"))
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="If-Match is not a single ETag of this memo",
+            )
+        data["version"] = version
+
+    output_handler = run_use_case("update_memo", data)
+
+    conflict_code = RepositoryErrorCode.MEMO_VERSION_CONFLICT.value
+    # no ETag, not even *, matches a memo that does not exist
+    missing = output_handler.error_code is None and not output_handler.data
+    if output_handler.error_code == conflict_code or (if_match is not None and missing):
+        response.status_code = status.HTTP_412_PRECONDITION_FAILED
+    set_etag(response, output_handler)
+    return output_handler.data
 
 
 @app.delete("/memo/delete")
-async def delete_memo(data: MemoDeleteData):
-    memo_nest = get_memo_nest()
-    memo_nest.delete_memo(data)
-    return memo_nest.output_handler.data
+def delete_memo(data: MemoDeleteData):
+    output_handler = run_use_case("delete_memo", data)
+    return output_handler.data
+
+
+@app.get("/memo/changes")
+def get_changes(data: MemoChangesData):
+    output_handler = run_use_case("get_changes", data)
+    return output_handler.data
+
+
+@app.get("/memo/count")
+def count_memos(
+    date_field: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    data = to_query_data(
+        MemoQueryData(), date_field=date_field, since=since, until=until
+    )
+    output_handler = run_use_case("count_memos", data)
+    return output_handler.data
+
+
+@app.get("/memo/count_by_date")
+def count_memos_by_date(
+    date_field: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    bucket: Optional[str] = None,
+):
+    data = to_query_data(
+        MemoCountByDateData(),
+        date_field=date_field,
+        since=since,
+        until=until,
+        bucket=bucket,
+    )
+    output_handler = run_use_case("count_memos_by_date", data)
+    return output_handler.data
+
+
+@app.get("/memo/date_range")
+def get_memo_date_range(
+    date_field: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    data = to_query_data(
+        MemoQueryData(), date_field=date_field, since=since, until=until
+    )
+    output_handler = run_use_case("get_memo_date_range", data)
+    return output_handler.data
+
+
+@app.get("/memo/search")
+def search_memos(query: str, limit: Optional[str] = None):
+    data = MemoSearchData(query=query)
+    if limit is not None:
+        data["limit"] = limit
+    output_handler = run_use_case("search_memos", data)
+    return output_handler.data
+
+
+@app.get("/memo/suggest")
+def suggest_titles(prefix: str, limit: Optional[str] = None):
+    data = MemoSuggestData(prefix=prefix)
+    if limit is not None:
+        data["limit"] = limit
+    output_handler = run_use_case("suggest_titles", data)
+    return output_handler.data
+
+
+@app.get("/admission/metrics")
+async def get_admission_metrics():
+    # the slots in use and the queue depth of the read and write limiters
+    if config.get("admission") is None:
+        return {}
+    return app.state.memo_nest_factory.get_singleton_admission().get_metrics()
 
 
 if __name__ == "__main__":
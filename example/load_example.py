@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import os
+import random
+import string
+import tempfile
+import time
+from collections import defaultdict
+from functools import partial
+
+import httpx
+
+from example import http_example
+from src.factory import MemoNestFactory, MemoNestMode
+
+OPERATIONS = ("get", "get_all", "count", "create", "update")
+PERCENTILES = (50, 90, 99)
+
+
+def make_key_chooser(keys: int, zipf_exponent: float, rng: random.Random):
+    """Return a function choosing the memo id of a read or update, uniformly or Zipf."""
+
+    ids = list(range(1, keys + 1))
+    # the most popular ranks are spread over the ids, not all the oldest memos
+    rng.shuffle(ids)
+    if zipf_exponent <= 0:
+        return lambda: rng.choice(ids)
+
+    cumulative_weights = list(
+        itertools.accumulate(1 / rank**zipf_exponent for rank in range(1, keys + 1))
+    )
+
+    def choose() -> int:
+        point = rng.random() * cumulative_weights[-1]
+        return ids[bisect.bisect_left(cumulative_weights, point)]
+
+    return choose
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for item in mix.split(","):
+        operation, weight = item.split("=")
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {operation}")
+        weights[operation] = float(weight)
+    return weights
+
+
+def build_request(operation: str, args, choose_key, titles: list):
+    """Return the method, URL and keyword arguments of one request."""
+
+    if operation == "get":
+        return "GET", "/memo/get", {"json": {"id": choose_key()}}
+    if operation == "get_all":
+        params = {} if args.list_fields is None else {"fields": args.list_fields}
+        return "GET", "/memo/get_all", {"params": params}
+    if operation == "count":
+        return "GET", "/memo/count", {}
+    if operation == "create":
+        return "POST", "/memo/create", {"json": {"title": random.choice(titles)}}
+
+    data = {"id": choose_key(), "title": random.choice(titles)}
+    return "PUT", "/memo/update", {"json": data}
+
+
+def is_error(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+    if response.status_code == 304:
+        return False
+    return "error" in response.json()
+
+
+async def run_worker(client, args, deadline, make_request, results):
+    operations = list(args.mix)
+    weights = list(itertools.accumulate(args.mix.values()))
+    while time.perf_counter() < deadline:
+        operation = random.choices(operations, cum_weights=weights)[0]
+        method, url, kwargs = make_request(operation)
+
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            error = is_error(response)
+        except httpx.HTTPError:
+            error = True
+        results[operation].append((time.perf_counter() - start, error))
+
+
+async def preload(client, count: int, concurrency: int, titles: list) -> None:
+    """Create the memos that reads and updates choose their ids from."""
+
+    remaining = iter(range(count))
+
+    async def create():
+        for _ in remaining:
+            await client.post("/memo/create", json={"title": random.choice(titles)})
+
+    await asyncio.gather(*(create() for _ in range(concurrency)))
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """Return the nearest-rank percentile of a sorted list."""
+
+    index = max(0, int(len(sorted_values) * percent / 100 + 0.5) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarise(results: dict, seconds: float) -> dict:
+    endpoints = {}
+    for operation, samples in sorted(results.items()):
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(1 for _, error in samples if error)
+        summary = {
+            "requests": len(samples),
+            "requests_per_second": round(len(samples) / seconds, 1),
+            "error_rate": round(errors / len(samples), 4),
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(percentile(latencies, percent) * 1000, 2)
+        summary["max_ms"] = round(latencies[-1] * 1000, 2)
+        endpoints[operation] = summary
+
+    total = sum(len(samples) for samples in results.values())
+    errors = sum(1 for samples in results.values() for _, error in samples if error)
+    return {
+        "seconds": round(seconds, 3),
+        "requests": total,
+        "requests_per_second": round(total / seconds, 1),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+async def run_load(client, args) -> dict:
+    titles = [
+        "".join(random.choices(string.ascii_letters, k=args.title_size))
+        for _ in range(64)
+    ]
+    choose_key = make_key_chooser(args.keys, args.zipf, random.Random(args.seed))
+    make_request = partial(
+        build_request, args=args, choose_key=choose_key, titles=titles
+    )
+    await preload(client, args.keys, args.concurrency, titles)
+
+    results = defaultdict(list)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(
+        *(
+            run_worker(client, args, deadline, make_request, results)
+            for _ in range(args.concurrency)
+        )
+    )
+    return summarise(results, time.perf_counter() - start)
+
+
+async def run_in_process(args, mode: MemoNestMode) -> dict:
+    """Run the load against the app in this process, with a fresh database file."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "memo.db")
+        factory = MemoNestFactory(http_example.create_config(mode, path))
+        factory.warm_up()
+        http_example.app.state.memo_nest_factory = factory
+        transport = httpx.ASGITransport(app=http_example.app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://memonest"
+            ) as client:
+                return await run_load(client, args)
+        finally:
+            factory.close()
+
+
+async def run_remote(args) -> dict:
+    """Run the load against a running server, such as a local uvicorn."""
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+        return await run_load(client, args)
+
+
+def print_report(label: str, report: dict) -> None:
+    print(
+        f"\n{label}: {report['requests']} requests in {report['seconds']} s, "
+        f"{report['requests_per_second']} req/s, "
+        f"{report['error_rate']:.2%} errors"
+    )
+    columns = ["requests", "requests_per_second", "error_rate"]
+    columns += [f"p{percent}_ms" for percent in PERCENTILES] + ["max_ms"]
+    headers = ["requests", "req/s", "errors"]
+    headers += [f"p{percent} ms" for percent in PERCENTILES] + ["max ms"]
+    print(f"{'endpoint':<10}" + "".join(f"{header:>10}" for header in headers))
+    for operation, summary in report["endpoints"].items():
+        values = "".join(f"{summary[column]:>10}" for column in columns)
+        print(f"{operation:<10}{values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the HTTP example")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="get=60,get_all=10,count=10,create=10,update=10",
+        help=f"Weight of each operation, of {', '.join(OPERATIONS)}",
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Client tasks")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument(
+        "--keys", type=int, default=1000, help="Memos created before the run"
+    )
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=0.0,
+        help="Zipf exponent of the key popularity, 0 for uniform keys",
+    )
+    parser.add_argument(
+        "--title-size", type=int, default=32, help="Title length of writes"
+    )
+    parser.add_argument(
+        "--list-fields", type=str, help="Fields of get_all, e.g. id,title"
+    )
+    parser.add_argument(
+        "--modes",
+        type=str,
+        default="SINGLE_USER,COLLABORATION,ISOLATION,PROCESS_POOL",
+        help="MemoNest modes to run in process, one run each",
+    )
+    parser.add_argument(
+        "--url", type=str, help="Load a running server instead, e.g. a local uvicorn"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", type=str, help="Write the reports to a JSON file")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    reports = {}
+    if args.url is not None:
+        reports[args.url] = asyncio.run(run_remote(args))
+    else:
+        for mode in args.modes.split(","):
+            reports[mode] = asyncio.run(run_in_process(args, MemoNestMode[mode]))
+
+    for label, report in reports.items():
+        print_report(label, report)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import json
+
+from src.factory import MemoNestFactory, MemoNestMode
+from src.repository.import_checkpoint import SQLiteImportCheckpoint
+from src.repository.memo_database import SQLiteMemoDatabase
+from src.service.memo_transfer import READERS, WRITERS, MemoTransfer
+
+
+def get_memo_repository(database):
+    config = {
+        "sqlite": {
+            "mode": MemoNestMode.SINGLE_USER,
+            "fixed_path": database,
+            "isolated_path": None,
+        }
+    }
+    return MemoNestFactory(config).get_singleton_memo_repository()
+
+
+def import_memos(args):
+    transfer = MemoTransfer(get_memo_repository(args.database), args.batch_size)
+    checkpoint = None
+    if args.resume:
+        checkpoint = SQLiteImportCheckpoint(args.database, args.file)
+    with open(args.file, encoding="utf-8", newline="") as file:
+        return transfer.import_memos(READERS[args.format](file), checkpoint)
+
+
+def export_memos(args):
+    transfer = MemoTransfer(get_memo_repository(args.database), args.batch_size)
+    with open(args.file, "w", encoding="utf-8", newline="") as file:
+        return transfer.export_memos(WRITERS[args.format](file))
+
+
+def print_progress(remaining, total):
+    print(f"\rCopied {total - remaining}/{total} pages", end="", flush=True)
+
+
+def get_memo_database(database):
+    return SQLiteMemoDatabase(get_memo_repository(database).connect)
+
+
+def snapshot_database(args):
+    memo_database = get_memo_database(args.database)
+    memo_database.snapshot(args.file, args.pages_per_step, print_progress, args.pause)
+    print()
+
+
+def restore_database(args):
+    memo_database = get_memo_database(args.database)
+    memo_database.restore(args.file, args.pages_per_step, print_progress)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memo bulk import and export")
+    parser.add_argument(
+        "--database", type=str, required=True, help="Path of the SQLite database"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import memos from a file")
+    import_parser.add_argument("file", type=str, help="File to import")
+    import_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Save the position in the database, an interrupted import resumes from it",
+    )
+
+    export_parser = subparsers.add_parser("export", help="Export memos to a file")
+    export_parser.add_argument("file", type=str, help="File to export to")
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Back up the database to a file while it is in use"
+    )
+    snapshot_parser.add_argument("file", type=str, help="Snapshot file")
+    snapshot_parser.add_argument(
+        "--pause", type=float, default=0.0, help="Seconds to sleep between steps"
+    )
+
+    restore_parser = subparsers.add_parser(
+        "restore", help="Replace the database with a snapshot file"
+    )
+    restore_parser.add_argument("file", type=str, help="Snapshot file")
+
+    for command_parser in (snapshot_parser, restore_parser):
+        command_parser.add_argument(
+            "--pages-per-step", type=int, default=256, help="Pages copied per step"
+        )
+
+    for command_parser in (import_parser, export_parser):
+        command_parser.add_argument(
+            "--format", choices=sorted(READERS), default="ndjson", help="File format"
+        )
+        command_parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Memos per transaction"
+        )
+
+    args = parser.parse_args()
+    if args.command == "snapshot":
+        snapshot_database(args)
+        return
+    if args.command == "restore":
+        restore_database(args)
+        return
+
+    if args.command == "import":
+        report = import_memos(args)
+    else:
+        report = export_memos(args)
+
+    print(json.dumps(report.to_dict(), indent=4))
+    for position, message in sorted(report.rejected.items()):
+        print(f"Rejected record {position}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,71 @@
-"""This module defines the Memo and MemoStatusEnum classes."""
+"""This module defines the Memo, MemoChange and MemoQuery classes and their enums."""
 
 import datetime
 from dataclasses import dataclass
-from typing import Optional
+from enum import Enum
+from typing import Callable, Optional, Union
+
+MEMO_FIELDS = ("id", "title", "create_date", "update_date", "version", "expires_at")
+DATE_ERROR_KEY = "_date_error"
+
+
+def to_iso_text(value: Union[datetime.datetime, str, None]) -> Optional[str]:
+    """Return a date as an ISO 8601 string, as is if it already is one."""
+
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def get_expiry(ttl: Optional[int]) -> Optional[datetime.datetime]:
+    """Return the date `ttl` seconds from now, None if there is no ttl."""
+
+    if ttl is None:
+        return None
+    return datetime.datetime.now() + datetime.timedelta(seconds=ttl)
+
+
+class LazyDatetime:
+    """
+    A field descriptor for a datetime that may be given as its ISO 8601 string.
+
+    The string is kept as is and only parsed the first time the field is read, so a
+    memo that is only serialised never parses its dates. A string that is not a date
+    raises the error built by the `date_error` given to `Memo.from_stored`, or the
+    ValueError of the parse if there is none.
+    """
+
+    def __init__(self) -> None:
+        self.name = ""
+        self.parsed_name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+        self.parsed_name = f"_parsed_{name}"
+
+    def __get__(self, instance, owner=None) -> Optional[datetime.datetime]:
+        if instance is None:
+            # the class attribute is read by dataclass as the field default
+            return None
+
+        values = instance.__dict__
+        try:
+            return values[self.parsed_name]
+        except KeyError:
+            value = values[self.name]
+            if isinstance(value, str):
+                try:
+                    value = datetime.datetime.fromisoformat(value)
+                except ValueError as error:
+                    date_error = values.get(DATE_ERROR_KEY)
+                    if date_error is None:
+                        raise
+                    raise date_error(self.name, error) from error
+            values[self.parsed_name] = value
+            return value
+
+    def __set__(self, instance, value: Union[datetime.datetime, str, None]) -> None:
+        instance.__dict__[self.name] = value
 
 
 @dataclass(frozen=True)
@@ -10,27 +73,149 @@ class Memo:
     """
     An immutable memo entity.
 
+    The dates may be given as datetimes or as ISO 8601 strings, which are only parsed
+    when the date is read. `to_dict` outputs the dates as ISO 8601 strings.
+
     Attributes:
         title (str): The title of the memo.
         create_date (Optional[datetime]): The creation date of the memo.
         update_date (Optional[datetime]): The last update date of the memo.
         id (Optional[int]): The unique identifier for the memo.
+        version (Optional[int]): The revision of the memo, increased on every update.
+        expires_at (Optional[datetime]): The date the memo expires at, None if it never does.
+            An expired memo is no longer read and is eventually deleted.
     """
 
     title: str
-    create_date: Optional[datetime.datetime] = None
-    update_date: Optional[datetime.datetime] = None
+    create_date: Optional[datetime.datetime] = LazyDatetime()
+    update_date: Optional[datetime.datetime] = LazyDatetime()
     id: Optional[int] = None
+    version: Optional[int] = None
+    expires_at: Optional[datetime.datetime] = LazyDatetime()
+
+    @classmethod
+    def from_stored(
+        cls,
+        fields: dict,
+        date_error: Optional[Callable[[str, ValueError], Exception]] = None,
+    ) -> "Memo":
+        """
+        Build a memo from the values of all its fields, as read from storage.
+
+        This skips `__init__`, which is the most expensive part of building a memo, so
+        it is meant for reading many memos at once. The dates may be ISO 8601 strings.
+        Since they are only parsed when read, a date that is not one is reported then,
+        with the error `date_error` builds from the field name and the ValueError.
+
+        Raises:
+            TypeError: If `fields` misses a field of the memo or has an unknown one.
+        """
+
+        if len(fields) != len(MEMO_FIELDS) or not fields.keys() >= set(MEMO_FIELDS):
+            missing = [name for name in MEMO_FIELDS if name not in fields]
+            unknown = [name for name in fields if name not in MEMO_FIELDS]
+            raise TypeError(
+                f"Stored memo fields missing: {missing}, unknown: {unknown}"
+            )
+
+        memo = object.__new__(cls)
+        memo.__dict__.update(fields)
+        if date_error is not None:
+            memo.__dict__[DATE_ERROR_KEY] = date_error
+        return memo
 
     def is_create(self) -> bool:
         """Check if the memo has been created."""
         return self.id is not None
 
     def to_dict(self) -> dict:
-        """Convert the memo to a dictionary."""
+        """Convert the memo to a dictionary, with the dates as ISO 8601 strings."""
+
+        # read the stored dates, which are only parsed if they were given as datetimes
+        values = self.__dict__
         return {
             "id": self.id,
             "title": self.title,
-            "create_date": self.create_date,
-            "update_date": self.update_date,
+            "create_date": to_iso_text(values["create_date"]),
+            "update_date": to_iso_text(values["update_date"]),
+            "version": self.version,
+            "expires_at": to_iso_text(values["expires_at"]),
         }
+
+
+class MemoChangeType(Enum):
+    """
+    The kind of mutation recorded by a MemoChange.
+
+    RESET records that the whole content was replaced, by restoring a snapshot, and
+    the earlier changes no longer describe it, or that the earlier changes were pruned.
+    It has no memo, and its memo ID is 0.
+    """
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    RESET = "reset"
+
+
+@dataclass(frozen=True)
+class MemoChange:
+    """
+    An immutable record of one mutation of a memo.
+
+    Attributes:
+        seq (int): The sequence number of the change, increasing with every change.
+        change_type (MemoChangeType): The kind of mutation.
+        memo_id (int): The ID of the changed memo.
+        memo (Optional[Memo]): The current state of the memo, None if it has been deleted.
+    """
+
+    seq: int
+    change_type: MemoChangeType
+    memo_id: int
+    memo: Optional[Memo] = None
+
+    def to_dict(self) -> dict:
+        """Convert the change to a dictionary."""
+        return {
+            "seq": self.seq,
+            "change_type": self.change_type.value,
+            "memo_id": self.memo_id,
+            "memo": None if self.memo is None else self.memo.to_dict(),
+        }
+
+
+class MemoDateField(Enum):
+    """A date field of Memo that memos can be queried and aggregated by."""
+
+    CREATE_DATE = "create_date"
+    UPDATE_DATE = "update_date"
+
+
+class DateBucket(Enum):
+    """The period that memos are counted by."""
+
+    DAY = "day"
+    MONTH = "month"
+    YEAR = "year"
+
+    def get_prefix_length(self) -> int:
+        """Return the length of the ISO 8601 date prefix naming the period, e.g. 2024-01."""
+
+        return {"day": 10, "month": 7, "year": 4}[self.value]
+
+
+@dataclass(frozen=True, slots=True)
+class MemoQuery:
+    """
+    An immutable selection of memos by one of their dates.
+
+    Attributes:
+        date_field (MemoDateField): The date the memos are selected by.
+        since (Optional[date]): The first day selected, or None for no lower bound.
+        until (Optional[date]): The last day selected, or None for no upper bound.
+    """
+
+    date_field: MemoDateField = MemoDateField.CREATE_DATE
+    since: Optional[datetime.date] = None
+    until: Optional[datetime.date] = None
@@ -1,10 +1,31 @@
 """Factory module to create MemoNest instances for different use cases."""
 
+import multiprocessing
+import os
 import sqlite3
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
 from enum import Enum, auto
+from functools import partial
+from typing import Any, Callable, Dict, Optional
 
+from src.formatter.memo_formatter import RECORD_FORMATTER_FACTORIES
 from src.interaction import MemoNest, MemoryOutput, OutputHandler
+from src.repository.memo_database import SQLiteMemoDatabase
 from src.repository.memo_repository import MemoRepositoryInterface, SQLiteMemoRepository
+from src.repository.split_memo_repository import SplitSQLiteMemoRepository
+from src.service.memo_admission import AdmissionMemoNest, AdmissionPolicy, MemoAdmission
+from src.service.memo_autocomplete import TitleIndex
+from src.service.memo_cache import MemoListCache
+from src.service.memo_maintenance import MaintenancePolicy, MemoMaintenance
+from src.service.memo_process_pool import ProcessPoolMemoNest, init_worker
+from src.service.memo_profiling import (
+    MemoProfiler,
+    ProfilePolicy,
+    ProfileStore,
+    ProfilingMemoNest,
+)
+from src.service.memo_purge import MemoPurger, PurgePolicy
 from src.service.memo_service import MemoService
 
 
@@ -14,26 +35,229 @@ class MemoNestMode(Enum):
     SINGLE_USER = auto()  # 單人單機模式
     COLLABORATION = auto()  # 多人協作模式
     ISOLATION = auto()  # 多人隔離模式
+    PROCESS_POOL = auto()  # 多進程協作模式
+
+
+def connect_shared_database(path: str) -> sqlite3.Connection:
+    """Connect to a database file shared by several processes, in WAL mode."""
+
+    database_connection = sqlite3.connect(
+        path, cached_statements=SQLiteMemoRepository.STATEMENT_CACHE_SIZE
+    )
+    database_connection.execute("PRAGMA journal_mode=WAL")
+
+    return database_connection
+
+
+def create_worker_memo_nest(path: str) -> MemoNest:
+    """Create the MemoNest of a worker process, with its own connection to the shared file."""
+
+    return MemoService(SQLiteMemoRepository(connect_shared_database(path)))
+
+
+class SingletonRegistry:
+    """
+    The instances shared by a factory, each created once under its name.
+
+    The registry is safe to use from several threads. Each instance is created under
+    a lock, and read without locking once it exists.
+    """
+
+    def __init__(self) -> None:
+        self._instances: Dict[str, Any] = {}
+        # reentrant, since creating a singleton may get other singletons
+        self._lock = threading.RLock()
+
+    def get(self, name: str, create: Callable[[], Any]) -> Any:
+        """
+        Return the instance of the given name, creating it with `create` once.
+
+        An instance is only stored once fully built, so the unlocked read sees
+        either no instance or the final one, and later calls never take the lock.
+        """
+
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = create()
+                    self._instances[name] = instance
+
+        return instance
+
+    def find(self, name: str) -> Optional[Any]:
+        """Return the instance of the given name, or None if it was not created."""
+
+        return self._instances.get(name)
+
+
+class BackgroundTaskFactory:
+    """
+    A factory of the background tasks of the fixed path database, one of each.
+
+    Each task runs on a thread of its own, with a connection of its own to the file.
+    """
+
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        self.singletons = SingletonRegistry()
+
+    def start_maintenance(self) -> MemoMaintenance:
+        """Start the background maintenance of the fixed path database, and return it."""
+
+        maintenance = self.get_singleton_maintenance()
+        maintenance.start()
+
+        return maintenance
+
+    def get_singleton_maintenance(self) -> MemoMaintenance:
+        """
+        Return a single MemoMaintenance for the fixed path database.
+
+        The optional `maintenance` dict of the sqlite config holds the MaintenancePolicy
+        fields.
+        """
+
+        return self.singletons.get("maintenance", self._create_maintenance)
+
+    def _create_maintenance(self) -> MemoMaintenance:
+        """Create the MemoMaintenance of the fixed path database."""
+
+        database_connection = self._connect("Maintenance requires a database file.")
+        memo_repo = SQLiteMemoRepository(database_connection)
+        memo_repo.create_table_if_not_exists()
+        policy = MaintenancePolicy(**self.config.get("sqlite").get("maintenance", {}))
+
+        database = SQLiteMemoDatabase(database_connection)
+
+        return MemoMaintenance(memo_repo, database, policy)
+
+    def start_purger(self) -> MemoPurger:
+        """Start the background purge of the expired memos of the fixed path database."""
+
+        purger = self.get_singleton_purger()
+        purger.start()
+
+        return purger
+
+    def get_singleton_purger(self) -> MemoPurger:
+        """
+        Return a single MemoPurger for the fixed path database.
+
+        The optional `purge` dict of the sqlite config holds the PurgePolicy fields.
+        """
+
+        return self.singletons.get("purger", self._create_purger)
+
+    def _create_purger(self) -> MemoPurger:
+        """Create the MemoPurger of the fixed path database."""
+
+        database_connection = self._connect(
+            "Purging expired memos requires a database file."
+        )
+        memo_repo = SQLiteMemoRepository(database_connection)
+        memo_repo.create_table_if_not_exists()
+        policy = PurgePolicy(**self.config.get("sqlite").get("purge", {}))
+
+        return MemoPurger(memo_repo, policy)
+
+    def _connect(self, memory_error: str) -> sqlite3.Connection:
+        """Connect to the fixed path database, which must be a file, for a task thread."""
+
+        path = self.config.get("sqlite").get("fixed_path")
+        if path == ":memory:":
+            raise ValueError(memory_error)
+
+        return sqlite3.connect(path, check_same_thread=False)
+
+    def stop(self) -> None:
+        """Stop the task threads, after their current tick, and close their connections."""
+
+        for name in ("purger", "maintenance"):
+            task = self.singletons.find(name)
+            if task is not None:
+                task.stop()
+                task.memo_repo.connect.close()
 
 
 class MemoNestFactory:
     """
     A factory to create MemoNest instances with appropriate configurations for different use cases.
-    It supports three modes:
+    It supports four modes:
     1. Single-user mode (single instance for all components)
     2. Multi-user collaboration mode (single MemoRepository, new MemoNest and OutputHandler)
     3. Multi-user isolation mode (new MemoNest, MemoRepository, and OutputHandler)
+    4. Multi-process collaboration mode (single process pool, new MemoNest and OutputHandler)
+
+    The factory is safe to use from several threads. Its singletons are kept in a
+    SingletonRegistry, and the background tasks are created by its BackgroundTaskFactory.
     """
 
     def __init__(self, config: dict) -> None:
         """
         Initializes the factory with the provided database connection.
         """
-        self.database_connection = None
-        self.memo_repo = None
-        self.memo_nest = None
-        self.output_handler = None
         self.config = config
+        self.singletons = SingletonRegistry()
+        self.background = BackgroundTaskFactory(config)
+
+    def warm_up(self) -> None:
+        """
+        Create the shared components of the configured mode before serving requests.
+
+        This opens the shared connection and creates the table, builds the title
+        index from the memos, starts the worker processes in multi-process mode, and
+        builds the record formatter chains, so the first requests do not pay for them
+        or race to create them.
+        """
+
+        for factory_class in RECORD_FORMATTER_FACTORIES:
+            factory_class().get_record_formatter()
+
+        mode = self.config.get("sqlite").get("mode")
+        if mode == MemoNestMode.SINGLE_USER:
+            self.get_singleton_memo_nest()
+        elif mode == MemoNestMode.COLLABORATION:
+            self.get_singleton_memo_repository()
+            self.get_singleton_memo_list_cache()
+        if mode in (MemoNestMode.SINGLE_USER, MemoNestMode.COLLABORATION):
+            memo_repo = self.get_singleton_memo_repository()
+            self.get_singleton_title_index().sync(memo_repo)
+        elif mode == MemoNestMode.PROCESS_POOL:
+            # the pool starts a worker per task submitted while no worker is idle
+            process_pool = self.get_singleton_process_pool()
+            workers = self.config.get("sqlite").get("workers") or os.cpu_count()
+            for future in [process_pool.submit(int) for _ in range(workers)]:
+                future.result()
+
+        if self.config.get("profiling") is not None:
+            self.get_singleton_profiler()
+        if self.config.get("admission") is not None:
+            self.get_singleton_admission()
+
+    def close(self) -> None:
+        """
+        Stop the background threads and worker processes and close the connections.
+
+        The purge and maintenance threads finish their current tick, the worker
+        processes their current use case, and the queued writes of a split repository
+        are run before its connections close. Closing twice does nothing more, but the
+        factory and its MemoNest instances are not to be used once closed.
+        """
+
+        self.background.stop()
+        process_pool = self.singletons.find("process_pool")
+        if process_pool is not None:
+            process_pool.shutdown()
+        memo_repo = self.singletons.find("memo_repo")
+        if isinstance(memo_repo, SplitSQLiteMemoRepository):
+            memo_repo.close()
+        elif memo_repo is not None:
+            memo_repo.connect.close()
+        database_connection = self.singletons.find("database_connection")
+        if database_connection is not None:
+            database_connection.close()
 
     def create_memo_nest(self) -> MemoNest:
         """
@@ -41,12 +265,40 @@ class MemoNestFactory:
 
         Args:
             mode (MemoNestMode): The mode of operation.
-            Can be MemoNestMode.SINGLE_USER, MemoNestMode.COLLABORATION, or MemoNestMode.ISOLATION.
+            Can be MemoNestMode.SINGLE_USER, MemoNestMode.COLLABORATION, MemoNestMode.ISOLATION,
+            or MemoNestMode.PROCESS_POOL.
 
         Returns:
-            MemoNest: A configured MemoNest instance.
+            MemoNest: A configured MemoNest instance, wrapped in an AdmissionMemoNest
+            when the config has an `admission` dict, then in a ProfilingMemoNest when
+            it has a `profiling` dict, so profiled calls include the admission wait.
         """
 
+        memo_nest = self.create_mode_memo_nest()
+        if self.config.get("admission") is not None:
+            memo_nest = AdmissionMemoNest(memo_nest, self.get_singleton_admission())
+        if self.config.get("profiling") is None:
+            return memo_nest
+
+        return ProfilingMemoNest(memo_nest, self.get_singleton_profiler())
+
+    def get_concurrent_memo_nest(self) -> MemoNest:
+        """
+        Return a MemoNest serving concurrent calls, each with its own output handler.
+
+        Callers pass the output handler of a call with `MemoNest.output_to`. The MemoNest
+        is created once and shared, except in isolation mode where each call needs a
+        repository of its own.
+        """
+
+        if self.config.get("sqlite").get("mode") == MemoNestMode.ISOLATION:
+            return self.create_memo_nest()
+
+        return self.singletons.get("concurrent_memo_nest", self.create_memo_nest)
+
+    def create_mode_memo_nest(self) -> MemoNest:
+        """Create the MemoNest instance of the configured mode."""
+
         mode = self.config.get("sqlite").get("mode")
 
         if mode == MemoNestMode.SINGLE_USER:
@@ -58,22 +310,37 @@ class MemoNestFactory:
         if mode == MemoNestMode.ISOLATION:
             return self.get_isolation_memo_nest()
 
+        if mode == MemoNestMode.PROCESS_POOL:
+            return self.get_process_pool_memo_nest()
+
         raise ValueError(f"Invalid mode: {mode}")
 
     def get_singleton_memo_nest(self) -> MemoNest:
         """Return a single instance of MemoRepository for the single-user mode."""
 
-        if self.memo_nest is None:
-            self.memo_nest = MemoService(self.get_singleton_memo_repository())
-            self.memo_nest.set_output(self.get_singleton_output_handler())
+        return self.singletons.get("memo_nest", self._create_singleton_memo_nest)
+
+    def _create_singleton_memo_nest(self) -> MemoNest:
+        """Create the MemoNest of the single-user mode, on the singleton components."""
 
-        return self.memo_nest
+        memo_nest = MemoService(
+            self.get_singleton_memo_repository(),
+            self.get_singleton_memo_list_cache(),
+            self.get_singleton_title_index(),
+        )
+        memo_nest.set_output(self.get_singleton_output_handler())
+
+        return memo_nest
 
     def get_shared_memo_nest(self) -> MemoNest:
         """Return a new MemoNest instance each time in collaboration mode."""
 
         memo_repo = self.get_singleton_memo_repository()
-        memo_nest = MemoService(memo_repo)
+        memo_nest = MemoService(
+            memo_repo,
+            self.get_singleton_memo_list_cache(),
+            self.get_singleton_title_index(),
+        )
         output_handler = self.get_new_output_handler()
         memo_nest.set_output(output_handler)
 
@@ -89,14 +356,108 @@ class MemoNestFactory:
 
         return memo_nest
 
+    def get_process_pool_memo_nest(self) -> MemoNest:
+        """Return a new MemoNest instance each time, running on the shared process pool."""
+
+        memo_nest = ProcessPoolMemoNest(self.get_singleton_process_pool())
+        output_handler = self.get_new_output_handler()
+        memo_nest.set_output(output_handler)
+
+        return memo_nest
+
+    def get_singleton_process_pool(self) -> Executor:
+        """
+        Return a single pool of worker processes sharing the fixed path database file.
+
+        The table is created and the file switched to WAL mode before the workers start,
+        so readers in one worker do not block the writer in another.
+        """
+
+        return self.singletons.get("process_pool", self._create_process_pool)
+
+    def _create_process_pool(self) -> Executor:
+        """Create the pool of worker processes of the multi-process mode."""
+
+        path = self.config.get("sqlite").get("fixed_path")
+        if path == ":memory:":
+            raise ValueError("Process pool mode requires a database file.")
+
+        database_connection = connect_shared_database(path)
+        SQLiteMemoRepository(database_connection).create_table_if_not_exists()
+        database_connection.close()
+
+        return ProcessPoolExecutor(
+            max_workers=self.config.get("sqlite").get("workers"),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(partial(create_worker_memo_nest, path),),
+        )
+
+    def get_singleton_profiler(self) -> MemoProfiler:
+        """
+        Return a single MemoProfiler shared by every MemoNest of the factory.
+
+        The `profiling` dict of the config holds the capture `directory`, the optional
+        `max_captures` and `trigger` of the ProfileStore and MemoProfiler, and the
+        ProfilePolicy fields.
+        """
+
+        return self.singletons.get("profiler", self._create_profiler)
+
+    def _create_profiler(self) -> MemoProfiler:
+        """Create the MemoProfiler of the `profiling` config."""
+
+        profiling = dict(self.config.get("profiling"))
+        store = ProfileStore(
+            profiling.pop("directory"), profiling.pop("max_captures", 100)
+        )
+        trigger = profiling.pop("trigger", None)
+
+        return MemoProfiler(store, ProfilePolicy(**profiling), trigger)
+
+    def get_singleton_admission(self) -> MemoAdmission:
+        """
+        Return a single MemoAdmission shared by every MemoNest of the factory.
+
+        The `admission` dict of the config holds the AdmissionPolicy fields.
+        """
+
+        return self.singletons.get(
+            "admission",
+            lambda: MemoAdmission(AdmissionPolicy(**self.config.get("admission"))),
+        )
+
     def get_singleton_memo_repository(self) -> MemoRepositoryInterface:
-        """Return a single instance of MemoRepository for the single-user mode."""
+        """
+        Return a single instance of MemoRepository for the single-user mode.
+
+        When the sqlite config has `read_connections`, it is a SplitSQLiteMemoRepository
+        of the fixed path database file, writing on a thread of its own and reading on
+        that many connections.
+        """
+
+        return self.singletons.get("memo_repo", self._create_singleton_memo_repository)
+
+    def _create_singleton_memo_repository(self) -> MemoRepositoryInterface:
+        """Create the MemoRepository shared in single-user and collaboration modes."""
+
+        read_connections = self.config.get("sqlite").get("read_connections")
+        if read_connections is None:
+            return self.get_new_memo_repository()
 
-        if self.memo_repo is None:
-            self.memo_repo = self.get_new_memo_repository()
-            self.memo_repo.create_table_if_not_exists()
+        return SplitSQLiteMemoRepository.open(
+            self.config.get("sqlite").get("fixed_path"), read_connections
+        )
 
-        return self.memo_repo
+    def get_singleton_memo_list_cache(self) -> MemoListCache:
+        """Return a single MemoListCache shared by the MemoNest of the singleton repository."""
+
+        return self.singletons.get("memo_list_cache", MemoListCache)
+
+    def get_singleton_title_index(self) -> TitleIndex:
+        """Return a single TitleIndex shared by the MemoNest of the singleton repository."""
+
+        return self.singletons.get("title_index", TitleIndex)
 
     def get_new_memo_repository(self) -> MemoRepositoryInterface:
         """Return a new MemoRepository instance each time in isolation mode."""
@@ -109,28 +470,34 @@ class MemoNestFactory:
     def get_singleton_database_connection(self) -> sqlite3.Connection:
         """Return a single instance of the database connection for the single-user mode."""
 
-        if self.database_connection is None:
-            self.database_connection = self.get_new_database_connection()
-
-        return self.database_connection
+        return self.singletons.get(
+            "database_connection", self.get_new_database_connection
+        )
 
     def get_new_database_connection(self) -> sqlite3.Connection:
-        """Return a new database connection each time in isolation mode."""
+        """
+        Return a new database connection each time in isolation mode.
+
+        The connection may be used from any thread, since the shared repository of the
+        other modes serves the threads of concurrent calls, and the SQLiteMemoRepository
+        using it serialises their transactions.
+        """
 
         if self.config.get("sqlite").get("mode") == MemoNestMode.ISOLATION:
             path = self.config.get("sqlite").get("isolated_path")()
         else:
             path = self.config.get("sqlite").get("fixed_path")
 
-        return sqlite3.connect(path)
+        return sqlite3.connect(
+            path,
+            check_same_thread=False,
+            cached_statements=SQLiteMemoRepository.STATEMENT_CACHE_SIZE,
+        )
 
     def get_singleton_output_handler(self) -> OutputHandler:
         """Return a single instance of OutputHandler for the single-user mode."""
 
-        if self.output_handler is None:
-            self.output_handler = MemoryOutput()
-
-        return self.output_handler
+        return self.singletons.get("output_handler", MemoryOutput)
 
     def get_new_output_handler(self) -> OutputHandler:
         """Return a new OutputHandler instance each time in isolation mode."""
@@ -1,10 +1,13 @@
 """A module for defining the formatter common class."""
 
 import re
+import threading
 from abc import ABC, abstractmethod
-from datetime import datetime
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
 
 class FormatterErrorCode(Enum):
@@ -52,7 +55,7 @@ class FormatterHelper:
         """Validate if a field has the correct format."""
 
         field_value = data[field_name]
-        if not re.match(format_regex, field_value):
+        if not isinstance(field_value, str) or not re.match(format_regex, field_value):
             error_code = FormatterErrorCode.INVALID_FIELD_FORMAT
             FormatterHelper.raise_field_error(field_name, error_code)
 
@@ -64,8 +67,114 @@ class FormatterHelper:
     ) -> None:
         """Raise an error for a field."""
 
+        raise FormatterHelper.create_field_error(
+            field_name, error_code, error
+        ) from error
+
+    @staticmethod
+    def create_field_error(
+        field_name: str,
+        error_code: FormatterErrorCode,
+        error: Optional[Exception] = None,
+    ) -> FormatterError:
+        """Create an error for a field without raising it."""
+
         error_message = f"Error in field [{field_name}]: {error_code.get_message()}."
-        raise FormatterError(error_code, error_message, error) from error
+        return FormatterError(error_code, error_message, error)
+
+
+@dataclass(frozen=True)
+class FormatterBatchResult:
+    """
+    The result of formatting a batch of records.
+
+    Attributes:
+        records (list): The formatted records that passed every formatter, in input order.
+        errors (Dict[int, FormatterError]): The first error of each failed record, by input index.
+    """
+
+    records: list
+    errors: Dict[int, FormatterError]
+
+
+@dataclass(frozen=True)
+class ParseCacheStats:
+    """
+    A snapshot of the usage of a parse cache.
+
+    Attributes:
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups that had to parse the value.
+        size (int): The number of cached values.
+        maxsize (int): The maximum number of cached values.
+    """
+
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the ratio of lookups answered by the cache, 0.0 before any lookup."""
+
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ParseCache:
+    """
+    A bounded cache of parsed field values, keyed by their raw string.
+
+    The least recently used entry is evicted once the cache is full. Lookups and inserts
+    take a lock, which also keeps the hit and miss counters exact across threads. Only
+    values that parsed successfully are stored, and they must be immutable since they
+    are shared by every caller.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[str, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value of the key, or None if it is not cached."""
+
+        with self._lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache the value of the key, evicting the least recently used entry once full."""
+
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every cached value and reset the counters."""
+
+        with self._lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> ParseCacheStats:
+        """Return a snapshot of the cache usage."""
+
+        with self._lock:
+            return ParseCacheStats(
+                self.hits, self.misses, len(self.entries), self.maxsize
+            )
 
 
 class Formatter(ABC):
@@ -82,133 +191,408 @@ class Formatter(ABC):
             return self._next_formatter.handle(formatted_data)
         return formatted_data
 
+    def handle_many(self, records: List[dict]) -> FormatterBatchResult:
+        """
+        Handle a batch of records column by column through the whole chain.
+
+        Each formatter formats every record still valid before the next formatter runs,
+        and a failing record is reported instead of stopping the batch.
+        The records are formatted in place, like `handle` does.
+        """
+
+        errors: Dict[int, FormatterError] = {}
+        formatter = self
+        while formatter is not None:
+            formatter.format_many(records, errors)
+            formatter = formatter.get_next()
+
+        valid_records = [
+            record for index, record in enumerate(records) if index not in errors
+        ]
+        return FormatterBatchResult(valid_records, errors)
+
     @abstractmethod
     def format(self, data: dict) -> dict:
         """Format the data."""
 
+    def format_many(
+        self, records: List[dict], errors: Dict[int, FormatterError]
+    ) -> None:
+        """
+        Format every record whose index is not in `errors`, adding the ones that fail to it.
+
+        The default implementation calls `format` on each record, subclasses can override it
+        with a single loop over the column.
+        """
+
+        for index, record in enumerate(records):
+            if index in errors:
+                continue
+            try:
+                records[index] = self.format(record)
+            except FormatterError as error:
+                errors[index] = error
+
     def set_next(self, next_formatter: "Formatter") -> None:
         """Set the next formatter in the chain."""
 
         self._next_formatter = next_formatter
 
+    def get_next(self) -> Optional["Formatter"]:
+        """Return the next formatter in the chain, or None if this is the last one."""
 
-class DateFormatter(Formatter):
-    """A Formatter class for converting a field value to a date."""
+        return self._next_formatter
 
-    DATE_REGEX = r"\d{4}-\d{2}-\d{2}"
-    DATE_FORMAT = "%Y-%m-%d"
+
+class FieldFormatter(Formatter):
+    """
+    An abstract Formatter class for formatting a single field.
+
+    The conversion is done by `read`, which only reads the data. `format` writes its result
+    back into the data, while a RecordFormatter collects it into an immutable record.
+    """
 
     def __init__(self, field_name):
         super().__init__()
         self.field_name = field_name
 
     def format(self, data) -> dict:
+        """Replace the field value with the converted one."""
+
+        data[self.field_name] = self.read(data)
+        return data
+
+    @abstractmethod
+    def read(self, data: Mapping) -> Any:
+        """Return the converted field value without modifying the data."""
+
+
+class DateFormatter(FieldFormatter):
+    """
+    A Formatter class for converting a field value to a date.
+
+    Parsed dates are kept in a parse cache shared by every DateFormatter, so a date string
+    seen before skips the regex and `strptime`.
+    """
+
+    DATE_REGEX = r"\d{4}-\d{2}-\d{2}"
+    DATE_FORMAT = "%Y-%m-%d"
+    PARSE_CACHE = ParseCache(maxsize=1024)
+
+    def read(self, data) -> date:
         """Convert a field value to a date."""
 
         FormatterHelper.validate_field_exist(data, self.field_name)
+
+        value = data[self.field_name]
+        if isinstance(value, str):
+            cached_value = DateFormatter.PARSE_CACHE.get(value)
+            if cached_value is not None:
+                return cached_value
+
         FormatterHelper.validate_field_format_with_regex(
             data, self.field_name, DateFormatter.DATE_REGEX
         )
 
         try:
-            data[self.field_name] = datetime.strptime(
-                data[self.field_name], DateFormatter.DATE_FORMAT
-            ).date()
+            parsed_value = datetime.strptime(value, DateFormatter.DATE_FORMAT).date()
         except (ValueError, TypeError) as error:
             error_code = FormatterErrorCode.INVALID_FIELD_VALUE
             FormatterHelper.raise_field_error(self.field_name, error_code, error)
+        else:
+            DateFormatter.PARSE_CACHE.set(value, parsed_value)
+            value = parsed_value
 
-        return data
+        return value
 
 
-class IntegerFormatter(Formatter):
-    """A Formatter class for converting a field value to an integer."""
+class DatetimeFormatter(FieldFormatter):
+    """A Formatter class for converting an ISO 8601 field value to a datetime."""
+
+    def read(self, data) -> datetime:
+        """Convert a field value to a datetime."""
+
+        FormatterHelper.validate_field_exist(data, self.field_name)
+
+        value = data[self.field_name]
+        if isinstance(value, datetime):
+            return value
+
+        try:
+            value = datetime.fromisoformat(value)
+        except (ValueError, TypeError) as error:
+            error_code = FormatterErrorCode.INVALID_FIELD_VALUE
+            FormatterHelper.raise_field_error(self.field_name, error_code, error)
+
+        return value
+
+
+class IntegerFormatter(FieldFormatter):
+    """
+    A Formatter class for converting a field value to an integer.
+
+    A value that is already a non-negative `int` is returned as is, without the regex.
+    A value above `maximum`, if given, is an invalid field value.
+    """
 
     INT_REGEX = r"\d+"
+    INT_PATTERN = re.compile(INT_REGEX)
 
-    def __init__(self, field_name):
-        super().__init__()
-        self.field_name = field_name
+    def __init__(self, field_name, maximum: Optional[int] = None):
+        super().__init__(field_name)
+        self.maximum = maximum
 
-    def format(self, data) -> dict:
+    def read(self, data) -> int:
         """Convert a field value to an integer."""
 
         FormatterHelper.validate_field_exist(data, self.field_name)
-        FormatterHelper.validate_field_format_with_regex(
-            data, self.field_name, IntegerFormatter.INT_REGEX
-        )
 
-        try:
-            data[self.field_name] = int(data[self.field_name])
-        except (ValueError, TypeError) as error:
+        value = data[self.field_name]
+        if not IntegerFormatter.is_natural_int(value):
+            FormatterHelper.validate_field_format_with_regex(
+                data, self.field_name, IntegerFormatter.INT_REGEX
+            )
+
+            try:
+                value = int(value)
+            except (ValueError, TypeError) as error:
+                error_code = FormatterErrorCode.INVALID_FIELD_VALUE
+                FormatterHelper.raise_field_error(self.field_name, error_code, error)
+
+        if self.maximum is not None and value > self.maximum:
             error_code = FormatterErrorCode.INVALID_FIELD_VALUE
-            FormatterHelper.raise_field_error(self.field_name, error_code, error)
+            FormatterHelper.raise_field_error(self.field_name, error_code)
 
-        return data
+        return value
+
+    def format_many(
+        self, records: List[dict], errors: Dict[int, FormatterError]
+    ) -> None:
+        """Convert the field of every record to an integer in a single loop."""
+
+        field_name = self.field_name
+        match = IntegerFormatter.INT_PATTERN.match
+        for index, record in enumerate(records):
+            if index in errors:
+                continue
+            if field_name not in record:
+                errors[index] = FormatterHelper.create_field_error(
+                    field_name, FormatterErrorCode.MISSING_REQUIRED_FIELD
+                )
+                continue
+
+            value = record[field_name]
+            if not IntegerFormatter.is_natural_int(value):
+                if not isinstance(value, str) or not match(value):
+                    errors[index] = FormatterHelper.create_field_error(
+                        field_name, FormatterErrorCode.INVALID_FIELD_FORMAT
+                    )
+                    continue
+
+                try:
+                    value = record[field_name] = int(value)
+                except ValueError as error:
+                    errors[index] = FormatterHelper.create_field_error(
+                        field_name, FormatterErrorCode.INVALID_FIELD_VALUE, error
+                    )
+                    continue
+
+            if self.maximum is not None and value > self.maximum:
+                errors[index] = FormatterHelper.create_field_error(
+                    field_name, FormatterErrorCode.INVALID_FIELD_VALUE
+                )
 
+    @staticmethod
+    def is_natural_int(value: Any) -> bool:
+        """Return whether the value is already an `int` the regex would accept, bools excluded."""
 
-class StringFormatter(Formatter):
-    """A Formatter class for converting a field value to a string."""
+        # bool is a subclass of int, so the exact type is compared.
+        is_int = type(value) is int  # pylint: disable=unidiomatic-typecheck
+        return is_int and value >= 0
 
-    def __init__(self, field_name):
-        super().__init__()
-        self.field_name = field_name
 
-    def format(self, data) -> dict:
+class StringFormatter(FieldFormatter):
+    """A Formatter class for converting a field value to a string."""
+
+    def read(self, data) -> str:
         """Convert a field value to a string."""
 
         FormatterHelper.validate_field_exist(data, self.field_name)
 
+        value = data[self.field_name]
         try:
-            data[self.field_name] = str(data[self.field_name])
+            value = str(value)
         except (ValueError, TypeError, AttributeError) as error:
             error_code = FormatterErrorCode.INVALID_FIELD_VALUE
             FormatterHelper.raise_field_error(self.field_name, error_code, error)
 
-        return data
-
+        return value
 
-class EnumFormatter(Formatter):
+    def format_many(
+        self, records: List[dict], errors: Dict[int, FormatterError]
+    ) -> None:
+        """Convert the field of every record to a string in a single loop."""
+
+        field_name = self.field_name
+        for index, record in enumerate(records):
+            if index in errors:
+                continue
+            if field_name not in record:
+                errors[index] = FormatterHelper.create_field_error(
+                    field_name, FormatterErrorCode.MISSING_REQUIRED_FIELD
+                )
+                continue
+
+            value = record[field_name]
+            if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+                continue
+            try:
+                record[field_name] = str(value)
+            except (ValueError, TypeError, AttributeError) as error:
+                errors[index] = FormatterHelper.create_field_error(
+                    field_name, FormatterErrorCode.INVALID_FIELD_VALUE, error
+                )
+
+
+class EnumFormatter(FieldFormatter):
     """A Formatter class for converting a field value to an enum value."""
 
     def __init__(self, field_name, enum_class):
-        super().__init__()
-        self.field_name = field_name
+        super().__init__(field_name)
         self.enum_class = enum_class
 
-    def format(self, data) -> dict:
+    def read(self, data) -> Enum:
         """Convert a field value to an enum value."""
 
         FormatterHelper.validate_field_exist(data, self.field_name)
 
+        value = data[self.field_name]
         try:
-            data[self.field_name] = self.enum_class(data[self.field_name])
+            value = self.enum_class(value)
         except (ValueError, TypeError) as error:
             error_code = FormatterErrorCode.INVALID_FIELD_VALUE
             FormatterHelper.raise_field_error(self.field_name, error_code, error)
 
-        return data
+        return value
+
+
+class SubsetFormatter(FieldFormatter):
+    """
+    A Formatter class for converting a field value to a subset of the given choices.
+
+    The value must be a non-empty list of choices. It is converted to a tuple in the
+    order of the choices, without duplicates, so equal subsets always read the same.
+    """
+
+    def __init__(self, field_name, choices: Sequence[str]):
+        super().__init__(field_name)
+        self.choices = tuple(choices)
+
+    def read(self, data) -> Tuple[str, ...]:
+        """Convert a field value to a tuple of choices."""
+
+        FormatterHelper.validate_field_exist(data, self.field_name)
+
+        value = data[self.field_name]
+        if not isinstance(value, (list, tuple)) or not all(
+            isinstance(item, str) for item in value
+        ):
+            error_code = FormatterErrorCode.INVALID_FIELD_FORMAT
+            FormatterHelper.raise_field_error(self.field_name, error_code)
+
+        if not value or not set(value).issubset(self.choices):
+            error_code = FormatterErrorCode.INVALID_FIELD_VALUE
+            FormatterHelper.raise_field_error(self.field_name, error_code)
 
+        return tuple(choice for choice in self.choices if choice in value)
 
-class CreateFieldFormatter(Formatter):
+
+class CreateFieldFormatter(FieldFormatter):
     """A Formatter class for creating a field with a default value if it is missing."""
 
     def __init__(self, field_name, field_value):
-        super().__init__()
-        self.field_name = field_name
+        super().__init__(field_name)
         self.field_value = field_value
 
-    def format(self, data) -> dict:
-        """Create a default value for a field if it is missing."""
+    def read(self, data) -> Any:
+        """Return the field value, or the default value if it is missing."""
 
-        if self.field_name not in data:
-            data[self.field_name] = self.field_value
+        return data.get(self.field_name, self.field_value)
 
-        return data
+
+class OptionalFormatter(FieldFormatter):
+    """A Formatter class for applying a field formatter only when the field has a value."""
+
+    def __init__(self, formatter, default=None):
+        super().__init__(formatter.field_name)
+        self.formatter = formatter
+        self.default = default
+
+    def read(self, data) -> Any:
+        """Return the default for a missing field, or read it with the wrapped formatter."""
+
+        if data.get(self.field_name) is None:
+            return self.default
+
+        return self.formatter.read(data)
+
+
+class RecordFormatter:
+    """
+    An immutable formatter chain that builds a typed record instead of modifying the data.
+
+    Each field is read once by its FieldFormatter, and the values are passed to the record
+    class in order. The formatter keeps no state between calls, so a single instance can
+    be shared by every request and thread.
+    """
+
+    def __init__(self, record_class: type, formatters: List[FieldFormatter]):
+        field_names = tuple(formatter.field_name for formatter in formatters)
+        record_field_names = tuple(field.name for field in fields(record_class))
+        if field_names != record_field_names:
+            raise ValueError(
+                f"Formatter fields {field_names} do not match "
+                f"{record_class.__name__} fields {record_field_names}."
+            )
+
+        self.record_class = record_class
+        self.readers = tuple(formatter.read for formatter in formatters)
+
+    def handle(self, data: Mapping) -> Any:
+        """Read every field of the data and return them as a record."""
+
+        return self.record_class(*[read(data) for read in self.readers])
+
+    def handle_many(self, records: List[Mapping]) -> FormatterBatchResult:
+        """Build a record for each data, reporting failures instead of stopping the batch."""
+
+        built_records = []
+        errors: Dict[int, FormatterError] = {}
+        for index, data in enumerate(records):
+            try:
+                built_records.append(self.handle(data))
+            except FormatterError as error:
+                errors[index] = error
+
+        return FormatterBatchResult(built_records, errors)
+
+
+def get_parse_cache_stats() -> Dict[str, ParseCacheStats]:
+    """Return the usage of every formatter parse cache, by formatter class name."""
+
+    return {DateFormatter.__name__: DateFormatter.PARSE_CACHE.get_stats()}
 
 
 class FormatterFactory(ABC):
-    """An abstract Factory class for creating formatter chains."""
+    """
+    An abstract Factory class for creating formatter chains.
+
+    A factory class stands for one fixed chain: its formatters and record class may
+    not depend on the state of an instance, since the record formatter of the class
+    is created once and shared by all its instances.
+    """
+
+    _record_formatters: Dict[type, RecordFormatter] = {}
 
     @abstractmethod
     def get_formatters(self) -> List[Formatter]:
@@ -222,3 +606,34 @@ class FormatterFactory(ABC):
             formatters[i].set_next(formatters[i + 1])
 
         return formatters[0]
+
+    def handle_many(self, records: List[dict]) -> FormatterBatchResult:
+        """Create a formatter chain and handle a batch of records with it."""
+
+        return self.create().handle_many(records)
+
+    @abstractmethod
+    def get_record_class(self) -> type:
+        """Return the record class built by the record formatter, one field per formatter."""
+
+    def create_record_formatter(self) -> RecordFormatter:
+        """Create an immutable formatter chain that builds records of `get_record_class`."""
+
+        return RecordFormatter(self.get_record_class(), self.get_formatters())
+
+    def get_record_formatter(self) -> RecordFormatter:
+        """
+        Return the record formatter of this factory class, created on first use.
+
+        Record formatters are immutable, so one instance per factory class is shared,
+        keyed by the class itself. Two threads creating it at once both build the same
+        chain, and either one is kept.
+        """
+
+        factory_class = type(self)
+        record_formatter = FormatterFactory._record_formatters.get(factory_class)
+        if record_formatter is None:
+            record_formatter = self.create_record_formatter()
+            FormatterFactory._record_formatters[factory_class] = record_formatter
+
+        return record_formatter
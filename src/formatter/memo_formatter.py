@@ -1,55 +1,323 @@
 """A module for defining the memo formatter."""
 
-from typing import List
+import datetime
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
+from src.entity.memo import MEMO_FIELDS, DateBucket, MemoDateField, MemoQuery
 from src.formatter.common import (
+    DateFormatter,
+    DatetimeFormatter,
+    EnumFormatter,
     Formatter,
     FormatterFactory,
     IntegerFormatter,
+    OptionalFormatter,
     StringFormatter,
+    SubsetFormatter,
 )
 
+# The longest ttl in seconds, 100 years, which keeps every expiry date a valid datetime.
+MAX_TTL = 100 * 365 * 24 * 3600
+
+
+@dataclass(frozen=True, slots=True)
+class AddMemoRecord:
+    """The formatted data for adding a memo."""
+
+    title: str
+    ttl: Optional[int]
+    idempotency_key: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ImportMemoRecord:
+    """The formatted data of an imported memo, which may keep its exported expiry date."""
+
+    title: str
+    ttl: Optional[int]
+    expires_at: Optional[datetime.datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class GetMemoRecord:
+    """The formatted data for getting a memo."""
+
+    id: int
+    validator: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class GetMemosRecord:
+    """The formatted data for getting all memos."""
+
+    validator: Optional[str]
+    fields: Optional[Tuple[str, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class UpdateMemoRecord:
+    """The formatted data for updating a memo."""
+
+    id: int
+    title: str
+    version: Optional[int]
+    ttl: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class DeleteMemoRecord:
+    """The formatted data for deleting a memo."""
+
+    id: int
+
+
+@dataclass(frozen=True, slots=True)
+class CountMemosByDateRecord:
+    """The formatted data for counting memos per period."""
+
+    date_field: MemoDateField
+    since: Optional[datetime.date]
+    until: Optional[datetime.date]
+    bucket: DateBucket
+
+
+@dataclass(frozen=True, slots=True)
+class SearchMemosRecord:
+    """The formatted data for searching memos by title."""
+
+    query: str
+    limit: int
+
+
+@dataclass(frozen=True, slots=True)
+class SuggestTitlesRecord:
+    """The formatted data for suggesting memo titles."""
+
+    prefix: str
+    limit: int
+
+
+@dataclass(frozen=True, slots=True)
+class GetChangesRecord:
+    """The formatted data for getting memo changes."""
+
+    seq: int
+    limit: int
+
 
 class AddMemoFormatterFactory(FormatterFactory):
     """Factory class for creating memo formatter chains."""
 
+    def get_record_class(self) -> type:
+        """Return the record class for adding memos."""
+
+        return AddMemoRecord
+
     def get_formatters(self) -> List[Formatter]:
         """Return a formatter chain for adding memos."""
 
         title_formatter = StringFormatter("title")
+        ttl_formatter = OptionalFormatter(IntegerFormatter("ttl", MAX_TTL))
+        idempotency_key_formatter = OptionalFormatter(
+            StringFormatter("idempotency_key")
+        )
+
+        return [title_formatter, ttl_formatter, idempotency_key_formatter]
+
+
+class ImportMemoFormatterFactory(FormatterFactory):
+    """Factory class for imported memo formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for importing memos."""
+
+        return ImportMemoRecord
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for importing memos."""
+
+        title_formatter = StringFormatter("title")
+        ttl_formatter = OptionalFormatter(IntegerFormatter("ttl", MAX_TTL))
+        expires_at_formatter = OptionalFormatter(DatetimeFormatter("expires_at"))
 
-        return [title_formatter]
+        return [title_formatter, ttl_formatter, expires_at_formatter]
 
 
 class GetMemoFormatterFactory(FormatterFactory):
     """Factory class for get memo formatter chains."""
 
+    def get_record_class(self) -> type:
+        """Return the record class for getting memos."""
+
+        return GetMemoRecord
+
     def get_formatters(self) -> List[Formatter]:
         """Return a formatter chain for getting memos."""
 
         id_formatter = IntegerFormatter("id")
+        validator_formatter = OptionalFormatter(StringFormatter("validator"))
 
-        return [id_formatter]
+        return [id_formatter, validator_formatter]
+
+
+class GetMemosFormatterFactory(FormatterFactory):
+    """Factory class for get all memos formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for getting all memos."""
+
+        return GetMemosRecord
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for getting all memos."""
+
+        validator_formatter = OptionalFormatter(StringFormatter("validator"))
+        fields_formatter = OptionalFormatter(SubsetFormatter("fields", MEMO_FIELDS))
+
+        return [validator_formatter, fields_formatter]
 
 
 class UpdateMemoFormatterFactory(FormatterFactory):
     """Factory class for updating memo formatter chains."""
 
+    def get_record_class(self) -> type:
+        """Return the record class for updating memos."""
+
+        return UpdateMemoRecord
+
     def get_formatters(self) -> List[Formatter]:
         """Return a formatter chain for updating memos."""
 
         id_formatter = IntegerFormatter("id")
         title_formatter = StringFormatter("title")
+        version_formatter = OptionalFormatter(IntegerFormatter("version"))
+        ttl_formatter = OptionalFormatter(IntegerFormatter("ttl", MAX_TTL))
 
-        return [id_formatter, title_formatter]
+        return [id_formatter, title_formatter, version_formatter, ttl_formatter]
 
 
 class DeleteMemoFormatterFactory(FormatterFactory):
     """Factory class for deleting memo formatter chains."""
 
+    def get_record_class(self) -> type:
+        """Return the record class for deleting memos."""
+
+        return DeleteMemoRecord
+
     def get_formatters(self) -> List[Formatter]:
         """Return a formatter chain for deleting memos."""
 
         id_formatter = IntegerFormatter("id")
 
         return [id_formatter]
+
+
+class GetChangesFormatterFactory(FormatterFactory):
+    """Factory class for getting memo changes formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for getting memo changes."""
+
+        return GetChangesRecord
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for getting memo changes."""
+
+        seq_formatter = IntegerFormatter("seq")
+        limit_formatter = IntegerFormatter("limit")
+
+        return [seq_formatter, limit_formatter]
+
+
+class SearchMemosFormatterFactory(FormatterFactory):
+    """Factory class for searching memos formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for searching memos."""
+
+        return SearchMemosRecord
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for searching memos."""
+
+        query_formatter = StringFormatter("query")
+        limit_formatter = OptionalFormatter(IntegerFormatter("limit"), 10)
+
+        return [query_formatter, limit_formatter]
+
+
+class SuggestTitlesFormatterFactory(FormatterFactory):
+    """Factory class for suggesting memo titles formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for suggesting memo titles."""
+
+        return SuggestTitlesRecord
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for suggesting memo titles."""
+
+        prefix_formatter = StringFormatter("prefix")
+        limit_formatter = OptionalFormatter(IntegerFormatter("limit"), 10)
+
+        return [prefix_formatter, limit_formatter]
+
+
+def get_memo_query_formatters() -> List[Formatter]:
+    """Return the formatters of the MemoQuery fields, all of them optional."""
+
+    date_field_formatter = OptionalFormatter(
+        EnumFormatter("date_field", MemoDateField), MemoDateField.CREATE_DATE
+    )
+    since_formatter = OptionalFormatter(DateFormatter("since"))
+    until_formatter = OptionalFormatter(DateFormatter("until"))
+
+    return [date_field_formatter, since_formatter, until_formatter]
+
+
+class MemoQueryFormatterFactory(FormatterFactory):
+    """Factory class for memo query formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for querying memos, the query itself."""
+
+        return MemoQuery
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for querying memos."""
+
+        return get_memo_query_formatters()
+
+
+class CountMemosByDateFormatterFactory(FormatterFactory):
+    """Factory class for counting memos per period formatter chains."""
+
+    def get_record_class(self) -> type:
+        """Return the record class for counting memos per period."""
+
+        return CountMemosByDateRecord
+
+    def get_formatters(self) -> List[Formatter]:
+        """Return a formatter chain for counting memos per period."""
+
+        bucket_formatter = OptionalFormatter(
+            EnumFormatter("bucket", DateBucket), DateBucket.DAY
+        )
+
+        return get_memo_query_formatters() + [bucket_formatter]
+
+
+# The factories of every record formatter used by the memo use cases.
+RECORD_FORMATTER_FACTORIES = (
+    AddMemoFormatterFactory,
+    GetMemoFormatterFactory,
+    GetMemosFormatterFactory,
+    UpdateMemoFormatterFactory,
+    DeleteMemoFormatterFactory,
+    GetChangesFormatterFactory,
+    SearchMemosFormatterFactory,
+    SuggestTitlesFormatterFactory,
+    MemoQueryFormatterFactory,
+    CountMemosByDateFormatterFactory,
+)
@@ -1,7 +1,8 @@
 """A module for defining use cases and output interfaces to interact with clients."""
 
 from abc import ABC, abstractmethod
-from typing import TypedDict
+from contextvars import ContextVar
+from typing import List, NotRequired, Optional, TypedDict
 
 
 class OutputHandler(ABC):
@@ -21,6 +22,21 @@ class OutputHandler(ABC):
     def error_output(self, code: int, message: str) -> None:
         """Handles the task of error message, such as raise an error or log it."""
 
+    def validator_output(self, validator: str) -> None:
+        """
+        Handles the validator of the data being output, such as an HTTP ETag.
+
+        A validator changes whenever the data it describes changes. Ignored by default.
+        """
+
+    def not_modified_output(self, validator: str) -> None:
+        """
+        Handles the case where the client already holds the current data.
+
+        Called instead of `output` when the validator sent by the client still matches,
+        so the data is neither built nor presented. Ignored by default.
+        """
+
 
 class ConsoleOutput(OutputHandler):
     """An output handler that displays data to the console."""
@@ -39,31 +55,75 @@ class MemoryOutput(OutputHandler):
 
     def __init__(self) -> None:
         self.data = {}
+        self.error_code: Optional[int] = None
+        self.validator: Optional[str] = None
+        self.not_modified = False
 
     def output(self, data: dict) -> None:
         self.data.update(data)
 
     def error_output(self, code: int, message: str) -> None:
+        self.error_code = code
         self.data.update({"error": f"Error code {code}: {message}"})
 
+    def validator_output(self, validator: str) -> None:
+        self.validator = validator
+
+    def not_modified_output(self, validator: str) -> None:
+        self.validator = validator
+        self.not_modified = True
+
 
 class MemoCreateData(TypedDict):
-    """A type for the data required to create a memo."""
+    """
+    A type for the data required to create a memo.
+
+    If `ttl` is given, the memo expires that many seconds after it is created.
+    If `idempotency_key` is given, a retry with the same key within a day returns the
+    memo created by the first attempt instead of creating another one.
+    """
 
     title: str
+    ttl: NotRequired[int]
+    idempotency_key: NotRequired[str]
 
 
 class MemoUpdateData(TypedDict):
-    """A type for the data required to update a memo."""
+    """
+    A type for the data required to update a memo.
+
+    If `version` is given, the update only succeeds when it matches the stored version.
+    If `ttl` is given, the memo expires that many seconds after the update, otherwise
+    it keeps its expiry.
+    """
 
     id: int
     title: str
+    version: NotRequired[int]
+    ttl: NotRequired[int]
 
 
 class MemoGetData(TypedDict):
-    """A type for the data required to retrieve a memo."""
+    """
+    A type for the data required to retrieve a memo.
+
+    If `validator` matches the current validator of the memo, the memo is not output again.
+    """
 
     id: int
+    validator: NotRequired[str]
+
+
+class MemoGetAllData(TypedDict, total=False):
+    """
+    A type for the data accepted when retrieving all memos.
+
+    If `validator` matches the current validator of the listing, the list is not output again.
+    If `fields` is given, each memo only holds these fields, e.g. `["id", "title"]`.
+    """
+
+    validator: str
+    fields: List[str]
 
 
 class MemoDeleteData(TypedDict):
@@ -72,6 +132,84 @@ class MemoDeleteData(TypedDict):
     id: int
 
 
+class MemoChangesData(TypedDict):
+    """A type for the data required to retrieve the changes after a sequence number."""
+
+    seq: int
+    limit: int
+
+
+class MemoQueryData(TypedDict, total=False):
+    """
+    A type for the data selecting memos by one of their dates.
+
+    `date_field` is "create_date" (the default) or "update_date". `since` and `until`
+    are days in YYYY-MM-DD format, both included. A missing bound leaves that side open.
+    """
+
+    date_field: str
+    since: str
+    until: str
+
+
+class MemoCountByDateData(MemoQueryData, total=False):
+    """A type for the data required to count memos per "day" (the default), "month" or "year"."""
+
+    bucket: str
+
+
+class MemoSearchData(TypedDict):
+    """
+    A type for the data required to search memos by title.
+
+    Titles containing `query`, or close to it despite typos, are matched regardless of
+    case. At most `limit` memos are returned, 10 by default.
+    """
+
+    query: str
+    limit: NotRequired[int]
+
+
+class MemoSuggestData(TypedDict):
+    """
+    A type for the data required to suggest memo titles.
+
+    The distinct titles starting with `prefix`, regardless of case, are suggested in
+    case-insensitive order. At most `limit` titles are returned, 10 by default.
+    """
+
+    prefix: str
+    limit: NotRequired[int]
+
+
+# The output handler of the use case calls running in the current thread or task.
+_call_output: ContextVar[Optional[OutputHandler]] = ContextVar(
+    "call_output", default=None
+)
+
+
+class CallOutput:
+    """
+    A context manager setting the output handler of the use case calls in its block.
+
+    A plain class rather than a generator based context manager, since it is entered
+    once per request.
+    """
+
+    __slots__ = ("output", "token")
+
+    def __init__(self, output: OutputHandler) -> None:
+        self.output = output
+        self.token = None
+
+    def __enter__(self) -> OutputHandler:
+        self.token = _call_output.set(self.output)
+        return self.output
+
+    def __exit__(self, *exc_info) -> None:
+        _call_output.reset(self.token)
+
+
 class MemoNest(ABC):
     """
     A use case class that manages MemoNest-related operations.
@@ -95,17 +233,50 @@ class MemoNest(ABC):
         """
         self.output_handler = output
 
+    def output_to(self, output: OutputHandler) -> "CallOutput":
+        """
+        Sends the output of the use cases called in a `with` block to the given handler.
+
+        The handler only applies to the current thread or asyncio task, so one MemoNest
+        can serve concurrent calls, each with an output handler of its own, without
+        changing the output handler set by `set_output`.
+        """
+
+        return CallOutput(output)
+
+    def get_output_handler(self) -> Optional[OutputHandler]:
+        """Returns the output handler of the current call, or else the one set on this MemoNest."""
+
+        output = _call_output.get()
+        return self.output_handler if output is None else output
+
     def output(self, data: dict) -> None:
         """Delegates the task of outputting data to the output handler."""
 
-        if self.output_handler is not None:
-            self.output_handler.output(data)
+        output_handler = self.get_output_handler()
+        if output_handler is not None:
+            output_handler.output(data)
 
     def error(self, code: int, message: str) -> None:
         """Delegates the task of outputting error data to the output handler."""
 
-        if self.output_handler is not None:
-            self.output_handler.error_output(code, message)
+        output_handler = self.get_output_handler()
+        if output_handler is not None:
+            output_handler.error_output(code, message)
+
+    def validator(self, validator: str) -> None:
+        """Delegates the task of outputting the data validator to the output handler."""
+
+        output_handler = self.get_output_handler()
+        if output_handler is not None:
+            output_handler.validator_output(validator)
+
+    def not_modified(self, validator: str) -> None:
+        """Delegates the task of reporting unchanged data to the output handler."""
+
+        output_handler = self.get_output_handler()
+        if output_handler is not None:
+            output_handler.not_modified_output(validator)
 
     @abstractmethod
     def create_memo(self, data: MemoCreateData) -> None:
@@ -118,7 +289,7 @@ class MemoNest(ABC):
         """Retrieves a memo with the given data."""
 
     @abstractmethod
-    def get_memos(self) -> None:
+    def get_memos(self, data: Optional[MemoGetAllData] = None) -> None:
         """Retrieves all memos."""
 
     @abstractmethod
@@ -128,3 +299,73 @@ class MemoNest(ABC):
     @abstractmethod
     def delete_memo(self, data: MemoDeleteData) -> None:
         """Deletes a memo with the given data."""
+
+    @abstractmethod
+    def get_changes(self, data: MemoChangesData) -> None:
+        """Retrieves the memo changes recorded after the given sequence number."""
+
+    @abstractmethod
+    def count_memos(self, data: Optional[MemoQueryData] = None) -> None:
+        """Counts the memos selected by the given data, or all memos."""
+
+    @abstractmethod
+    def count_memos_by_date(self, data: Optional[MemoCountByDateData] = None) -> None:
+        """Counts the memos selected by the given data per period."""
+
+    @abstractmethod
+    def get_memo_date_range(self, data: Optional[MemoQueryData] = None) -> None:
+        """Retrieves the earliest and latest date of the memos selected by the given data."""
+
+    @abstractmethod
+    def search_memos(self, data: MemoSearchData) -> None:
+        """Retrieves the memos whose title is most similar to the query of the given data."""
+
+    @abstractmethod
+    def suggest_titles(self, data: MemoSuggestData) -> None:
+        """Retrieves the memo titles starting with the prefix of the given data."""
+
+
+class DelegatingMemoNest(MemoNest):
+    """
+    A MemoNest that passes every use case, by name, to its `run` method.
+
+    Subclasses decide how a use case runs, such as on another process or through a
+    profiler. `data` is None for a use case called without data.
+    """
+
+    @abstractmethod
+    def run(self, use_case: str, data: Optional[dict]) -> None:
+        """Runs the use case of the given name with the given data."""
+
+    def create_memo(self, data: MemoCreateData) -> None:
+        self.run("create_memo", data)
+
+    def get_memo(self, data: MemoGetData) -> None:
+        self.run("get_memo", data)
+
+    def get_memos(self, data: Optional[MemoGetAllData] = None) -> None:
+        self.run("get_memos", data)
+
+    def update_memo(self, data: MemoUpdateData) -> None:
+        self.run("update_memo", data)
+
+    def delete_memo(self, data: MemoDeleteData) -> None:
+        self.run("delete_memo", data)
+
+    def get_changes(self, data: MemoChangesData) -> None:
+        self.run("get_changes", data)
+
+    def count_memos(self, data: Optional[MemoQueryData] = None) -> None:
+        self.run("count_memos", data)
+
+    def count_memos_by_date(self, data: Optional[MemoCountByDateData] = None) -> None:
+        self.run("count_memos_by_date", data)
+
+    def get_memo_date_range(self, data: Optional[MemoQueryData] = None) -> None:
+        self.run("get_memo_date_range", data)
+
+    def search_memos(self, data: MemoSearchData) -> None:
+        self.run("search_memos", data)
+
+    def suggest_titles(self, data: MemoSuggestData) -> None:
+        self.run("suggest_titles", data)
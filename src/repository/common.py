@@ -1,6 +1,7 @@
 """A module for defining the repository common class."""
 
 from enum import Enum
+from typing import Optional
 
 
 class RepositoryErrorCode(Enum):
@@ -11,6 +12,25 @@ class RepositoryErrorCode(Enum):
     FAILED_TO_DELETE_MEMO = 103
     FAILED_TO_GET_MEMO = 104
     FAILED_TO_GET_ALL_MEMOS = 105
+    MEMO_VERSION_CONFLICT = 106
+    FAILED_TO_GET_CHANGE_COUNTER = 107
+    FAILED_TO_GET_CHANGES = 108
+    FAILED_TO_CREATE_MEMOS = 109
+    FAILED_TO_SNAPSHOT = 110
+    FAILED_TO_RESTORE = 111
+    FAILED_TO_MAINTAIN = 112
+    FAILED_TO_COUNT_MEMOS = 113
+    FAILED_TO_GET_DATE_RANGE = 114
+    FAILED_TO_SEARCH_MEMOS = 115
+    FAILED_TO_GET_LAST_CHANGE_SEQ = 116
+    FAILED_TO_GET_NEXT_EXPIRY = 117
+    FAILED_TO_PURGE_MEMOS = 118
+    FAILED_TO_PURGE_IDEMPOTENCY_KEYS = 119
+    REPOSITORY_CLOSED = 120
+    FAILED_TO_LOAD_IMPORT_POSITION = 121
+    INVALID_STORED_DATE = 122
+    IDEMPOTENCY_KEY_REUSED = 123
+    CREATED_MEMO_DELETED = 124
 
     def get_message(self) -> str:
         """Return a human-readable message for the error code."""
@@ -21,7 +41,10 @@ class RepositoryError(Exception):
     """Custom exception for repository-related errors."""
 
     def __init__(
-        self, code: RepositoryErrorCode, message: str, original_exception: Exception
+        self,
+        code: RepositoryErrorCode,
+        message: str,
+        original_exception: Optional[Exception],
     ):
         super().__init__(message)
         self.code = code
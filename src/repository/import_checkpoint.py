@@ -0,0 +1,100 @@
+"""A module for the positions of the memo imports, saved in the SQLite memo database."""
+
+import os
+import sqlite3
+from dataclasses import dataclass
+from sqlite3 import Cursor
+
+from src.repository.common import RepositoryError, RepositoryErrorCode
+
+CREATE_IMPORT_POSITIONS_SQL = (
+    "CREATE TABLE IF NOT EXISTS memo_import_positions ("
+    "source TEXT PRIMARY KEY, "
+    "position INTEGER NOT NULL"
+    ")"
+)
+SELECT_IMPORT_POSITION_SQL = (
+    "SELECT position FROM memo_import_positions WHERE source = ?"
+)
+SAVE_IMPORT_POSITION_SQL = (
+    "INSERT INTO memo_import_positions (source, position) VALUES (?, ?) "
+    "ON CONFLICT (source) DO UPDATE SET position = excluded.position"
+)
+
+
+def get_source_key(path: str) -> str:
+    """
+    Return the key of an input file: its absolute path, size and modification time.
+
+    A file that is replaced or edited gets another key, so it is imported from the
+    start instead of resuming at the position reached in the previous file.
+    """
+
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+@dataclass(frozen=True)
+class ImportPosition:
+    """
+    The position an import reached in its input, saved with the batch that reached it.
+
+    Attributes:
+        source (str): The key of the input, see `get_source_key`.
+        position (int): The number of input records imported, rejected ones included.
+    """
+
+    source: str
+    position: int
+
+
+def save_import_position(cursor: Cursor, import_position: ImportPosition) -> None:
+    """Save the position of an import, in the transaction of the cursor."""
+
+    cursor.execute(
+        SAVE_IMPORT_POSITION_SQL, (import_position.source, import_position.position)
+    )
+
+
+class SQLiteImportCheckpoint:
+    """
+    The checkpoint of the import of an input file into a SQLite memo database file.
+
+    `MemoRepositoryInterface.create_many` saves the position given by `at` in the
+    transaction of the batch, so the saved position never runs ahead of or behind the
+    committed memos, and an interrupted import resumes right after the last committed
+    batch. `load` reads it on a connection of its own, once the memo table exists.
+    """
+
+    def __init__(self, database_path: str, source_path: str) -> None:
+        self.database_path = database_path
+        self.source = get_source_key(source_path)
+
+    def load(self) -> int:
+        """
+        Return the saved position of the input, or 0 if none of it was imported yet.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+        try:
+            connection = sqlite3.connect(self.database_path)
+            try:
+                row = connection.execute(
+                    SELECT_IMPORT_POSITION_SQL, (self.source,)
+                ).fetchone()
+            finally:
+                connection.close()
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_LOAD_IMPORT_POSITION
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+        return 0 if row is None else row[0]
+
+    def at(self, position: int) -> ImportPosition:
+        """Return the import position of the input to save with a batch."""
+
+        return ImportPosition(self.source, position)
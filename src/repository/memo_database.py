@@ -0,0 +1,283 @@
+"""A module for the backups and the maintenance of the SQLite memo database as a whole."""
+
+import os
+import sqlite3
+import time
+from sqlite3 import Connection
+from typing import Callable, Optional, Tuple
+
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.memo_repository import (
+    SELECT_CHANGE_COUNTER_SQL,
+    SELECT_LAST_CHANGE_SEQ_SQL,
+)
+
+SELECT_DATABASE_LIST_SQL = "PRAGMA database_list"
+SELECT_JOURNAL_MODE_SQL = "PRAGMA journal_mode"
+# analysis_limit bounds the rows ANALYZE reads per index, so optimize stays cheap.
+OPTIMIZE_SQLS = ("PRAGMA analysis_limit = 400", "PRAGMA optimize")
+SELECT_FREELIST_COUNT_SQL = "PRAGMA freelist_count"
+INCREMENTAL_VACUUM_SQL = "PRAGMA incremental_vacuum({pages:d})"
+WAL_CHECKPOINT_SQL = "PRAGMA wal_checkpoint({mode})"
+SELECT_LAST_MEMO_ID_SQL = (
+    "SELECT coalesce(max(seq), 0) FROM sqlite_sequence WHERE name = 'memos'"
+)
+# A restore rewinds the change counter, the change log and the memo IDs to those of
+# the snapshot. Moving them past the values they had before the restore keeps the
+# validators, sequence numbers and IDs handed out earlier from naming other states.
+BUMP_CHANGE_COUNTER_SQL = (
+    "UPDATE memos_change_counter SET counter = max(counter, ?) + 1 WHERE id = 0"
+)
+# An explicit seq above the AUTOINCREMENT sequence moves the sequence past it.
+INSERT_RESET_CHANGE_SQL = (
+    "INSERT INTO memo_changes (seq, change_type, memo_id) "
+    "SELECT max(coalesce(max(seq), 0), ?) + 1, 'reset', 0 FROM memo_changes"
+)
+UPDATE_LAST_MEMO_ID_SQL = (
+    "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'memos'"
+)
+INSERT_LAST_MEMO_ID_SQL = "INSERT INTO sqlite_sequence (name, seq) VALUES ('memos', ?)"
+# Pruning keeps the last change below the bound as a RESET, so a follower of the change
+# feed that had not read up to it rebuilds, instead of missing the pruned changes.
+SELECT_LAST_SEQ_BELOW_SQL = "SELECT max(seq) FROM memo_changes WHERE seq < ?"
+DELETE_CHANGES_BELOW_SQL = "DELETE FROM memo_changes WHERE seq < ?"
+UPDATE_CHANGE_TO_RESET_SQL = (
+    "UPDATE memo_changes SET change_type = 'reset', memo_id = 0 WHERE seq = ?"
+)
+# A write from another connection between two steps restarts a stepped copy, so under
+# steady writes it may never complete. The snapshot fails after this many restarts.
+SNAPSHOT_MAX_RESTARTS = 10
+
+
+class SQLiteMemoDatabase:
+    """
+    The operations on the SQLite memo database as a whole, rather than on memos.
+
+    It takes snapshots of the database and restores them with the SQLite backup API,
+    and runs the maintenance tasks that keep the database file compact and fast.
+    The connection is the one of a SQLiteMemoRepository of the database.
+    """
+
+    def __init__(self, connect: Connection):
+        self.connect = connect
+
+    def snapshot(
+        self,
+        dest: str,
+        pages_per_step: int = 256,
+        progress: Optional[Callable[[int, int], None]] = None,
+        pause: float = 0.0,
+    ) -> None:
+        """
+        Copy the database to the file `dest` while it stays in use, with the SQLite backup API.
+
+        The database is copied `pages_per_step` pages at a time. After each step `progress`
+        is called with the number of remaining and total pages, then the copy sleeps `pause`
+        seconds to throttle the backup. The copy is written next to `dest` and moved in
+        place once complete, so `dest` never holds a partial snapshot.
+
+        For a database file in WAL mode, the copy reads a single state of the database
+        through a connection of its own, so writers are never blocked. In the other journal
+        modes the copy is stepped as well and writers only wait for the current step, but
+        a write from another connection between two steps restarts the copy. The copy is
+        given up after `SNAPSHOT_MAX_RESTARTS` restarts, rather than running for as long
+        as the writes go on.
+
+        Raises:
+            RepositoryError: If there is an error during the backup, or if the copy
+                restarted too many times.
+        """
+
+        steps = {"remaining": None, "restarts": 0}
+
+        def on_step(_status: int, remaining: int, total: int) -> None:
+            # a step that leaves as many pages to copy as the one before restarted it
+            if steps["remaining"] is not None and remaining >= steps["remaining"]:
+                steps["restarts"] += 1
+                if steps["restarts"] > SNAPSHOT_MAX_RESTARTS:
+                    raise RuntimeError(
+                        f"The copy restarted more than {SNAPSHOT_MAX_RESTARTS} times"
+                    )
+            steps["remaining"] = remaining
+            if progress is not None:
+                progress(remaining, total)
+            if pause > 0 and remaining > 0:
+                time.sleep(pause)
+
+        temporary_dest = f"{dest}.tmp"
+        try:
+            cursor = self.connect.cursor()
+            path = cursor.execute(SELECT_DATABASE_LIST_SQL).fetchone()[2]
+            journal_mode = cursor.execute(SELECT_JOURNAL_MODE_SQL).fetchone()[0]
+            source = self.connect
+            if path and journal_mode.lower() == "wal":
+                source = self.open_read_snapshot(path)
+
+            target = sqlite3.connect(temporary_dest)
+            try:
+                source.backup(target, pages=pages_per_step, progress=on_step)
+            finally:
+                target.close()
+                if source is not self.connect:
+                    source.close()
+            os.replace(temporary_dest, dest)
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_SNAPSHOT
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    @staticmethod
+    def open_read_snapshot(path: str) -> Connection:
+        """Open a connection to the database file holding a read transaction, pinning its state."""
+
+        connection = sqlite3.connect(path)
+        connection.execute("BEGIN")
+        connection.execute(SELECT_CHANGE_COUNTER_SQL).fetchone()
+        return connection
+
+    def restore(
+        self,
+        source: str,
+        pages_per_step: int = 256,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        Replace the content of the database with the snapshot file `source`.
+
+        `progress` is called after each step of `pages_per_step` pages, as in `snapshot`.
+        Other connections to the database see the restored content once it completes.
+
+        The change counter, the last change sequence number and the last memo ID are then
+        moved past the values they had before the restore, and a RESET change is recorded.
+        So the listing validators and caches of every connection are invalidated, the
+        followers of the change feed know to read the memos again, and no ID or sequence
+        number handed out before the restore is reused.
+
+        Raises:
+            RepositoryError: If the snapshot cannot be read or copied.
+        """
+
+        def on_step(_status: int, remaining: int, total: int) -> None:
+            if progress is not None:
+                progress(remaining, total)
+
+        try:
+            if not os.path.isfile(source):
+                raise FileNotFoundError(source)
+            cursor = self.connect.cursor()
+            counter = cursor.execute(SELECT_CHANGE_COUNTER_SQL).fetchone()[0]
+            last_seq = cursor.execute(SELECT_LAST_CHANGE_SEQ_SQL).fetchone()[0]
+            last_memo_id = cursor.execute(SELECT_LAST_MEMO_ID_SQL).fetchone()[0]
+            snapshot = sqlite3.connect(source)
+            try:
+                snapshot.backup(self.connect, pages=pages_per_step, progress=on_step)
+            finally:
+                snapshot.close()
+
+            with self.connect:
+                cursor.execute(BUMP_CHANGE_COUNTER_SQL, (counter,))
+                cursor.execute(INSERT_RESET_CHANGE_SQL, (last_seq,))
+                cursor.execute(UPDATE_LAST_MEMO_ID_SQL, (last_memo_id,))
+                if cursor.rowcount == 0:
+                    cursor.execute(INSERT_LAST_MEMO_ID_SQL, (last_memo_id,))
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_RESTORE
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def optimize(self) -> None:
+        """
+        Let SQLite refresh the planner statistics of the tables that need it, with ANALYZE.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+        try:
+            cursor = self.connect.cursor()
+            for sql in OPTIMIZE_SQLS:
+                cursor.execute(sql)
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_MAINTAIN
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def incremental_vacuum(self, max_pages: int) -> int:
+        """
+        Release at most `max_pages` free pages to the file system and return how many were.
+
+        Nothing is released from a database created without incremental auto vacuum.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+        try:
+            cursor = self.connect.cursor()
+            with self.connect:
+                cursor.execute(SELECT_FREELIST_COUNT_SQL)
+                free_pages = cursor.fetchone()[0]
+                # a single step frees a single page, executescript steps to completion
+                cursor.executescript(INCREMENTAL_VACUUM_SQL.format(pages=max_pages))
+                cursor.execute(SELECT_FREELIST_COUNT_SQL)
+                return free_pages - cursor.fetchone()[0]
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_MAINTAIN
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def prune_changes(self, below_seq: int) -> int:
+        """
+        Delete the changes with a sequence number below `below_seq`, and return how many were.
+
+        The last of them is kept as a RESET change, so a follower of the change feed that
+        had not read it reads the RESET and reads the memos again. A follower that had
+        read it never sees the RESET.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+        try:
+            cursor = self.connect.cursor()
+            with self.connect:
+                cursor.execute(SELECT_LAST_SEQ_BELOW_SQL, (below_seq,))
+                last_seq = cursor.fetchone()[0]
+                if last_seq is None:
+                    return 0
+                cursor.execute(DELETE_CHANGES_BELOW_SQL, (last_seq,))
+                pruned_changes = cursor.rowcount
+                cursor.execute(UPDATE_CHANGE_TO_RESET_SQL, (last_seq,))
+                return pruned_changes
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_MAINTAIN
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Tuple[int, int]:
+        """
+        Copy the WAL content back into the database file, with the given checkpoint mode.
+
+        PASSIVE never waits for readers or writers, TRUNCATE also empties the WAL file
+        but waits for them. Returns the number of pages in the WAL and the number of pages
+        checkpointed, both -1 if the database is not in WAL mode.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+        try:
+            cursor = self.connect.cursor()
+            cursor.execute(WAL_CHECKPOINT_SQL.format(mode=mode))
+            _busy, wal_pages, checkpointed_pages = cursor.fetchone()
+            return wal_pages, checkpointed_pages
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_MAINTAIN
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
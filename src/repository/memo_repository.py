@@ -1,12 +1,257 @@
 """A module for defining the repository interface for memo management."""
 
 import datetime
+import json
+import threading
 from abc import ABC, abstractmethod
-from sqlite3 import Connection
-from typing import List, Optional
+from sqlite3 import Connection, Cursor
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
 
-from src.entity.memo import Memo
+from src.entity.memo import (
+    MEMO_FIELDS,
+    DateBucket,
+    Memo,
+    MemoChange,
+    MemoChangeType,
+    MemoQuery,
+    to_iso_text,
+)
 from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.import_checkpoint import (
+    CREATE_IMPORT_POSITIONS_SQL,
+    ImportPosition,
+    save_import_position,
+)
+from src.repository.title_search import create_title_trigrams, search_titles
+
+MEMO_COLUMNS = "id, title, create_date, update_date, version, expires_at"
+# Selects the memos that have not expired, given the current date as parameter.
+# NULL never compares true, so the memos without expiry date are kept explicitly.
+UNEXPIRED_CONDITION = "(expires_at IS NULL OR expires_at > ?)"
+
+# Only takes effect on a database without tables. It lets maintenance release
+# free pages a few at a time with incremental_vacuum instead of a full VACUUM.
+SET_AUTO_VACUUM_SQL = "PRAGMA auto_vacuum = INCREMENTAL"
+
+CREATE_MEMOS_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS memos ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    "title TEXT NOT NULL,"
+    "create_date TEXT NOT NULL,"
+    "update_date TEXT NOT NULL,"
+    "version INTEGER NOT NULL DEFAULT 1,"
+    "expires_at TEXT"
+    ")"
+)
+SELECT_MEMOS_COLUMNS_SQL = "PRAGMA table_info(memos)"
+# Columns added after the first release, with the statement that adds each
+# of them to a memos table created by an older version.
+MEMOS_COLUMN_MIGRATIONS = {
+    "version": "ALTER TABLE memos ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    "expires_at": "ALTER TABLE memos ADD COLUMN expires_at TEXT",
+}
+# A single-row table whose counter is increased by triggers on every write to
+# memos, so readers can tell whether the table changed with one indexed lookup.
+CREATE_CHANGE_COUNTER_SQLS = (
+    "CREATE TABLE IF NOT EXISTS memos_change_counter ("
+    "id INTEGER PRIMARY KEY CHECK (id = 0),"
+    "counter INTEGER NOT NULL"
+    ")",
+    "INSERT OR IGNORE INTO memos_change_counter (id, counter) VALUES (0, 0)",
+    "CREATE TRIGGER IF NOT EXISTS memos_count_insert AFTER INSERT ON memos BEGIN "
+    "UPDATE memos_change_counter SET counter = counter + 1 WHERE id = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS memos_count_update AFTER UPDATE ON memos BEGIN "
+    "UPDATE memos_change_counter SET counter = counter + 1 WHERE id = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS memos_count_delete AFTER DELETE ON memos BEGIN "
+    "UPDATE memos_change_counter SET counter = counter + 1 WHERE id = 0; END",
+)
+# The change log, filled by triggers so that every write path is recorded.
+# AUTOINCREMENT guarantees that sequence numbers are never reused.
+CREATE_CHANGE_LOG_SQLS = (
+    "CREATE TABLE IF NOT EXISTS memo_changes ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+    "change_type TEXT NOT NULL,"
+    "memo_id INTEGER NOT NULL"
+    ")",
+    "CREATE TRIGGER IF NOT EXISTS memo_changes_insert AFTER INSERT ON memos BEGIN "
+    "INSERT INTO memo_changes (change_type, memo_id) VALUES ('create', NEW.id); END",
+    "CREATE TRIGGER IF NOT EXISTS memo_changes_update AFTER UPDATE ON memos BEGIN "
+    "INSERT INTO memo_changes (change_type, memo_id) VALUES ('update', NEW.id); END",
+    "CREATE TRIGGER IF NOT EXISTS memo_changes_delete AFTER DELETE ON memos BEGIN "
+    "INSERT INTO memo_changes (change_type, memo_id) VALUES ('delete', OLD.id); END",
+)
+# Indexes on the dates, so memos are counted and aggregated by date from the
+# index alone, without reading the table rows.
+CREATE_DATE_INDEX_SQLS = (
+    "CREATE INDEX IF NOT EXISTS memos_create_date ON memos (create_date)",
+    "CREATE INDEX IF NOT EXISTS memos_update_date ON memos (update_date)",
+)
+# A partial index of the memos that expire, so finding the expired memos and the
+# next expiry date only reads those memos, however many never expire.
+CREATE_EXPIRES_AT_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS memos_expires_at ON memos (expires_at) "
+    "WHERE expires_at IS NOT NULL"
+)
+# The idempotency keys of the memos created recently, with the hash of the request
+# that claimed each key and the memo it created as JSON, so a retried create returns
+# the memo of its first attempt. A key is only reused once it expired, and the
+# index on the expiry date lets the purge find the expired keys.
+CREATE_IDEMPOTENCY_KEYS_SQLS = (
+    "CREATE TABLE IF NOT EXISTS memo_idempotency_keys ("
+    "key TEXT PRIMARY KEY,"
+    "memo_id INTEGER,"
+    "expires_at TEXT NOT NULL,"
+    "request_hash TEXT NOT NULL,"
+    "memo TEXT"
+    ")",
+    "CREATE INDEX IF NOT EXISTS memo_idempotency_keys_expires_at "
+    "ON memo_idempotency_keys (expires_at)",
+)
+SELECT_CHANGES_SQL = (
+    "SELECT c.seq, c.change_type, c.memo_id, "
+    "m.id, m.title, m.create_date, m.update_date, m.version, m.expires_at "
+    "FROM memo_changes c LEFT JOIN memos m ON m.id = c.memo_id "
+    "WHERE c.seq > ? ORDER BY c.seq LIMIT ?"
+)
+SELECT_CHANGE_COUNTER_SQL = "SELECT counter FROM memos_change_counter WHERE id = 0"
+# max() of the primary key reads the last entry of the table b-tree.
+SELECT_LAST_CHANGE_SEQ_SQL = "SELECT coalesce(max(seq), 0) FROM memo_changes"
+INSERT_MEMO_SQL = (
+    "INSERT INTO memos (title, create_date, update_date, expires_at) "
+    "VALUES (?, ?, ?, ?)"
+)
+# Claims a key unless it is held by an unexpired entry, which leaves no row changed.
+# Being the first write of the create transaction, it takes the write lock, so
+# concurrent creates with the same key are serialised and only one claims it.
+CLAIM_IDEMPOTENCY_KEY_SQL = (
+    "INSERT INTO memo_idempotency_keys (key, memo_id, expires_at, request_hash) "
+    "VALUES (?, NULL, ?, ?) ON CONFLICT (key) DO UPDATE SET memo_id = NULL, "
+    "expires_at = excluded.expires_at, request_hash = excluded.request_hash "
+    "WHERE memo_idempotency_keys.expires_at <= ?"
+)
+SET_IDEMPOTENCY_KEY_MEMO_SQL = (
+    "UPDATE memo_idempotency_keys SET memo_id = ?, memo = ? WHERE key = ?"
+)
+SELECT_IDEMPOTENCY_KEY_MEMO_SQL = (
+    "SELECT memo_id, request_hash, memo FROM memo_idempotency_keys WHERE key = ?"
+)
+PURGE_IDEMPOTENCY_KEYS_SQL = (
+    "DELETE FROM memo_idempotency_keys WHERE key IN (SELECT key "
+    "FROM memo_idempotency_keys WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)"
+)
+# An update without expiry date keeps the one of the memo.
+UPDATE_MEMO_SQL = (
+    "UPDATE memos SET title = ?, update_date = ?, "
+    "expires_at = coalesce(?, expires_at), version = version + 1 "
+    f"WHERE id = ? AND {UNEXPIRED_CONDITION} AND (? IS NULL OR version = ?) "
+    f"RETURNING {MEMO_COLUMNS}"
+)
+DELETE_MEMO_SQL = "DELETE FROM memos WHERE id = ?"
+SELECT_MEMO_SQL = (
+    f"SELECT {MEMO_COLUMNS} FROM memos WHERE id = ? AND {UNEXPIRED_CONDITION}"
+)
+SELECT_MEMO_EXISTS_SQL = f"SELECT 1 FROM memos WHERE id = ? AND {UNEXPIRED_CONDITION}"
+SELECT_ALL_MEMOS_SQL = f"SELECT {MEMO_COLUMNS} FROM memos WHERE {UNEXPIRED_CONDITION}"
+SELECT_ALL_MEMO_FIELDS_SQL = "SELECT {columns} FROM memos WHERE " + UNEXPIRED_CONDITION
+# The expired memos are counted from the expiry index and subtracted, so the
+# memos are still counted from the date indexes alone.
+COUNT_MEMOS_SQL = (
+    "SELECT (SELECT count(*) FROM memos{where}) - "
+    "(SELECT count(*) FROM memos{expired_where})"
+)
+COUNT_MEMOS_BY_DATE_SQL = (
+    "SELECT period, sum(n) FROM ("
+    "SELECT substr({column}, 1, {length:d}) AS period, count(*) AS n "
+    "FROM memos{where} GROUP BY period UNION ALL "
+    "SELECT substr({column}, 1, {length:d}) AS period, -count(*) AS n "
+    "FROM memos{expired_where} GROUP BY period"
+    ") GROUP BY period HAVING sum(n) > 0 ORDER BY period"
+)
+# Two subqueries, since SQLite only reads a min or a max from the end of an
+# index when it is the only aggregate of its query.
+SELECT_DATE_RANGE_SQL = (
+    "SELECT (SELECT min({column}) FROM memos{where}), "
+    "(SELECT max({column}) FROM memos{where})"
+)
+SELECT_NEXT_EXPIRY_SQL = "SELECT min(expires_at) FROM memos WHERE expires_at > ?"
+# Deletes the memos that expired first, a bounded batch per statement.
+PURGE_EXPIRED_MEMOS_SQL = (
+    "DELETE FROM memos WHERE id IN ("
+    "SELECT id FROM memos WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)"
+)
+
+
+def memo_date_error(field: str, error: ValueError) -> RepositoryError:
+    """Return the error raised when a stored date of a memo is read and is not a date."""
+
+    error_code = RepositoryErrorCode.INVALID_STORED_DATE
+    return RepositoryError(error_code, f"{error_code.get_message()}: {field}", error)
+
+
+def memo_row_factory(_cursor: Cursor, row: tuple) -> Memo:
+    """
+    Build a Memo from a row of `MEMO_COLUMNS`, its dates parsed only when read.
+
+    A stored date that is not one raises a RepositoryError when it is read.
+    """
+
+    return Memo.from_stored(
+        {
+            "id": row[0],
+            "title": row[1],
+            "create_date": row[2],
+            "update_date": row[3],
+            "version": row[4],
+            "expires_at": row[5],
+        },
+        memo_date_error,
+    )
+
+
+def get_now() -> str:
+    """Return the current date as stored, which expiry dates are compared with."""
+
+    return datetime.datetime.now().isoformat()
+
+
+def build_query_filter(
+    query: MemoQuery, now: Optional[str] = None, expired: bool = False
+) -> Tuple[str, tuple]:
+    """
+    Return the WHERE clause selecting the memos of the query, and its parameters.
+
+    With `now`, only the memos that have not expired at that date are selected, or
+    only the ones that have when `expired` is set.
+    """
+
+    # ISO 8601 dates sort as text, and a day sorts before every time of that day
+    column = query.date_field.value
+    conditions = []
+    params = []
+    if now is not None:
+        conditions.append("expires_at <= ?" if expired else UNEXPIRED_CONDITION)
+        params.append(now)
+    if query.since is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(query.since.isoformat())
+    if query.until is not None:
+        conditions.append(f"{column} < ?")
+        params.append((query.until + datetime.timedelta(days=1)).isoformat())
+
+    if not conditions:
+        return "", ()
+    return " WHERE " + " AND ".join(conditions), tuple(params)
+
+
+def memo_change_row_factory(cursor: Cursor, row: tuple) -> MemoChange:
+    """Build a MemoChange from a row of `SELECT_CHANGES_SQL`."""
+
+    return MemoChange(
+        seq=row[0],
+        change_type=MemoChangeType(row[1]),
+        memo_id=row[2],
+        memo=None if row[3] is None else memo_row_factory(cursor, row[3:]),
+    )
 
 
 class MemoRepositoryInterface(ABC):
@@ -16,6 +261,8 @@ class MemoRepositoryInterface(ABC):
     This interface defines the methods required for managing memos in a repository.
     All operations on memos are expected to return a new instance of Memo,
     as Memo is an immutable type. Each memo should maintain its creation and update timestamps.
+    A memo past its expiry date is left out of every read and can no longer be updated,
+    until `purge_expired` deletes it.
 
     Note:
         All methods may raise a RepositoryError if any database operation fails.
@@ -34,14 +281,41 @@ class MemoRepositoryInterface(ABC):
         """
 
     @abstractmethod
-    def update(self, memo: Memo) -> None:
+    def create_idempotent(
+        self,
+        memo: Memo,
+        key: str,
+        key_expires_at: datetime.datetime,
+        request_hash: str,
+    ) -> Tuple[Memo, bool]:
         """
-        Updates an existing memo.
+        Creates a new memo once per idempotency key, and returns it as created and whether it was.
 
-        The update method should ensure that the update date is current whenever a memo is modified.
+        The key is kept until `key_expires_at`, with the hash of the request creating the
+        memo. Until then, a call with the same key and request hash creates nothing and
+        returns the memo as the key created it, and False. Concurrent calls with the same
+        key create a single memo.
 
         Raises:
-            RepositoryError: If there is an error during the database operation.
+            RepositoryError: If there is an error during the database operation,
+                with `IDEMPOTENCY_KEY_REUSED` if the key was claimed by another request,
+                or with `CREATED_MEMO_DELETED` if the memo the key created is gone.
+        """
+
+    @abstractmethod
+    def update(self, memo: Memo) -> Optional[Memo]:
+        """
+        Updates an existing memo and returns it as stored after the update.
+
+        The update method should ensure that the update date is current whenever a memo is modified,
+        and increase the version of the memo by one. If `memo.version` is set, the update is only
+        applied when it matches the stored version (compare-and-set).
+
+        Returns None if the memo with the specified ID does not exist.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation,
+                or with `MEMO_VERSION_CONFLICT` if the stored version differs from `memo.version`.
         """
 
     @abstractmethod
@@ -77,51 +351,320 @@ class MemoRepositoryInterface(ABC):
             RepositoryError: If there is an error during the database operation.
         """
 
+    @abstractmethod
+    def get_all_fields(self, fields: Sequence[str]) -> List[dict]:
+        """
+        Retrieve only the given fields of all memos, as one dictionary per memo.
+
+        Each dictionary holds the given fields and nothing else, with the dates as ISO
+        8601 strings. Returns an empty list if no memos are found.
+
+        Raises:
+            RepositoryError: If a field is not a Memo field, or if there is an error
+                during the database operation.
+        """
+
+    @abstractmethod
+    def count(self, query: Optional[MemoQuery] = None) -> int:
+        """
+        Count the memos selected by the query, or all memos if there is no query.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def count_by_date(
+        self, query: Optional[MemoQuery], bucket: DateBucket
+    ) -> List[Tuple[str, int]]:
+        """
+        Count the memos selected by the query per period of the queried date.
+
+        Returns (period, count) pairs in period order, where a period is the ISO 8601
+        prefix of the dates in it, e.g. 2024-01 for a month. Periods without memos
+        are left out.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def get_date_range(
+        self, query: Optional[MemoQuery] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return the earliest and latest queried date of the memos selected by the query.
+
+        The dates are ISO 8601 strings, both None if no memo is selected.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def fuzzy_search(self, query: str, limit: int) -> List[Tuple[Memo, float]]:
+        """
+        Return at most `limit` memos whose title is similar to the query, most similar first.
+
+        Each memo comes with its similarity, from 0.0 to 1.0 for a title containing the
+        query. Matching ignores case and tolerates typos, and no memo matches an empty
+        query.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def create_many(
+        self, memos: List[Memo], import_position: Optional[ImportPosition] = None
+    ) -> int:
+        """
+        Creates the memos in a single transaction and returns the number of memos created.
+
+        Either every memo is created or none is. The creation and update dates are set
+        as in `create`. The import position, if any, is saved in the same transaction.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def iter_all(self, batch_size: int) -> Iterator[List[Memo]]:
+        """
+        Iterate over all memos in the repository, in batches of at most `batch_size` memos.
+
+        Unlike `get_all`, the memos are fetched batch by batch as the iterator advances,
+        so the whole table is never held in memory.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def get_change_counter(self) -> int:
+        """
+        Retrieve a counter that increases every time a memo is created, updated or deleted.
+
+        Two equal values mean that the memos have not changed in between,
+        which makes the counter usable as a cheap validator for listings.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def changes_since(self, seq: int, limit: int) -> List[MemoChange]:
+        """
+        Retrieve at most `limit` changes with a sequence number greater than `seq`.
+
+        Every create, update and delete is recorded as a change, and changes are returned
+        in sequence order, so a consumer can sync incrementally by passing the `seq` of the
+        last change it has seen. The memo of a change is its current state, not a snapshot.
+        A RESET change tells the consumer to read the memos again, as the changes before
+        it were replaced by a restore or pruned.
+
+        Returns an empty list if there is no newer change.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def get_last_change_seq(self) -> int:
+        """
+        Retrieve the sequence number of the last change, 0 if there is none.
+
+        A consumer that reads the memos after this sequence number can then sync
+        incrementally with `changes_since`, without replaying the earlier changes.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def get_next_expiry(self) -> Optional[str]:
+        """
+        Retrieve the earliest expiry date of the memos that have not expired yet.
+
+        Returns None if no memo is left to expire. Until that date, the memos read
+        only change with a write, which makes it part of a validator for listings.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def purge_expired(self, limit: int) -> int:
+        """
+        Delete at most `limit` expired memos, the earliest expired first.
+
+        Returns the number of memos deleted, fewer than `limit` once no expired memo
+        is left. Each call is a transaction of its own, so the batches stay short.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
+    @abstractmethod
+    def purge_idempotency_keys(self, limit: int) -> int:
+        """
+        Delete at most `limit` expired idempotency keys, the earliest expired first.
+
+        Returns the number of keys deleted, as `purge_expired` does for memos.
+
+        Raises:
+            RepositoryError: If there is an error during the database operation.
+        """
+
 
 class SQLiteMemoRepository(MemoRepositoryInterface):
-    """An SQLite implementation of the MemoRepositoryInterface."""
+    """
+    An SQLite implementation of the MemoRepositoryInterface.
+
+    The repository can be shared by several threads, on a connection opened with
+    `check_same_thread=False`. A connection has a single transaction, so each call runs
+    its transaction under the lock of the repository, and a commit or rollback of one
+    call never ends the transaction of another. Each call also runs on a cursor of its
+    own, since a cursor must not be used by two threads at once. Creating a cursor is
+    cheap, the connection keeps the prepared statements in its statement cache, so
+    each call only binds parameters to an already prepared statement.
+    """
+
+    # Number of prepared statements the connection should keep cached,
+    # large enough to hold every statement issued by this repository.
+    STATEMENT_CACHE_SIZE = 32
 
     def __init__(self, connect: Connection):
         self.connect = connect
+        self._lock = threading.RLock()
+
+    def _cursor(self, row_factory: Optional[Callable] = None) -> Cursor:
+        """Return a new cursor, building its rows with `row_factory` if given."""
+
+        cursor = self.connect.cursor()
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+        return cursor
 
     def create(self, memo: Memo) -> int:
-        create_date = datetime.datetime.now()
-        update_date = create_date
+        create_date = datetime.datetime.now().isoformat()
         try:
-            with self.connect:
-                cursor = self.connect.cursor()
+            with self._lock, self.connect:
+                cursor = self._cursor()
                 cursor.execute(
-                    "INSERT INTO memos (title, create_date, update_date) VALUES (?, ?, ?)",
-                    (memo.title, create_date.isoformat(), update_date.isoformat()),
+                    INSERT_MEMO_SQL,
+                    (
+                        memo.title,
+                        create_date,
+                        create_date,
+                        to_iso_text(memo.expires_at),
+                    ),
                 )
-                new_id = cursor.lastrowid
-                return new_id
+                return cursor.lastrowid
         except Exception as error:
             error_code = RepositoryErrorCode.FAILED_TO_CREATE_MEMO
             raise RepositoryError(
                 error_code, error_code.get_message(), error
             ) from error
 
-    def update(self, memo: Memo) -> None:
-        update_date = datetime.datetime.now()
+    def create_idempotent(
+        self,
+        memo: Memo,
+        key: str,
+        key_expires_at: datetime.datetime,
+        request_hash: str,
+    ) -> Tuple[Memo, bool]:
+        create_date = get_now()
         try:
-            with self.connect:
-                cursor = self.connect.cursor()
+            with self._lock, self.connect:
+                cursor = self._cursor()
                 cursor.execute(
-                    "UPDATE memos SET title = ?, update_date = ? WHERE id = ?",
-                    (memo.title, update_date.isoformat(), memo.id),
+                    CLAIM_IDEMPOTENCY_KEY_SQL,
+                    (key, key_expires_at.isoformat(), request_hash, create_date),
                 )
+                if cursor.rowcount == 0:
+                    cursor.execute(SELECT_IDEMPOTENCY_KEY_MEMO_SQL, (key,))
+                    memo_id, stored_hash, stored_memo = cursor.fetchone()
+                    error_code = RepositoryErrorCode.IDEMPOTENCY_KEY_REUSED
+                    if stored_hash == request_hash:
+                        cursor.execute(SELECT_MEMO_EXISTS_SQL, (memo_id, create_date))
+                        if cursor.fetchone() is not None:
+                            fields = json.loads(stored_memo)
+                            return Memo.from_stored(fields, memo_date_error), False
+                        error_code = RepositoryErrorCode.CREATED_MEMO_DELETED
+                else:
+                    cursor.execute(
+                        INSERT_MEMO_SQL,
+                        (
+                            memo.title,
+                            create_date,
+                            create_date,
+                            to_iso_text(memo.expires_at),
+                        ),
+                    )
+                    created_memo = Memo.from_stored(
+                        {
+                            "id": cursor.lastrowid,
+                            "title": memo.title,
+                            "create_date": create_date,
+                            "update_date": create_date,
+                            "version": 1,
+                            "expires_at": to_iso_text(memo.expires_at),
+                        },
+                        memo_date_error,
+                    )
+                    cursor.execute(
+                        SET_IDEMPOTENCY_KEY_MEMO_SQL,
+                        (created_memo.id, json.dumps(created_memo.to_dict()), key),
+                    )
+                    return created_memo, True
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_CREATE_MEMO
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+        raise RepositoryError(error_code, error_code.get_message(), None)
+
+    def update(self, memo: Memo) -> Optional[Memo]:
+        update_date = get_now()
+        try:
+            with self._lock, self.connect:
+                memo_cursor = self._cursor(memo_row_factory)
+                cursor = self._cursor()
+                memo_cursor.execute(
+                    UPDATE_MEMO_SQL,
+                    (
+                        memo.title,
+                        update_date,
+                        to_iso_text(memo.expires_at),
+                        memo.id,
+                        update_date,
+                        memo.version,
+                        memo.version,
+                    ),
+                )
+                updated_memo = memo_cursor.fetchone()
+                if updated_memo is not None or memo.version is None:
+                    return updated_memo
+
+                cursor.execute(SELECT_MEMO_EXISTS_SQL, (memo.id, update_date))
+                if cursor.fetchone() is None:
+                    return None
         except Exception as error:
             error_code = RepositoryErrorCode.FAILED_TO_UPDATE_MEMO
             raise RepositoryError(
                 error_code, error_code.get_message(), error
             ) from error
 
+        error_code = RepositoryErrorCode.MEMO_VERSION_CONFLICT
+        raise RepositoryError(error_code, error_code.get_message(), None)
+
     def delete(self, memo: Memo) -> None:
         try:
-            with self.connect:
-                cursor = self.connect.cursor()
-                cursor.execute("DELETE FROM memos WHERE id = ?", (memo.id,))
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(DELETE_MEMO_SQL, (memo.id,))
         except Exception as error:
             error_code = RepositoryErrorCode.FAILED_TO_DELETE_MEMO
             raise RepositoryError(
@@ -130,18 +673,10 @@ class SQLiteMemoRepository(MemoRepositoryInterface):
 
     def get(self, memo_id: int) -> Optional[Memo]:
         try:
-            with self.connect:
-                cursor = self.connect.cursor()
-                cursor.execute("SELECT * FROM memos WHERE id = ?", (memo_id,))
-                row = cursor.fetchone()
-                if row:
-                    return Memo(
-                        id=row[0],
-                        title=row[1],
-                        create_date=datetime.datetime.fromisoformat(row[2]),
-                        update_date=datetime.datetime.fromisoformat(row[3]),
-                    )
-                return None
+            with self._lock, self.connect:
+                cursor = self._cursor(memo_row_factory)
+                cursor.execute(SELECT_MEMO_SQL, (memo_id, get_now()))
+                return cursor.fetchone()
         except Exception as error:
             error_code = RepositoryErrorCode.FAILED_TO_GET_MEMO
             raise RepositoryError(
@@ -150,39 +685,239 @@ class SQLiteMemoRepository(MemoRepositoryInterface):
 
     def get_all(self) -> List[Memo]:
         try:
-            with self.connect:
-                cursor = self.connect.cursor()
-                cursor.execute("SELECT * FROM memos")
-                rows = cursor.fetchall()
-                return [
-                    Memo(
-                        id=row[0],
-                        title=row[1],
-                        create_date=datetime.datetime.fromisoformat(row[2]),
-                        update_date=datetime.datetime.fromisoformat(row[3]),
-                    )
-                    for row in rows
-                ]
+            with self._lock, self.connect:
+                cursor = self._cursor(memo_row_factory)
+                cursor.execute(SELECT_ALL_MEMOS_SQL, (get_now(),))
+                return cursor.fetchall()
         except Exception as error:
             error_code = RepositoryErrorCode.FAILED_TO_GET_ALL_MEMOS
             raise RepositoryError(
                 error_code, error_code.get_message(), error
             ) from error
 
-    def create_table_if_not_exists(self):
-        """Create the memos table if it does not exist."""
+    def get_all_fields(self, fields: Sequence[str]) -> List[dict]:
+        # only known field names reach the SQL, in a fixed order per field set
+        columns = [name for name in MEMO_FIELDS if name in fields]
+        try:
+            if not columns or len(columns) != len(set(fields)):
+                raise ValueError(f"Invalid memo fields: {fields}")
+
+            sql = SELECT_ALL_MEMO_FIELDS_SQL.format(columns=", ".join(columns))
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(sql, (get_now(),))
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_ALL_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
 
-        with self.connect:
-            cursor = self.connect.cursor()
-            cursor.execute(
-                "".join(
+    def count(self, query: Optional[MemoQuery] = None) -> int:
+        query = MemoQuery() if query is None else query
+        where, params = build_query_filter(query)
+        expired_where, expired_params = build_query_filter(query, get_now(), True)
+        sql = COUNT_MEMOS_SQL.format(where=where, expired_where=expired_where)
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(sql, params + expired_params)
+                return cursor.fetchone()[0]
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_COUNT_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def count_by_date(
+        self, query: Optional[MemoQuery], bucket: DateBucket
+    ) -> List[Tuple[str, int]]:
+        query = MemoQuery() if query is None else query
+        where, params = build_query_filter(query)
+        expired_where, expired_params = build_query_filter(query, get_now(), True)
+        sql = COUNT_MEMOS_BY_DATE_SQL.format(
+            column=query.date_field.value,
+            length=bucket.get_prefix_length(),
+            where=where,
+            expired_where=expired_where,
+        )
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(sql, params + expired_params)
+                return cursor.fetchall()
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_COUNT_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def get_date_range(
+        self, query: Optional[MemoQuery] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        query = MemoQuery() if query is None else query
+        where, params = build_query_filter(query, get_now())
+        sql = SELECT_DATE_RANGE_SQL.format(column=query.date_field.value, where=where)
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(sql, params + params)
+                return cursor.fetchone()
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_DATE_RANGE
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def fuzzy_search(self, query: str, limit: int) -> List[Tuple[Memo, float]]:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor(memo_row_factory)
+                return search_titles(cursor, query, limit, get_now())
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_SEARCH_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def create_many(
+        self, memos: List[Memo], import_position: Optional[ImportPosition] = None
+    ) -> int:
+        create_date = datetime.datetime.now().isoformat()
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.executemany(
+                    INSERT_MEMO_SQL,
                     [
-                        "CREATE TABLE IF NOT EXISTS memos (",
-                        "id INTEGER PRIMARY KEY AUTOINCREMENT,",
-                        "title TEXT NOT NULL,",
-                        "create_date TEXT NOT NULL,",
-                        "update_date TEXT NOT NULL",
-                        ")",
-                    ]
+                        (
+                            memo.title,
+                            create_date,
+                            create_date,
+                            to_iso_text(memo.expires_at),
+                        )
+                        for memo in memos
+                    ],
                 )
-            )
+                if import_position is not None:
+                    save_import_position(cursor, import_position)
+                return len(memos)
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_CREATE_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def iter_all(self, batch_size: int) -> Iterator[List[Memo]]:
+        cursor = self._cursor(memo_row_factory)
+        try:
+            # the lock is not held across a yield, only while a batch is read
+            with self._lock:
+                cursor.execute(SELECT_ALL_MEMOS_SQL, (get_now(),))
+                memos = cursor.fetchmany(batch_size)
+            while memos:
+                yield memos
+                with self._lock:
+                    memos = cursor.fetchmany(batch_size)
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_ALL_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+        finally:
+            cursor.close()
+
+    def get_change_counter(self) -> int:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(SELECT_CHANGE_COUNTER_SQL)
+                return cursor.fetchone()[0]
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_CHANGE_COUNTER
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def changes_since(self, seq: int, limit: int) -> List[MemoChange]:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor(memo_change_row_factory)
+                cursor.execute(SELECT_CHANGES_SQL, (seq, limit))
+                return cursor.fetchall()
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_CHANGES
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def get_last_change_seq(self) -> int:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(SELECT_LAST_CHANGE_SEQ_SQL)
+                return cursor.fetchone()[0]
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_LAST_CHANGE_SEQ
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def get_next_expiry(self) -> Optional[str]:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(SELECT_NEXT_EXPIRY_SQL, (get_now(),))
+                return cursor.fetchone()[0]
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_GET_NEXT_EXPIRY
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def purge_expired(self, limit: int) -> int:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(PURGE_EXPIRED_MEMOS_SQL, (get_now(), limit))
+                return cursor.rowcount
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_PURGE_MEMOS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def purge_idempotency_keys(self, limit: int) -> int:
+        try:
+            with self._lock, self.connect:
+                cursor = self._cursor()
+                cursor.execute(PURGE_IDEMPOTENCY_KEYS_SQL, (get_now(), limit))
+                return cursor.rowcount
+        except Exception as error:
+            error_code = RepositoryErrorCode.FAILED_TO_PURGE_IDEMPOTENCY_KEYS
+            raise RepositoryError(
+                error_code, error_code.get_message(), error
+            ) from error
+
+    def create_table_if_not_exists(self):
+        """Create the memos table if it does not exist and add any column it is missing."""
+
+        with self._lock, self.connect:
+            cursor = self._cursor()
+            cursor.execute(SET_AUTO_VACUUM_SQL)
+            cursor.execute(CREATE_MEMOS_TABLE_SQL)
+            cursor.execute(SELECT_MEMOS_COLUMNS_SQL)
+            columns = {row[1] for row in cursor.fetchall()}
+            for column, migration_sql in MEMOS_COLUMN_MIGRATIONS.items():
+                if column not in columns:
+                    cursor.execute(migration_sql)
+            for sql in (
+                CREATE_CHANGE_COUNTER_SQLS
+                + CREATE_CHANGE_LOG_SQLS
+                + CREATE_DATE_INDEX_SQLS
+                + (CREATE_EXPIRES_AT_INDEX_SQL,)
+                + CREATE_IDEMPOTENCY_KEYS_SQLS
+                + (CREATE_IMPORT_POSITIONS_SQL,)
+            ):
+                cursor.execute(sql)
+            create_title_trigrams(cursor)
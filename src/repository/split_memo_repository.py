@@ -0,0 +1,232 @@
+"""A module for a memo repository writing on one thread and reading on several connections."""
+
+import datetime
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from src.entity.memo import DateBucket, Memo, MemoChange, MemoQuery
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.import_checkpoint import ImportPosition
+from src.repository.memo_repository import MemoRepositoryInterface, SQLiteMemoRepository
+
+
+def connect_split_database(path: str, read_only: bool) -> sqlite3.Connection:
+    """Connect to a database file in WAL mode, for use from any thread."""
+
+    if path == ":memory:":
+        raise ValueError("Splitting reads from writes requires a database file.")
+
+    database_connection = sqlite3.connect(
+        path,
+        cached_statements=SQLiteMemoRepository.STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
+    database_connection.execute("PRAGMA journal_mode=WAL")
+    if read_only:
+        database_connection.execute("PRAGMA query_only = ON")
+
+    return database_connection
+
+
+def open_split_reader(path: str) -> SQLiteMemoRepository:
+    """Open a read-only repository of a database file, for use from any thread."""
+
+    return SQLiteMemoRepository(connect_split_database(path, True))
+
+
+# pylint: disable-next=too-many-public-methods
+class SplitSQLiteMemoRepository(MemoRepositoryInterface):
+    """
+    An SQLite memo repository that writes on one thread and reads on a pool of connections.
+
+    Every mutation is queued to a dedicated writer thread, which runs them one after
+    the other on the only connection allowed to write, as SQLite would serialise them
+    anyway. Reads take a connection of the pool, opened with `query_only`, so in WAL
+    mode they run in parallel with each other and with the writer, and a slow listing
+    never holds up writes. A write returns once committed, so the reads that follow
+    it see it. `iter_all` reads on a connection of its own, opened with `open_reader`
+    and closed when the iteration ends, so an export never holds a pooled connection.
+
+    The writer and readers are SQLiteMemoRepository instances, so both sides keep the
+    behaviour and errors of the MemoRepositoryInterface contract. Use `open` to create
+    one on a database file, and `close` to stop the writer and close the connections.
+    """
+
+    def __init__(
+        self,
+        writer: SQLiteMemoRepository,
+        readers: List[SQLiteMemoRepository],
+        open_reader: Callable[[], SQLiteMemoRepository],
+    ) -> None:
+        self.writer = writer
+        self.readers = readers
+        self.open_reader = open_reader
+        self._idle_readers: "queue.Queue[SQLiteMemoRepository]" = queue.Queue()
+        for reader in readers:
+            self._idle_readers.put(reader)
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._closed = False
+        # makes closing and queueing a write atomic, so no write is queued after None
+        self._closed_lock = threading.Lock()
+        self._writer_thread = threading.Thread(
+            target=self._run_writes, name="memo-writer", daemon=True
+        )
+        self._writer_thread.start()
+
+    @classmethod
+    def open(cls, path: str, read_connections: int) -> "SplitSQLiteMemoRepository":
+        """Open the repository of a database file, with `read_connections` readers."""
+
+        writer = SQLiteMemoRepository(connect_split_database(path, False))
+        writer.create_table_if_not_exists()
+        readers = [open_split_reader(path) for _ in range(read_connections)]
+
+        return cls(writer, readers, lambda: open_split_reader(path))
+
+    def close(self) -> None:
+        """Run the queued writes, stop the writer thread and close every connection."""
+
+        with self._closed_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._write_queue.put(None)
+
+        self._writer_thread.join()
+        self.writer.connect.close()
+        for reader in self.readers:
+            reader.connect.close()
+
+    def _run_writes(self) -> None:
+        """Run the queued writes in order until `close` queues None."""
+
+        while True:
+            task = self._write_queue.get()
+            if task is None:
+                return
+
+            future, function, args = task
+            try:
+                future.set_result(function(*args))
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                # the error is raised again in the thread that queued the write
+                future.set_exception(error)
+
+    def _write(self, function: Callable, *args) -> Any:
+        """
+        Run a method of the writer on the writer thread and return its result.
+
+        Raises:
+            RepositoryError: If the repository is closed, or the write fails.
+        """
+
+        future: Future = Future()
+        with self._closed_lock:
+            if self._closed:
+                error_code = RepositoryErrorCode.REPOSITORY_CLOSED
+                raise RepositoryError(error_code, error_code.get_message(), None)
+            self._write_queue.put((future, function, args))
+
+        return future.result()
+
+    @contextmanager
+    def _reader(self) -> Iterator[SQLiteMemoRepository]:
+        """Take an idle reader for the duration of the block, waiting for one if needed."""
+
+        reader = self._idle_readers.get()
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put(reader)
+
+    def create(self, memo: Memo) -> int:
+        return self._write(self.writer.create, memo)
+
+    def create_idempotent(
+        self,
+        memo: Memo,
+        key: str,
+        key_expires_at: datetime.datetime,
+        request_hash: str,
+    ) -> Tuple[Memo, bool]:
+        return self._write(
+            self.writer.create_idempotent, memo, key, key_expires_at, request_hash
+        )
+
+    def update(self, memo: Memo) -> Optional[Memo]:
+        return self._write(self.writer.update, memo)
+
+    def delete(self, memo: Memo) -> None:
+        self._write(self.writer.delete, memo)
+
+    def create_many(
+        self, memos: List[Memo], import_position: Optional[ImportPosition] = None
+    ) -> int:
+        return self._write(self.writer.create_many, memos, import_position)
+
+    def purge_expired(self, limit: int) -> int:
+        return self._write(self.writer.purge_expired, limit)
+
+    def purge_idempotency_keys(self, limit: int) -> int:
+        return self._write(self.writer.purge_idempotency_keys, limit)
+
+    def get(self, memo_id: int) -> Optional[Memo]:
+        with self._reader() as reader:
+            return reader.get(memo_id)
+
+    def get_all(self) -> List[Memo]:
+        with self._reader() as reader:
+            return reader.get_all()
+
+    def get_all_fields(self, fields: Sequence[str]) -> List[dict]:
+        with self._reader() as reader:
+            return reader.get_all_fields(fields)
+
+    def iter_all(self, batch_size: int) -> Iterator[List[Memo]]:
+        # the cursor reads the batches until the iteration ends, so holding a pooled
+        # reader that long would block the other reads while the pool is small
+        reader = self.open_reader()
+        try:
+            yield from reader.iter_all(batch_size)
+        finally:
+            reader.connect.close()
+
+    def count(self, query: Optional[MemoQuery] = None) -> int:
+        with self._reader() as reader:
+            return reader.count(query)
+
+    def count_by_date(
+        self, query: Optional[MemoQuery], bucket: DateBucket
+    ) -> List[Tuple[str, int]]:
+        with self._reader() as reader:
+            return reader.count_by_date(query, bucket)
+
+    def get_date_range(
+        self, query: Optional[MemoQuery] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        with self._reader() as reader:
+            return reader.get_date_range(query)
+
+    def fuzzy_search(self, query: str, limit: int) -> List[Tuple[Memo, float]]:
+        with self._reader() as reader:
+            return reader.fuzzy_search(query, limit)
+
+    def get_change_counter(self) -> int:
+        with self._reader() as reader:
+            return reader.get_change_counter()
+
+    def changes_since(self, seq: int, limit: int) -> List[MemoChange]:
+        with self._reader() as reader:
+            return reader.changes_since(seq, limit)
+
+    def get_last_change_seq(self) -> int:
+        with self._reader() as reader:
+            return reader.get_last_change_seq()
+
+    def get_next_expiry(self) -> Optional[str]:
+        with self._reader() as reader:
+            return reader.get_next_expiry()
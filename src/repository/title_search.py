@@ -0,0 +1,195 @@
+"""A module for searching memo titles through an FTS5 trigram index of the SQLite memo database."""
+
+from sqlite3 import Cursor
+from typing import FrozenSet, List, Tuple
+
+from src.entity.memo import Memo
+
+# An external content FTS5 table of the trigrams of every memo title, kept in sync
+# by triggers, so substring and fuzzy title searches read the posting lists of
+# the searched trigrams instead of scanning memos.
+CREATE_TITLE_TRIGRAMS_SQLS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS memos_title_trigrams USING fts5("
+    "title, content='memos', content_rowid='id', tokenize='trigram'"
+    ")",
+    "CREATE TRIGGER IF NOT EXISTS memos_title_trigrams_insert AFTER INSERT ON memos "
+    "BEGIN INSERT INTO memos_title_trigrams (rowid, title) "
+    "VALUES (NEW.id, NEW.title); END",
+    "CREATE TRIGGER IF NOT EXISTS memos_title_trigrams_update "
+    "AFTER UPDATE OF title ON memos BEGIN "
+    "INSERT INTO memos_title_trigrams (memos_title_trigrams, rowid, title) "
+    "VALUES ('delete', OLD.id, OLD.title); "
+    "INSERT INTO memos_title_trigrams (rowid, title) VALUES (NEW.id, NEW.title); END",
+    "CREATE TRIGGER IF NOT EXISTS memos_title_trigrams_delete AFTER DELETE ON memos "
+    "BEGIN INSERT INTO memos_title_trigrams (memos_title_trigrams, rowid, title) "
+    "VALUES ('delete', OLD.id, OLD.title); END",
+    # the number of titles containing each trigram, read from the index itself
+    "CREATE VIRTUAL TABLE IF NOT EXISTS memos_title_trigrams_vocab "
+    "USING fts5vocab(memos_title_trigrams, row)",
+)
+SELECT_TITLE_TRIGRAMS_EXISTS_SQL = (
+    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memos_title_trigrams'"
+)
+# Indexes the titles of the memos created before the trigram table existed.
+REBUILD_TITLE_TRIGRAMS_SQL = (
+    "INSERT INTO memos_title_trigrams (memos_title_trigrams) VALUES ('rebuild')"
+)
+# Without ranking, the lookup stops at the limit instead of scoring every match.
+# FTS5 returns its matches in rowid order, so ordering by it keeps the capped
+# lookup deterministic without sorting.
+SEARCH_TITLE_MATCH_SQL = (
+    "SELECT m.id, m.title, m.create_date, m.update_date, m.version, m.expires_at "
+    "FROM memos_title_trigrams JOIN memos m ON m.id = memos_title_trigrams.rowid "
+    "WHERE memos_title_trigrams MATCH ? "
+    "AND (m.expires_at IS NULL OR m.expires_at > ?) "
+    "ORDER BY memos_title_trigrams.rowid LIMIT ?"
+)
+SELECT_TRIGRAM_TITLE_COUNTS_SQL = (
+    "SELECT term, doc FROM memos_title_trigrams_vocab WHERE term IN ({placeholders})"
+)
+# Queries shorter than a trigram cannot use the index, the scan stops at the limit.
+SEARCH_SHORT_TITLE_SQL = (
+    "SELECT id, title, create_date, update_date, version, expires_at FROM memos "
+    "WHERE instr(lower(title), ?) > 0 "
+    "AND (expires_at IS NULL OR expires_at > ?) LIMIT ?"
+)
+# The share of the query trigrams a title must contain to be a fuzzy search result.
+FUZZY_SEARCH_MIN_SIMILARITY = 0.3
+# The number of titles containing the query per requested result that are ranked.
+FUZZY_SEARCH_CANDIDATES_PER_RESULT = 10
+# The most titles sharing trigrams with the query that are ranked by similarity.
+FUZZY_SEARCH_MAX_CANDIDATES = 1000
+
+
+def get_trigrams(text: str) -> FrozenSet[str]:
+    """Return the case-insensitive trigrams of a text, as the FTS5 trigram tokenizer splits it."""
+
+    text = text.lower()
+    return frozenset(text[index : index + 3] for index in range(len(text) - 2))
+
+
+def build_substring_match(query: str) -> str:
+    """Return an FTS5 query matching the titles that contain the query."""
+
+    return '"' + query.replace('"', '""') + '"'
+
+
+def build_trigram_match(trigrams: FrozenSet[str]) -> str:
+    """Return an FTS5 query matching the titles that contain any of the trigrams."""
+
+    return " OR ".join(
+        '"' + trigram.replace('"', '""') + '"' for trigram in sorted(trigrams)
+    )
+
+
+def rank_by_similarity(
+    query_trigrams: FrozenSet[str], memos: List[Memo], limit: int
+) -> List[Tuple[Memo, float]]:
+    """
+    Return the most similar memos to the query trigrams, with their similarity.
+
+    The similarity is the share of the query trigrams found in the title, so a title
+    containing the query scores 1.0 and a typo loses a few trigrams. Titles of equal
+    similarity are ordered by their trigram Jaccard index, which favours the titles
+    closest to the query in length.
+    """
+
+    scored = []
+    for memo in memos:
+        title_trigrams = get_trigrams(memo.title)
+        shared = len(query_trigrams & title_trigrams)
+        similarity = shared / len(query_trigrams)
+        if similarity >= FUZZY_SEARCH_MIN_SIMILARITY:
+            jaccard = shared / len(query_trigrams | title_trigrams)
+            scored.append((similarity, jaccard, memo))
+
+    scored.sort(key=lambda item: (-item[0], -item[1], item[2].id))
+    return [(memo, round(similarity, 4)) for similarity, _, memo in scored[:limit]]
+
+
+def get_min_shared_trigrams(trigram_count: int) -> int:
+    """Return the fewest of the query trigrams a title must contain to be a fuzzy result."""
+
+    return next(
+        shared
+        for shared in range(1, trigram_count + 1)
+        if shared / trigram_count >= FUZZY_SEARCH_MIN_SIMILARITY
+    )
+
+
+def select_rarest_trigrams(
+    cursor: Cursor, query_trigrams: FrozenSet[str]
+) -> FrozenSet[str]:
+    """
+    Return the query trigrams that every fuzzy result contains at least one of.
+
+    A result contains at least k = `get_min_shared_trigrams(n)` of the n query trigrams,
+    so it lacks at most n - k of them and contains one of any n - k + 1. Taking the
+    n - k + 1 found in the fewest titles keeps the candidates few, however common the
+    other trigrams of the query are.
+    """
+
+    cursor.execute(
+        SELECT_TRIGRAM_TITLE_COUNTS_SQL.format(
+            placeholders=", ".join("?" * len(query_trigrams))
+        ),
+        sorted(query_trigrams),
+    )
+    title_counts = dict(cursor.fetchall())
+    by_rarity = sorted(
+        query_trigrams, key=lambda trigram: (title_counts.get(trigram, 0), trigram)
+    )
+    kept = len(query_trigrams) - get_min_shared_trigrams(len(query_trigrams)) + 1
+    return frozenset(by_rarity[:kept])
+
+
+def create_title_trigrams(cursor: Cursor) -> None:
+    """Create the trigram index of the titles if it does not exist, indexing the existing memos."""
+
+    cursor.execute(SELECT_TITLE_TRIGRAMS_EXISTS_SQL)
+    title_trigrams_exist = cursor.fetchone() is not None
+    for sql in CREATE_TITLE_TRIGRAMS_SQLS:
+        cursor.execute(sql)
+    if not title_trigrams_exist:
+        cursor.execute(REBUILD_TITLE_TRIGRAMS_SQL)
+
+
+def search_titles(
+    cursor: Cursor, query: str, limit: int, now: str
+) -> List[Tuple[Memo, float]]:
+    """
+    Return at most `limit` memos unexpired at `now` whose title is similar to the query.
+
+    `cursor` must build a Memo per row. The titles containing the query are looked up
+    first, as a phrase of trigrams. Only when they are fewer than `limit` are the titles
+    containing one of the rarest query trigrams added to them, at most
+    FUZZY_SEARCH_MAX_CANDIDATES of them, so the work stays bounded on large tables.
+    The titles containing the query are always ranked, with a similarity of 1.0.
+    """
+
+    if not query:
+        return []
+
+    query_trigrams = get_trigrams(query)
+    if not query_trigrams:
+        cursor.execute(SEARCH_SHORT_TITLE_SQL, (query.lower(), now, limit))
+        return [(memo, 1.0) for memo in cursor.fetchall()]
+
+    candidate_limit = limit * FUZZY_SEARCH_CANDIDATES_PER_RESULT
+    cursor.execute(
+        SEARCH_TITLE_MATCH_SQL,
+        (build_substring_match(query), now, candidate_limit),
+    )
+    candidates = cursor.fetchall()
+    if len(candidates) < limit:
+        rarest_trigrams = select_rarest_trigrams(
+            cursor.connection.cursor(), query_trigrams
+        )
+        cursor.execute(
+            SEARCH_TITLE_MATCH_SQL,
+            (build_trigram_match(rarest_trigrams), now, FUZZY_SEARCH_MAX_CANDIDATES),
+        )
+        found_ids = {memo.id for memo in candidates}
+        candidates += [memo for memo in cursor.fetchall() if memo.id not in found_ids]
+
+    return rank_by_similarity(query_trigrams, candidates, limit)
@@ -0,0 +1,185 @@
+"""A module for limiting the MemoNest use cases running at once, rejecting the excess."""
+
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Optional
+
+from src.interaction import DelegatingMemoNest, MemoNest, OutputHandler
+
+# The use cases that write memos, limited separately from those that only read.
+WRITE_USE_CASES = frozenset(("create_memo", "update_memo", "delete_memo"))
+
+
+class AdmissionErrorCode(Enum):
+    """Custom error code for use cases rejected by admission control."""
+
+    QUEUE_FULL = 200
+    QUEUE_TIMEOUT = 201
+
+    def get_message(self) -> str:
+        """Return a human-readable message for the error code."""
+
+        return self.name.lower().capitalize().replace("_", " ")
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """
+    How many use cases run at once, and how long the others may wait.
+
+    Attributes:
+        read_limit (int): The maximum number of reading use cases running at once.
+        write_limit (int): The maximum number of writing use cases running at once.
+        read_queue (int): The maximum number of reading use cases waiting for a slot.
+        write_queue (int): The maximum number of writing use cases waiting for a slot.
+        timeout (float): The longest time in seconds a use case waits for a slot.
+    """
+
+    read_limit: int = 8
+    write_limit: int = 1
+    read_queue: int = 32
+    write_queue: int = 16
+    timeout: float = 1.0
+
+
+class AdmissionLimiter:
+    """
+    A semaphore with a bounded wait queue and a deadline for waiting.
+
+    A caller gets a slot at once while fewer than `limit` are taken and nobody waits.
+    Otherwise it waits in the queue, unless `max_queue` callers already do, and gives up
+    once the timeout passed. Waiting callers are woken one per released slot. The
+    counters of `get_metrics` tell how loaded the limiter is and was.
+    """
+
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted_count = 0
+        self.rejected_count = 0
+        self.timeout_count = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: float) -> Optional[AdmissionErrorCode]:
+        """Take a slot, waiting at most `timeout` seconds, and return None or why not."""
+
+        with self._condition:
+            if self.active >= self.limit or self.waiting > 0:
+                if self.waiting >= self.max_queue:
+                    self.rejected_count += 1
+                    return AdmissionErrorCode.QUEUE_FULL
+
+                self.waiting += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+                deadline = time.monotonic() + timeout
+                try:
+                    while self.active >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeout_count += 1
+                            return AdmissionErrorCode.QUEUE_TIMEOUT
+                        self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            self.admitted_count += 1
+            return None
+
+    def release(self) -> None:
+        """Give back a slot taken by `acquire`, waking one waiting caller."""
+
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Return the current slot and queue use, and the counts since creation."""
+
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "admitted": self.admitted_count,
+                "rejected": self.rejected_count,
+                "timed_out": self.timeout_count,
+            }
+
+
+class MemoAdmission:
+    """
+    The read and write limiters of a policy, shared by every AdmissionMemoNest.
+
+    Writes are limited on their own, since SQLite runs one write at a time, so a burst
+    of writes waits or is rejected without taking the slots of the reads.
+    """
+
+    def __init__(self, policy: Optional[AdmissionPolicy] = None) -> None:
+        self.policy = AdmissionPolicy() if policy is None else policy
+        self.read_limiter = AdmissionLimiter(
+            self.policy.read_limit, self.policy.read_queue
+        )
+        self.write_limiter = AdmissionLimiter(
+            self.policy.write_limit, self.policy.write_queue
+        )
+
+    def get_limiter(self, use_case: str) -> AdmissionLimiter:
+        """Return the limiter of the use case of the given name."""
+
+        if use_case in WRITE_USE_CASES:
+            return self.write_limiter
+        return self.read_limiter
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Return the metrics of the read and write limiters."""
+
+        return {
+            "read": self.read_limiter.get_metrics(),
+            "write": self.write_limiter.get_metrics(),
+        }
+
+
+class AdmissionMemoNest(DelegatingMemoNest):
+    """
+    A MemoNest that passes each use case to another MemoNest once admitted.
+
+    A use case that gets no slot of its limiter in time is not run, and outputs the
+    AdmissionErrorCode through `error_output` instead, so callers can tell an overload
+    from a failure and retry later. The output handler is shared with the wrapped
+    MemoNest, so callers see its output unchanged.
+    """
+
+    def __init__(self, memo_nest: MemoNest, admission: MemoAdmission) -> None:
+        super().__init__()
+        self.memo_nest = memo_nest
+        self.admission = admission
+        self.output_handler = memo_nest.output_handler
+
+    def set_output(self, output: OutputHandler) -> None:
+        super().set_output(output)
+        self.memo_nest.set_output(output)
+
+    def run(self, use_case: str, data: Optional[dict]) -> None:
+        """Run a use case of the wrapped MemoNest if it is admitted in time."""
+
+        limiter = self.admission.get_limiter(use_case)
+        error_code = limiter.acquire(self.admission.policy.timeout)
+        if error_code is not None:
+            self.error(error_code.value, error_code.get_message())
+            return
+
+        try:
+            function = getattr(self.memo_nest, use_case)
+            if data is None:
+                function()
+            else:
+                function(data)
+        finally:
+            limiter.release()
@@ -0,0 +1,180 @@
+"""A module for suggesting memo titles from an in-memory index of their prefixes."""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.entity.memo import MemoChangeType, to_iso_text
+from src.repository.memo_repository import MemoRepositoryInterface, get_now
+
+# The number of changes read from the change feed at a time while catching up.
+CHANGE_BATCH_SIZE = 1000
+# The seconds a suggestion may answer from the index without reading the change feed.
+SYNC_INTERVAL = 1.0
+
+
+def get_title_key(title: str) -> Tuple[str, str]:
+    """Return the sort key of a title, which orders titles regardless of case."""
+
+    return (title.casefold(), title)
+
+
+class TitleIndex:
+    """
+    An in-memory index of the distinct memo titles, sorted regardless of case.
+
+    The titles sharing a prefix are a contiguous run of the sorted list, so a
+    suggestion is a binary search and a slice, whatever the number of memos. The
+    index is built from the memo titles once, then kept up to date by applying the
+    changes recorded after it in the change feed of the repository. That catches up
+    with the writes made through any connection. Suggestions only read the feed once
+    `sync_interval` seconds passed since the last sync, so the keystrokes in between
+    are answered from memory alone, and a write is suggested within that interval.
+
+    Expired memos stay in the feed until they are purged, so the index keeps the
+    expiry date of each memo and a title is only suggested while one of its memos
+    has not expired, as the repository reads do. A RESET change in the feed, recorded
+    when a snapshot is restored or the changes the index had not read are pruned,
+    makes the index build itself again.
+
+    Every operation takes the lock of the index, which makes it safe to share between
+    the MemoService instances of concurrent requests.
+    """
+
+    def __init__(self, sync_interval: float = SYNC_INTERVAL) -> None:
+        self.sync_interval = sync_interval
+        self.last_seq: Optional[int] = None
+        self.titles_by_id: Dict[int, str] = {}
+        self.expiries_by_id: Dict[int, str] = {}
+        self.memo_ids_by_title: Dict[str, Set[int]] = {}
+        self.keys: List[Tuple[str, str]] = []
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def suggest(
+        self, memo_repo: MemoRepositoryInterface, prefix: str, limit: int
+    ) -> List[str]:
+        """
+        Return at most `limit` distinct titles starting with `prefix`, regardless of case.
+
+        The titles are sorted regardless of case. The index is synced with the
+        repository first if it was last synced `sync_interval` seconds ago or more.
+
+        Raises:
+            RepositoryError: If the memos or their changes cannot be read.
+        """
+
+        with self._lock:
+            if (
+                self._synced_at is None
+                or time.monotonic() - self._synced_at >= self.sync_interval
+            ):
+                self._sync(memo_repo)
+
+            key = prefix.casefold()
+            now = get_now()
+            titles = []
+            for index in range(bisect_left(self.keys, (key,)), len(self.keys)):
+                title_key, title = self.keys[index]
+                if len(titles) == limit or not title_key.startswith(key):
+                    break
+                if self._is_live(title, now):
+                    titles.append(title)
+
+            return titles
+
+    def _is_live(self, title: str, now: str) -> bool:
+        """Tell whether a memo with the title has not expired at `now`."""
+
+        return any(
+            self.expiries_by_id.get(memo_id) is None
+            or self.expiries_by_id[memo_id] > now
+            for memo_id in self.memo_ids_by_title[title]
+        )
+
+    def sync(self, memo_repo: MemoRepositoryInterface) -> None:
+        """
+        Build the index from the memos of the repository, or apply the changes since.
+
+        Raises:
+            RepositoryError: If the memos or their changes cannot be read.
+        """
+
+        with self._lock:
+            self._sync(memo_repo)
+
+    def _sync(self, memo_repo: MemoRepositoryInterface) -> None:
+        """Build or update the index, with the lock held."""
+
+        synced_at = time.monotonic()
+        if self.last_seq is None:
+            self._build(memo_repo)
+
+        while True:
+            changes = memo_repo.changes_since(self.last_seq, CHANGE_BATCH_SIZE)
+            if any(change.change_type is MemoChangeType.RESET for change in changes):
+                # the memos were replaced by a restore, the changes before it are stale
+                self._build(memo_repo)
+                continue
+            for change in changes:
+                if change.memo is None:
+                    self._set_title(change.memo_id, None, None)
+                else:
+                    self._set_title(
+                        change.memo_id,
+                        change.memo.title,
+                        to_iso_text(change.memo.expires_at),
+                    )
+            if changes:
+                self.last_seq = changes[-1].seq
+            if len(changes) < CHANGE_BATCH_SIZE:
+                break
+        self._synced_at = synced_at
+
+    def _build(self, memo_repo: MemoRepositoryInterface) -> None:
+        """Index the titles and expiry dates of every memo, as of the last change read before."""
+
+        # read the sequence number before the memos, so the changes replayed after it
+        # can only repeat a change already read, which sets the same title again
+        last_seq = memo_repo.get_last_change_seq()
+        self.titles_by_id = {}
+        self.expiries_by_id = {}
+        self.memo_ids_by_title = {}
+        for memo in memo_repo.get_all_fields(("id", "title", "expires_at")):
+            self.titles_by_id[memo["id"]] = memo["title"]
+            if memo["expires_at"] is not None:
+                self.expiries_by_id[memo["id"]] = memo["expires_at"]
+            self.memo_ids_by_title.setdefault(memo["title"], set()).add(memo["id"])
+        self.keys = sorted(get_title_key(title) for title in self.memo_ids_by_title)
+        self.last_seq = last_seq
+
+    def _set_title(
+        self, memo_id: int, title: Optional[str], expires_at: Optional[str]
+    ) -> None:
+        """Index the current title and expiry date of a memo, a None title if it was deleted."""
+
+        if expires_at is None or title is None:
+            self.expiries_by_id.pop(memo_id, None)
+        else:
+            self.expiries_by_id[memo_id] = expires_at
+
+        old_title = self.titles_by_id.get(memo_id)
+        if old_title == title:
+            return
+
+        if old_title is not None:
+            del self.titles_by_id[memo_id]
+            memo_ids = self.memo_ids_by_title[old_title]
+            memo_ids.discard(memo_id)
+            if not memo_ids:
+                del self.memo_ids_by_title[old_title]
+                old_key = get_title_key(old_title)
+                del self.keys[bisect_left(self.keys, old_key)]
+
+        if title is not None:
+            self.titles_by_id[memo_id] = title
+            memo_ids = self.memo_ids_by_title.setdefault(title, set())
+            memo_ids.add(memo_id)
+            if len(memo_ids) == 1:
+                insort(self.keys, get_title_key(title))
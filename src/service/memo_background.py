@@ -0,0 +1,67 @@
+"""A module for the background threads that periodically work on the memo database."""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from src.repository.common import RepositoryError
+
+
+class BackgroundTask(ABC):
+    """
+    A task that runs every `interval` seconds of its policy on a daemon thread of its own.
+
+    A tick that fails with a RepositoryError is counted in `error_count` and the next one
+    runs as planned, so a transient database error never stops the thread. The policy is
+    read on every tick, and `stop` interrupts the wait between two ticks.
+
+    Attributes:
+        thread_name (str): The name of the thread, which shows in thread dumps.
+    """
+
+    thread_name = "memo-background"
+
+    def __init__(self, policy) -> None:
+        self.policy = policy
+        self.run_count = 0
+        self.error_count = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @abstractmethod
+    def run_tick(self) -> None:
+        """
+        Do the work of one tick, called every `interval` seconds.
+
+        Raises:
+            RepositoryError: If the work fails, the next tick runs as planned.
+        """
+
+    def start(self) -> None:
+        """Start the thread, if it is not already running."""
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever, name=self.thread_name, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and wait for the current tick to finish."""
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_forever(self) -> None:
+        """Run a tick every `interval` seconds until `stop` is called."""
+
+        while not self._stop_event.wait(self.policy.interval):
+            try:
+                self.run_tick()
+            except RepositoryError:
+                self.error_count += 1
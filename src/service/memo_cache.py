@@ -0,0 +1,47 @@
+"""A module for caching serialised memo data between use case calls."""
+
+from typing import Dict, List, Optional, Tuple
+
+Fields = Optional[Tuple[str, ...]]
+
+
+class MemoListCache:
+    """
+    A cache of the serialised memo listing, keyed by the validator of the repository state.
+
+    A cached listing is only returned for the validator it was built at, which changes
+    with the repository change counter and as memos expire, so any write to the
+    repository invalidates it, even one made through another connection.
+    Each field projection is cached separately, the full listing under None. The entry
+    is replaced as a whole in a single assignment, which keeps the cache safe to share
+    between the MemoService instances of concurrent requests.
+
+    Note:
+        The cached list is handed out as is and must not be modified by callers.
+    """
+
+    def __init__(self) -> None:
+        self.entry: Optional[Tuple[str, Dict[Fields, List[dict]]]] = None
+
+    def get(self, validator: str, fields: Fields = None) -> Optional[List[dict]]:
+        """Return the listing of `fields` cached at `validator`, or None if there is none."""
+
+        entry = self.entry
+        if entry is not None and entry[0] == validator:
+            return entry[1].get(fields)
+        return None
+
+    def set(self, validator: str, memos: List[dict], fields: Fields = None) -> None:
+        """Cache the listing of `fields` built at `validator`."""
+
+        entry = self.entry
+        listings = {}
+        if entry is not None and entry[0] == validator:
+            listings = dict(entry[1])
+        listings[fields] = memos
+        self.entry = (validator, listings)
+
+    def invalidate(self) -> None:
+        """Drop the cached listing."""
+
+        self.entry = None
@@ -0,0 +1,151 @@
+"""A module for running periodic maintenance on the SQLite memo database."""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src.repository.memo_database import SQLiteMemoDatabase
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.service.memo_background import BackgroundTask
+
+
+@dataclass(frozen=True)
+class MaintenancePolicy:
+    """
+    When and how much maintenance to run.
+
+    Attributes:
+        interval (float): The seconds between two checks for an idle window.
+        max_interval (float): The longest time in seconds between two runs while memos change.
+        vacuum_pages (int): The maximum number of free pages released per run.
+        wal_truncate_pages (int): The WAL size in pages from which the WAL file is truncated.
+        change_log_size (int): The number of latest changes kept in the change feed.
+    """
+
+    interval: float = 60.0
+    max_interval: float = 3600.0
+    vacuum_pages: int = 1000
+    wal_truncate_pages: int = 10000
+    change_log_size: int = 100000
+
+
+@dataclass(frozen=True)
+class MaintenanceReport:
+    """
+    The outcome of a maintenance run.
+
+    Attributes:
+        durations (Dict[str, float]): The seconds spent on each task, by task name.
+        vacuumed_pages (int): The number of free pages released to the file system.
+        wal_pages (int): The number of pages left in the WAL, -1 if not in WAL mode.
+        checkpointed_pages (int): The number of WAL pages copied into the database file.
+        pruned_changes (int): The number of changes deleted from the change feed.
+    """
+
+    durations: Dict[str, float]
+    vacuumed_pages: int
+    wal_pages: int
+    checkpointed_pages: int
+    pruned_changes: int = 0
+
+    def to_dict(self) -> dict:
+        """Convert the report to a dictionary."""
+
+        return {
+            "durations": dict(self.durations),
+            "vacuumed_pages": self.vacuumed_pages,
+            "wal_pages": self.wal_pages,
+            "checkpointed_pages": self.checkpointed_pages,
+            "pruned_changes": self.pruned_changes,
+        }
+
+
+class MemoMaintenance(BackgroundTask):
+    """
+    Keep the database fast under update and delete churn, from a background thread.
+
+    A run refreshes the planner statistics, prunes the change feed down to its
+    `change_log_size` latest changes, releases a bounded number of free pages and
+    checkpoints the WAL without waiting for readers or writers. The WAL file is only
+    truncated once it grew past the `wal_truncate_pages` of the policy.
+
+    Every `interval` seconds the thread checks the repository change counter. If memos
+    were written since the last run, maintenance runs as soon as nothing was written
+    since the previous check (an idle window), or once `max_interval` seconds passed
+    since the last run. The repository and the database must share a connection of their
+    own, since they are used from the maintenance thread.
+    """
+
+    thread_name = "memo-maintenance"
+
+    def __init__(
+        self,
+        memo_repo: SQLiteMemoRepository,
+        database: SQLiteMemoDatabase,
+        policy: Optional[MaintenancePolicy] = None,
+    ) -> None:
+        super().__init__(MaintenancePolicy() if policy is None else policy)
+        self.memo_repo = memo_repo
+        self.database = database
+        self.last_report: Optional[MaintenanceReport] = None
+        self._last_counter: Optional[int] = None
+        self._maintained_counter: Optional[int] = None
+        self._last_run = 0.0
+
+    def run_once(self) -> MaintenanceReport:
+        """
+        Run every maintenance task and return a report of the run.
+
+        Raises:
+            RepositoryError: If a task fails.
+        """
+
+        durations = {}
+
+        start = time.perf_counter()
+        self.database.optimize()
+        durations["optimize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        last_seq = self.memo_repo.get_last_change_seq()
+        pruned_changes = self.database.prune_changes(
+            last_seq - self.policy.change_log_size + 1
+        )
+        durations["prune_changes"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vacuumed_pages = self.database.incremental_vacuum(self.policy.vacuum_pages)
+        durations["incremental_vacuum"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        wal_pages, checkpointed_pages = self.database.checkpoint("PASSIVE")
+        if wal_pages >= self.policy.wal_truncate_pages:
+            wal_pages, checkpointed_pages = self.database.checkpoint("TRUNCATE")
+        durations["checkpoint"] = time.perf_counter() - start
+
+        report = MaintenanceReport(
+            durations, vacuumed_pages, wal_pages, checkpointed_pages, pruned_changes
+        )
+        self.last_report = report
+        self.run_count += 1
+        return report
+
+    def run_forever(self) -> None:
+        """Run maintenance in idle windows until `stop` is called."""
+
+        self._last_counter = None
+        self._maintained_counter = None
+        self._last_run = time.monotonic()
+        super().run_forever()
+
+    def run_tick(self) -> None:
+        """Run maintenance if memos changed and the database is idle, or it is overdue."""
+
+        counter = self.memo_repo.get_change_counter()
+        idle = counter == self._last_counter
+        overdue = time.monotonic() - self._last_run >= self.policy.max_interval
+        if counter != self._maintained_counter and (idle or overdue):
+            self.run_once()
+            self._maintained_counter = counter
+            self._last_run = time.monotonic()
+        self._last_counter = counter
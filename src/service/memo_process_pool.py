@@ -0,0 +1,89 @@
+"""A module for running memo use cases on a pool of worker processes."""
+
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from src.interaction import DelegatingMemoNest, MemoNest, OutputHandler
+
+# An output call recorded in a worker process, as (MemoNest helper name, arguments).
+OutputEvent = Tuple[str, tuple]
+
+
+@dataclass
+class WorkerState:
+    """The state of a worker process, set once by `init_worker`."""
+
+    memo_nest: Optional[MemoNest] = None
+
+
+WORKER_STATE = WorkerState()
+
+
+class RecordingOutput(OutputHandler):
+    """
+    An output handler that records every output call as a plain tuple.
+
+    The recorded events only hold built-in values, so they cross the process boundary
+    in a compact pickled form and can be replayed on the output handler of the caller.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[OutputEvent] = []
+
+    def output(self, data: dict) -> None:
+        self.events.append(("output", (data,)))
+
+    def error_output(self, code: int, message: str) -> None:
+        self.events.append(("error", (code, message)))
+
+    def validator_output(self, validator: str) -> None:
+        self.events.append(("validator", (validator,)))
+
+    def not_modified_output(self, validator: str) -> None:
+        self.events.append(("not_modified", (validator,)))
+
+
+def init_worker(create_memo_nest: Callable[[], MemoNest]) -> None:
+    """Create the MemoNest used by every use case run in this worker process."""
+
+    WORKER_STATE.memo_nest = create_memo_nest()
+
+
+def run_use_case(use_case: str, data: Optional[dict]) -> Tuple[OutputEvent, ...]:
+    """Run a use case on the MemoNest of this worker process and return its output events."""
+
+    memo_nest = WORKER_STATE.memo_nest
+    output_handler = RecordingOutput()
+    memo_nest.set_output(output_handler)
+    if data is None:
+        getattr(memo_nest, use_case)()
+    else:
+        getattr(memo_nest, use_case)(data)
+
+    return tuple(output_handler.events)
+
+
+class ProcessPoolMemoNest(DelegatingMemoNest):
+    """
+    A MemoNest that runs each use case on a pool of worker processes.
+
+    Every worker process holds its own MemoNest, created by `init_worker`, so use cases
+    run in parallel on several cores. The request data is sent to a worker as is, and
+    the output events it records are replayed on the output handler of this MemoNest,
+    so callers see the same output as with an in-process MemoNest.
+
+    `run` blocks its thread until the worker is done, so an asyncio caller must call
+    the use cases from a thread pool, as the plain function handlers of FastAPI are.
+    """
+
+    def __init__(self, executor: Executor) -> None:
+        super().__init__()
+        self.executor = executor
+
+    def run(self, use_case: str, data: Optional[dict]) -> None:
+        """Run a use case on a worker process and replay its output events."""
+
+        events = self.executor.submit(run_use_case, use_case, data).result()
+        for helper_name, args in events:
+            getattr(self, helper_name)(*args)
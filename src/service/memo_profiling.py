@@ -0,0 +1,206 @@
+"""A module for profiling sampled MemoNest use case calls into a bounded on-disk store."""
+
+import cProfile
+import glob
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from src.interaction import DelegatingMemoNest, MemoNest, OutputHandler
+
+
+@dataclass(frozen=True)
+class ProfilePolicy:
+    """
+    Which use case calls to profile, and what to capture.
+
+    Attributes:
+        sample_rate (float): The probability that a call is profiled, from 0 to 1.
+        cpu (bool): Whether to capture a cProfile of the call.
+        memory (bool): Whether to capture a tracemalloc snapshot of the call.
+        memory_frames (int): The number of frames stored per traced memory block.
+    """
+
+    sample_rate: float = 0.0
+    cpu: bool = True
+    memory: bool = False
+    memory_frames: int = 1
+
+
+class ProfileStore:
+    """
+    A directory holding the most recent profile captures.
+
+    Each capture is a `<id>.json` metadata file, with the use case name and latency,
+    next to a `<id>.prof` cProfile dump (read with `pstats`) and a `<id>.tracemalloc`
+    snapshot (read with `tracemalloc.Snapshot.load`). Ids start with the capture time,
+    and only the `max_captures` most recent captures are kept.
+    """
+
+    def __init__(self, directory: str, max_captures: int = 100) -> None:
+        self.directory = directory
+        self.max_captures = max_captures
+
+    def save(
+        self,
+        use_case: str,
+        seconds: float,
+        profile: Optional[cProfile.Profile],
+        snapshot: Optional[tracemalloc.Snapshot],
+    ) -> dict:
+        """Write a capture, drop the oldest ones above the limit and return its metadata."""
+
+        os.makedirs(self.directory, exist_ok=True)
+        capture_id = f"{time.time_ns()}-{use_case}"
+        path = os.path.join(self.directory, capture_id)
+
+        files = []
+        if profile is not None:
+            profile.dump_stats(f"{path}.prof")
+            files.append(f"{capture_id}.prof")
+        if snapshot is not None:
+            snapshot.dump(f"{path}.tracemalloc")
+            files.append(f"{capture_id}.tracemalloc")
+
+        metadata = {
+            "id": capture_id,
+            "use_case": use_case,
+            "seconds": seconds,
+            "created": time.time(),
+            "files": files,
+        }
+        # the metadata is written last and atomically, so listed captures are complete
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as file:
+            json.dump(metadata, file)
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+        self.prune()
+        return metadata
+
+    def prune(self) -> None:
+        """Delete the captures above `max_captures`, oldest first."""
+
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.json")))
+        for path in paths[: max(0, len(paths) - self.max_captures)]:
+            for capture_path in glob.glob(f"{path.removesuffix('.json')}.*"):
+                os.remove(capture_path)
+
+    def list_captures(self) -> List[dict]:
+        """Return the metadata of every capture, newest first."""
+
+        captures = []
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.json")))
+        for path in reversed(paths):
+            with open(path, encoding="utf-8") as file:
+                captures.append(json.load(file))
+        return captures
+
+
+class MemoProfiler:
+    """
+    Profile a sample of use case calls.
+
+    A call is profiled when `trigger` returns True, such as when a request asks for it,
+    or else with the probability of the policy sample rate. Only one call is profiled
+    at a time, since tracemalloc traces the whole process; a sampled call that starts
+    during another capture runs without profiling. Failures to store a capture are
+    counted in `error_count` and never fail the call.
+    """
+
+    def __init__(
+        self,
+        store: ProfileStore,
+        policy: Optional[ProfilePolicy] = None,
+        trigger: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.store = store
+        self.policy = ProfilePolicy() if policy is None else policy
+        self.trigger = trigger
+        self.capture_count = 0
+        self.error_count = 0
+        self._lock = threading.Lock()
+
+    def should_capture(self) -> bool:
+        """Return whether the next call is profiled."""
+
+        if self.trigger is not None and self.trigger():
+            return True
+        return random.random() < self.policy.sample_rate
+
+    def call(self, use_case: str, function: Callable, *args) -> Any:
+        """Call the function of a use case, profiling it if it is sampled."""
+
+        # pylint: disable-next=consider-using-with
+        if not self.should_capture() or not self._lock.acquire(blocking=False):
+            return function(*args)
+
+        try:
+            return self.capture(use_case, function, args)
+        finally:
+            self._lock.release()
+
+    def capture(self, use_case: str, function: Callable, args: tuple) -> Any:
+        """Call the function under the profilers of the policy and store the capture."""
+
+        profile = cProfile.Profile() if self.policy.cpu else None
+        # a process already tracing memory keeps its tracing after the call
+        start_tracing = self.policy.memory and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start(self.policy.memory_frames)
+
+        start = time.perf_counter()
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # since Python 3.12 a profiler cannot start while another one is active
+                profile = None
+        try:
+            return function(*args)
+        finally:
+            if profile is not None:
+                profile.disable()
+            seconds = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot() if self.policy.memory else None
+            if start_tracing:
+                tracemalloc.stop()
+
+            try:
+                self.store.save(use_case, seconds, profile, snapshot)
+                self.capture_count += 1
+            except OSError:
+                self.error_count += 1
+
+
+class ProfilingMemoNest(DelegatingMemoNest):
+    """
+    A MemoNest that passes each use case to another MemoNest through a MemoProfiler.
+
+    The output handler is shared with the wrapped MemoNest, so callers see its output
+    unchanged. Wrapping a ProcessPoolMemoNest profiles the calling side only, where
+    the latency is measured but the work is done in another process.
+    """
+
+    def __init__(self, memo_nest: MemoNest, profiler: MemoProfiler) -> None:
+        super().__init__()
+        self.memo_nest = memo_nest
+        self.profiler = profiler
+        self.output_handler = memo_nest.output_handler
+
+    def set_output(self, output: OutputHandler) -> None:
+        super().set_output(output)
+        self.memo_nest.set_output(output)
+
+    def run(self, use_case: str, data: Optional[dict]) -> None:
+        """Run a use case of the wrapped MemoNest through the profiler."""
+
+        function = getattr(self.memo_nest, use_case)
+        if data is None:
+            self.profiler.call(use_case, function)
+        else:
+            self.profiler.call(use_case, function, data)
@@ -0,0 +1,121 @@
+"""A module for deleting the expired memos and idempotency keys of the SQLite memo database."""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.service.memo_background import BackgroundTask
+
+
+@dataclass(frozen=True)
+class PurgePolicy:
+    """
+    When and how fast to delete expired memos and idempotency keys.
+
+    Attributes:
+        interval (float): The seconds between two purge runs.
+        batch_size (int): The maximum number of memos, or keys, deleted per transaction.
+        max_batches (int): The maximum number of batches per run, the rest waits for the next run.
+        pause (float): The seconds to wait between two batches, which lets other writers in.
+    """
+
+    interval: float = 60.0
+    batch_size: int = 500
+    max_batches: int = 20
+    pause: float = 0.05
+
+
+@dataclass(frozen=True)
+class PurgeReport:
+    """
+    The outcome of a purge run.
+
+    Attributes:
+        deleted (int): The number of expired memos deleted.
+        deleted_keys (int): The number of expired idempotency keys deleted.
+        batches (int): The number of batches run, each of at most two transactions.
+        duration (float): The seconds spent on the run, pauses included.
+    """
+
+    deleted: int
+    deleted_keys: int
+    batches: int
+    duration: float
+
+    def to_dict(self) -> dict:
+        """Convert the report to a dictionary."""
+
+        return {
+            "deleted": self.deleted,
+            "deleted_keys": self.deleted_keys,
+            "batches": self.batches,
+            "duration": self.duration,
+        }
+
+
+class MemoPurger(BackgroundTask):
+    """
+    Delete the expired memos from a background thread, at a bounded rate.
+
+    Expired memos are already left out of every read, so deleting them is not urgent and
+    only reclaims their space. Every `interval` seconds the thread deletes expired memos
+    in batches of at most `batch_size`, each its own short transaction, pausing between
+    batches so the write lock is never held for long. A run stops after `max_batches`
+    batches, or as soon as a batch finds fewer expired memos than it could delete.
+    The expired idempotency keys are deleted alongside, in batches of their own.
+
+    Deleting memos records changes in the change feed, which keeps the title index and
+    other followers of the feed up to date. The repository must have a connection of its
+    own, since it is used from the purge thread.
+    """
+
+    thread_name = "memo-purge"
+
+    def __init__(
+        self,
+        memo_repo: SQLiteMemoRepository,
+        policy: Optional[PurgePolicy] = None,
+    ) -> None:
+        super().__init__(PurgePolicy() if policy is None else policy)
+        self.memo_repo = memo_repo
+        self.last_report: Optional[PurgeReport] = None
+
+    def run_once(self) -> PurgeReport:
+        """
+        Delete expired memos and idempotency keys batch by batch and return a report.
+
+        Raises:
+            RepositoryError: If a batch fails, the earlier batches stay deleted.
+        """
+
+        start = time.perf_counter()
+        batch_size = self.policy.batch_size
+        deleted = 0
+        deleted_keys = 0
+        batches = 0
+        memos_left = keys_left = True
+        while batches < self.policy.max_batches and (memos_left or keys_left):
+            if batches > 0 and self._stop_event.wait(self.policy.pause):
+                break
+            if memos_left:
+                batch_deleted = self.memo_repo.purge_expired(batch_size)
+                deleted += batch_deleted
+                memos_left = batch_deleted == batch_size
+            if keys_left:
+                batch_deleted = self.memo_repo.purge_idempotency_keys(batch_size)
+                deleted_keys += batch_deleted
+                keys_left = batch_deleted == batch_size
+            batches += 1
+
+        report = PurgeReport(
+            deleted, deleted_keys, batches, time.perf_counter() - start
+        )
+        self.last_report = report
+        self.run_count += 1
+        return report
+
+    def run_tick(self) -> None:
+        """Run a purge, every `interval` seconds."""
+
+        self.run_once()
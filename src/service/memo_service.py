@@ -1,22 +1,63 @@
 """A module for managing memo-related use cases."""
 
-from src.entity.memo import Memo
+import hashlib
+import json
+from typing import Optional
+
+from src.entity.memo import Memo, MemoQuery, get_expiry
 from src.formatter.common import FormatterError
 from src.formatter.memo_formatter import (
     AddMemoFormatterFactory,
+    AddMemoRecord,
+    CountMemosByDateFormatterFactory,
     DeleteMemoFormatterFactory,
+    GetChangesFormatterFactory,
     GetMemoFormatterFactory,
+    GetMemosFormatterFactory,
+    MemoQueryFormatterFactory,
+    SearchMemosFormatterFactory,
+    SuggestTitlesFormatterFactory,
     UpdateMemoFormatterFactory,
 )
 from src.interaction import (
+    MemoChangesData,
+    MemoCountByDateData,
     MemoCreateData,
     MemoDeleteData,
+    MemoGetAllData,
     MemoGetData,
     MemoNest,
+    MemoQueryData,
+    MemoSearchData,
+    MemoSuggestData,
     MemoUpdateData,
 )
 from src.repository.common import RepositoryError
 from src.repository.memo_repository import MemoRepositoryInterface
+from src.service.memo_autocomplete import TitleIndex
+from src.service.memo_cache import MemoListCache
+
+# The seconds an idempotency key is kept, during which the retries of a create return
+# the memo it created.
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+
+
+def get_memo_validator(memo: Memo) -> str:
+    """
+    Return the validator of a memo, made of its ID and version.
+
+    Memos are read from a single URL with the ID in the request, so the validator names
+    the memo as well as its version.
+    """
+
+    return f"{memo.id}-{memo.version}"
+
+
+def get_request_hash(record: AddMemoRecord) -> str:
+    """Return the hash of a create request, which a retry with the same key must match."""
+
+    request = json.dumps([record.title, record.ttl])
+    return hashlib.sha256(request.encode()).hexdigest()
 
 
 class MemoService(MemoNest):
@@ -25,19 +66,45 @@ class MemoService(MemoNest):
     coordinating between the formatter, repository, and output handler.
     """
 
-    def __init__(self, memo_repo: MemoRepositoryInterface) -> None:
+    def __init__(
+        self,
+        memo_repo: MemoRepositoryInterface,
+        memo_list_cache: Optional[MemoListCache] = None,
+        title_index: Optional[TitleIndex] = None,
+    ) -> None:
         super().__init__()
         self.memo_repo = memo_repo
+        self.memo_list_cache = (
+            MemoListCache() if memo_list_cache is None else memo_list_cache
+        )
+        self.title_index = TitleIndex() if title_index is None else title_index
 
     def create_memo(self, data: MemoCreateData) -> None:
         try:
-            formatter = AddMemoFormatterFactory().create()
-            data = formatter.handle(data)
-            memo = Memo(title=data["title"])
+            formatter = AddMemoFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
+            memo = Memo(title=record.title, expires_at=get_expiry(record.ttl))
 
-            memo_id = self.memo_repo.create(memo)
-            memo = self.memo_repo.get(memo_id)
+            if record.idempotency_key is None:
+                memo_id = self.memo_repo.create(memo)
+                self.memo_list_cache.invalidate()
+                memo = self.memo_repo.get(memo_id)
+            else:
+                # a retry returns the memo as the first attempt created it
+                memo, created = self.memo_repo.create_idempotent(
+                    memo,
+                    record.idempotency_key,
+                    get_expiry(IDEMPOTENCY_KEY_TTL),
+                    get_request_hash(record),
+                )
+                if created:
+                    self.memo_list_cache.invalidate()
 
+            if memo is None:
+                self.output({})
+                return
+
+            self.validator(get_memo_validator(memo))
             self.output({"memo": memo.to_dict()})
 
         except (FormatterError, RepositoryError) as error:
@@ -45,40 +112,87 @@ class MemoService(MemoNest):
 
     def get_memo(self, data: MemoGetData) -> None:
         try:
-            formatter = GetMemoFormatterFactory().create()
-            data = formatter.handle(data)
+            formatter = GetMemoFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
 
-            memo = self.memo_repo.get(data["id"])
+            memo = self.memo_repo.get(record.id)
 
             if memo is None:
                 self.output({})
-            else:
-                self.output({"memo": memo.to_dict()})
+                return
+
+            validator = get_memo_validator(memo)
+            if record.validator == validator:
+                self.not_modified(validator)
+                return
+
+            self.validator(validator)
+            self.output({"memo": memo.to_dict()})
 
         except (FormatterError, RepositoryError) as error:
             self.error(error.code.value, error.code.get_message())
 
-    def get_memos(self) -> None:
+    def get_memos(self, data: Optional[MemoGetAllData] = None) -> None:
         try:
-            memos = self.memo_repo.get_all()
-            memos = [memo.to_dict() for memo in memos]
+            formatter = GetMemosFormatterFactory().get_record_formatter()
+            record = formatter.handle({} if data is None else data)
+
+            # read the counter before the memos, so a concurrent write can only
+            # make the validator and cache key older than the list, never newer
+            validator = self.get_list_validator()
+            if record.validator == validator:
+                self.not_modified(validator)
+                return
+
+            memos = self.memo_list_cache.get(validator, record.fields)
+            if memos is None:
+                if record.fields is None:
+                    memos = [memo.to_dict() for memo in self.memo_repo.get_all()]
+                else:
+                    memos = self.memo_repo.get_all_fields(record.fields)
+                self.memo_list_cache.set(validator, memos, record.fields)
+
+            self.validator(validator)
             self.output({"list": memos})
 
-        except RepositoryError as error:
+        except (FormatterError, RepositoryError) as error:
             self.error(error.code.value, error.code.get_message())
 
+    def get_list_validator(self) -> str:
+        """
+        Return the validator of the memo listing.
+
+        The listing changes with every write, counted by the change counter, and when
+        the next memo to expire does, so the validator is made of both.
+
+        Raises:
+            RepositoryError: If the change counter or the next expiry cannot be read.
+        """
+
+        change_counter = self.memo_repo.get_change_counter()
+        next_expiry = self.memo_repo.get_next_expiry()
+        if next_expiry is None:
+            return str(change_counter)
+        return f"{change_counter}-{next_expiry}"
+
     def update_memo(self, data: MemoUpdateData) -> None:
         try:
-            formatter = UpdateMemoFormatterFactory().create()
-            data = formatter.handle(data)
+            formatter = UpdateMemoFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
 
-            memo = Memo(id=data["id"], title=data["title"])
-            self.memo_repo.update(memo)
-            memo = self.memo_repo.get(data["id"])
+            memo = Memo(
+                id=record.id,
+                title=record.title,
+                version=record.version,
+                expires_at=get_expiry(record.ttl),
+            )
+            memo = self.memo_repo.update(memo)
+            self.memo_list_cache.invalidate()
 
             if memo is None:
                 self.output({})
             else:
+                self.validator(get_memo_validator(memo))
                 self.output({"memo": memo.to_dict()})
 
         except (FormatterError, RepositoryError) as error:
@@ -86,12 +200,101 @@ class MemoService(MemoNest):
 
     def delete_memo(self, data: MemoDeleteData) -> None:
         try:
-            formatter = DeleteMemoFormatterFactory().create()
-            data = formatter.handle(data)
+            formatter = DeleteMemoFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
 
-            memo = self.memo_repo.get(data["id"])
+            memo = self.memo_repo.get(record.id)
             if memo is not None:
                 self.memo_repo.delete(memo)
+                self.memo_list_cache.invalidate()
+
+        except (FormatterError, RepositoryError) as error:
+            self.error(error.code.value, error.code.get_message())
+
+    def get_changes(self, data: MemoChangesData) -> None:
+        try:
+            formatter = GetChangesFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
+
+            changes = self.memo_repo.changes_since(record.seq, record.limit)
+            last_seq = changes[-1].seq if changes else record.seq
+
+            self.output(
+                {
+                    "changes": [change.to_dict() for change in changes],
+                    "last_seq": last_seq,
+                }
+            )
+
+        except (FormatterError, RepositoryError) as error:
+            self.error(error.code.value, error.code.get_message())
+
+    def count_memos(self, data: Optional[MemoQueryData] = None) -> None:
+        try:
+            formatter = MemoQueryFormatterFactory().get_record_formatter()
+            query = formatter.handle({} if data is None else data)
+
+            self.output({"count": self.memo_repo.count(query)})
+
+        except (FormatterError, RepositoryError) as error:
+            self.error(error.code.value, error.code.get_message())
+
+    def count_memos_by_date(self, data: Optional[MemoCountByDateData] = None) -> None:
+        try:
+            formatter = CountMemosByDateFormatterFactory().get_record_formatter()
+            record = formatter.handle({} if data is None else data)
+
+            query = MemoQuery(record.date_field, record.since, record.until)
+            counts = self.memo_repo.count_by_date(query, record.bucket)
+
+            self.output(
+                {"counts": [{"period": period, "count": n} for period, n in counts]}
+            )
+
+        except (FormatterError, RepositoryError) as error:
+            self.error(error.code.value, error.code.get_message())
+
+    def get_memo_date_range(self, data: Optional[MemoQueryData] = None) -> None:
+        try:
+            formatter = MemoQueryFormatterFactory().get_record_formatter()
+            query = formatter.handle({} if data is None else data)
+
+            min_date, max_date = self.memo_repo.get_date_range(query)
+
+            self.output({"min_date": min_date, "max_date": max_date})
+
+        except (FormatterError, RepositoryError) as error:
+            self.error(error.code.value, error.code.get_message())
+
+    def search_memos(self, data: MemoSearchData) -> None:
+        try:
+            formatter = SearchMemosFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
+
+            results = self.memo_repo.fuzzy_search(record.query, record.limit)
+
+            self.output(
+                {
+                    "results": [
+                        {"memo": memo.to_dict(), "similarity": similarity}
+                        for memo, similarity in results
+                    ]
+                }
+            )
+
+        except (FormatterError, RepositoryError) as error:
+            self.error(error.code.value, error.code.get_message())
+
+    def suggest_titles(self, data: MemoSuggestData) -> None:
+        try:
+            formatter = SuggestTitlesFormatterFactory().get_record_formatter()
+            record = formatter.handle(data)
+
+            titles = self.title_index.suggest(
+                self.memo_repo, record.prefix, record.limit
+            )
+
+            self.output({"titles": titles})
 
         except (FormatterError, RepositoryError) as error:
             self.error(error.code.value, error.code.get_message())
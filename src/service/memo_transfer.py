@@ -0,0 +1,255 @@
+"""A module for importing and exporting memos in bulk as NDJSON or CSV."""
+
+import csv
+import datetime
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from src.entity.memo import MEMO_FIELDS, Memo, get_expiry
+from src.formatter.memo_formatter import ImportMemoFormatterFactory
+from src.repository.import_checkpoint import SQLiteImportCheckpoint
+from src.repository.memo_repository import MemoRepositoryInterface
+
+
+@dataclass(frozen=True)
+class MalformedRecord:
+    """
+    A record that could not be read from the input, in place of its dictionary.
+
+    An import rejects it like a record the formatter rejects, so its position is still
+    saved and a resumed import goes past it.
+
+    Attributes:
+        error (str): Why the record could not be read.
+    """
+
+    error: str
+
+
+def read_ndjson(file: TextIO) -> Iterator[Union[dict, MalformedRecord]]:
+    """Yield one record per non-empty line of an NDJSON file, or a MalformedRecord."""
+
+    for line in file:
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield MalformedRecord(f"Malformed JSON line: {error}")
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                yield MalformedRecord("Malformed JSON line: not an object")
+
+
+# The fields that may be null. CSV has no null, and a null is written as an empty
+# cell, so an empty cell of these fields is read as a missing value.
+CSV_OPTIONAL_FIELDS = ("ttl", "expires_at")
+
+
+def read_csv(file: TextIO) -> Iterator[dict]:
+    """Yield one record per row of a CSV file with a header row."""
+
+    for row in csv.DictReader(file):
+        for name in CSV_OPTIONAL_FIELDS:
+            if row.get(name) == "":
+                del row[name]
+        yield row
+
+
+def to_text(value):
+    """Return the value as written to a file, datetimes in ISO 8601 format."""
+
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_writer(file: TextIO) -> Callable[[List[dict]], None]:
+    """Return a function writing batches of memo dictionaries to a file as NDJSON."""
+
+    def write(memos: List[dict]) -> None:
+        file.writelines(
+            json.dumps(memo, default=to_text, separators=(",", ":")) + "\n"
+            for memo in memos
+        )
+
+    return write
+
+
+def csv_writer(file: TextIO) -> Callable[[List[dict]], None]:
+    """Return a function writing batches of memo dictionaries to a file as CSV."""
+
+    writer = csv.DictWriter(file, fieldnames=MEMO_FIELDS)
+    writer.writeheader()
+
+    def write(memos: List[dict]) -> None:
+        writer.writerows(
+            {name: to_text(value) for name, value in memo.items()} for memo in memos
+        )
+
+    return write
+
+
+READERS: Dict[str, Callable[[TextIO], Iterator[Union[dict, MalformedRecord]]]] = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+WRITERS: Dict[str, Callable[[TextIO], Callable[[List[dict]], None]]] = {
+    "ndjson": ndjson_writer,
+    "csv": csv_writer,
+}
+
+
+@dataclass(frozen=True)
+class TransferReport:
+    """
+    The outcome of an import or an export.
+
+    Attributes:
+        processed (int): The number of records read (import) or memos written (export).
+        written (int): The number of memos created (import) or written (export).
+        seconds (float): The time spent on the transfer.
+        resumed_from (int): The input position the import resumed from, 0 for a fresh run.
+        rejected (Dict[int, str]): The error message of each rejected record, by input position.
+    """
+
+    processed: int
+    written: int
+    seconds: float
+    resumed_from: int = 0
+    rejected: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of records processed per second."""
+
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        """Convert the report to a dictionary."""
+
+        return {
+            "processed": self.processed,
+            "written": self.written,
+            "rejected": len(self.rejected),
+            "resumed_from": self.resumed_from,
+            "seconds": round(self.seconds, 3),
+            "records_per_second": round(self.throughput),
+        }
+
+
+def batched(records: Iterable, batch_size: int) -> Iterator[List]:
+    """Yield lists of at most `batch_size` records."""
+
+    iterator = iter(records)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+class MemoTransfer:
+    """
+    Import and export memos in batches.
+
+    An import validates each batch with the import memo formatter and creates its memos
+    in a single transaction. With a checkpoint, the position of the next input record is
+    saved in that transaction, so an import that failed can be run again on the same
+    unchanged input and resumes after the last committed batch. Records rejected by the
+    formatter are reported and skipped. Like `create_memo`, an import assigns new ids
+    and dates to the memos, but a memo exported with an expiry date keeps it, unless
+    the record gives a ttl.
+
+    An export reads the repository one batch at a time, so the whole table is never
+    held in memory.
+    """
+
+    def __init__(self, memo_repo: MemoRepositoryInterface, batch_size: int = 1000):
+        self.memo_repo = memo_repo
+        self.batch_size = batch_size
+
+    def import_memos(
+        self,
+        records: Iterable[Union[dict, MalformedRecord]],
+        checkpoint: Optional[SQLiteImportCheckpoint] = None,
+    ) -> TransferReport:
+        """
+        Import the records and return a report of the import.
+
+        Raises:
+            RepositoryError: If a batch cannot be created, after the previous batches
+                have been committed with their positions.
+        """
+
+        start = time.perf_counter()
+        resumed_from = checkpoint.load() if checkpoint is not None else 0
+        position = resumed_from
+        written = 0
+        rejected: Dict[int, str] = {}
+
+        for batch in batched(islice(records, resumed_from, None), self.batch_size):
+            memos = self.format_batch(batch, position, rejected)
+            position += len(batch)
+            # a batch of rejected records still moves the saved position
+            import_position = None if checkpoint is None else checkpoint.at(position)
+            if memos or import_position is not None:
+                written += self.memo_repo.create_many(memos, import_position)
+
+        return TransferReport(
+            processed=position - resumed_from,
+            written=written,
+            seconds=time.perf_counter() - start,
+            resumed_from=resumed_from,
+            rejected=rejected,
+        )
+
+    @staticmethod
+    def format_batch(
+        batch: List[Union[dict, MalformedRecord]],
+        position: int,
+        rejected: Dict[int, str],
+    ) -> List[Memo]:
+        """
+        Return the memos of the valid records of a batch starting at the input `position`.
+
+        The error message of each rejected record is added to `rejected`, by input position.
+        """
+
+        indexes = []
+        for index, record in enumerate(batch):
+            if isinstance(record, MalformedRecord):
+                rejected[position + index] = record.error
+            else:
+                indexes.append(index)
+
+        formatter = ImportMemoFormatterFactory().get_record_formatter()
+        result = formatter.handle_many([batch[index] for index in indexes])
+        for index, error in result.errors.items():
+            rejected[position + indexes[index]] = str(error)
+
+        return [
+            Memo(
+                title=record.title,
+                expires_at=(
+                    record.expires_at if record.ttl is None else get_expiry(record.ttl)
+                ),
+            )
+            for record in result.records
+        ]
+
+    def export_memos(self, write: Callable[[List[dict]], None]) -> TransferReport:
+        """Pass each batch of memo dictionaries to `write` and return a report of the export."""
+
+        start = time.perf_counter()
+        written = 0
+        for memos in self.memo_repo.iter_all(self.batch_size):
+            write([memo.to_dict() for memo in memos])
+            written += len(memos)
+
+        return TransferReport(
+            processed=written, written=written, seconds=time.perf_counter() - start
+        )
@@ -1,8 +1,17 @@
 import datetime
+import pickle
 import unittest
 from dataclasses import FrozenInstanceError
 
-from src.entity.memo import Memo
+from src.entity.memo import (
+    DateBucket,
+    Memo,
+    MemoChange,
+    MemoChangeType,
+    MemoDateField,
+    MemoQuery,
+    get_expiry,
+)
 
 
 class TestMemo(unittest.TestCase):
@@ -51,9 +60,164 @@ class TestMemo(unittest.TestCase):
             id=TestMemo.id,
         ).to_dict()
         self.assertEqual(memo_dict["title"], "Complete Memo")
-        self.assertEqual(memo_dict["create_date"], TestMemo.create_date)
-        self.assertEqual(memo_dict["update_date"], TestMemo.update_date)
+        self.assertEqual(memo_dict["create_date"], TestMemo.create_date.isoformat())
+        self.assertEqual(memo_dict["update_date"], TestMemo.update_date.isoformat())
         self.assertEqual(memo_dict["id"], TestMemo.id)
+        self.assertIsNone(memo_dict["version"])
+        self.assertIsNone(memo_dict["expires_at"])
+
+    def test_to_dict_expires_at(self):
+        expires_at = datetime.datetime(2024, 1, 1, 12, 0)
+        memo_dict = Memo(title="Memo", expires_at=expires_at).to_dict()
+        self.assertEqual(memo_dict["expires_at"], "2024-01-01T12:00:00")
+
+    def test_to_dict_default_dates(self):
+        memo_dict = self.memo.to_dict()
+        self.assertIsNone(memo_dict["create_date"])
+        self.assertIsNone(memo_dict["update_date"])
+
+
+class TestGetExpiry(unittest.TestCase):
+
+    def test_no_ttl(self):
+        self.assertIsNone(get_expiry(None))
+
+    def test_ttl(self):
+        before = datetime.datetime.now()
+        expires_at = get_expiry(60)
+        after = datetime.datetime.now()
+
+        self.assertGreaterEqual(expires_at, before + datetime.timedelta(seconds=60))
+        self.assertLessEqual(expires_at, after + datetime.timedelta(seconds=60))
+
+
+class TestLazyDates(unittest.TestCase):
+    create_date = datetime.datetime(2024, 1, 1, 12, 0)
+    update_date = datetime.datetime(2024, 1, 2, 12, 0, 0, 500)
+
+    def setUp(self):
+        self.memo = Memo.from_stored(
+            {
+                "id": 1,
+                "title": "Stored Memo",
+                "create_date": self.create_date.isoformat(),
+                "update_date": self.update_date.isoformat(),
+                "version": 2,
+                "expires_at": None,
+            }
+        )
+
+    def test_from_stored(self):
+        self.assertEqual(self.memo.id, 1)
+        self.assertEqual(self.memo.title, "Stored Memo")
+        self.assertEqual(self.memo.version, 2)
+
+    def test_from_stored_fields(self):
+        fields = self.memo.to_dict()
+        del fields["version"]
+        with self.assertRaisesRegex(TypeError, "missing: \\['version'\\]"):
+            Memo.from_stored(fields)
+
+        fields["version"] = 2
+        fields["note"] = "Note"
+        with self.assertRaisesRegex(TypeError, "unknown: \\['note'\\]"):
+            Memo.from_stored(fields)
+
+    def test_invalid_date(self):
+        fields = dict(self.memo.to_dict(), create_date="not a date")
+        memo = Memo.from_stored(fields)
+        with self.assertRaises(ValueError):
+            _ = memo.create_date
+
+        def date_error(field, error):
+            return LookupError(field, error)
+
+        memo = Memo.from_stored(fields, date_error)
+        with self.assertRaises(LookupError) as context:
+            _ = memo.create_date
+
+        self.assertEqual(context.exception.args[0], "create_date")
+        self.assertIsInstance(context.exception.__cause__, ValueError)
+        self.assertEqual(memo.update_date, self.update_date)
+
+    def test_dates_parsed_on_read(self):
+        self.assertNotIn("_parsed_create_date", self.memo.__dict__)
+
+        self.assertEqual(self.memo.create_date, self.create_date)
+        self.assertEqual(self.memo.update_date, self.update_date)
+        self.assertIs(self.memo.create_date, self.memo.create_date)
+
+    def test_to_dict_keeps_stored_text(self):
+        memo_dict = self.memo.to_dict()
+
+        self.assertEqual(memo_dict["create_date"], "2024-01-01T12:00:00")
+        self.assertEqual(memo_dict["update_date"], "2024-01-02T12:00:00.000500")
+        self.assertNotIn("_parsed_create_date", self.memo.__dict__)
+
+    def test_init_with_text(self):
+        memo = Memo(title="Memo", create_date="2024-01-01T12:00:00")
+
+        self.assertEqual(memo.create_date, self.create_date)
+        self.assertIsNone(memo.update_date)
+
+    def test_equal_to_parsed_memo(self):
+        memo = Memo(
+            title="Stored Memo",
+            create_date=self.create_date,
+            update_date=self.update_date,
+            id=1,
+            version=2,
+        )
+
+        self.assertEqual(self.memo, memo)
+        self.assertEqual(self.memo.to_dict(), memo.to_dict())
+
+    def test_immutable_dates(self):
+        with self.assertRaises(FrozenInstanceError):
+            self.memo.create_date = self.update_date
+
+    def test_pickle(self):
+        memo = pickle.loads(pickle.dumps(self.memo))
+
+        self.assertEqual(memo.to_dict(), self.memo.to_dict())
+        self.assertEqual(memo.create_date, self.create_date)
+
+
+class TestMemoChange(unittest.TestCase):
+
+    def test_to_dict(self):
+        memo = Memo(title="Memo", id=1, version=2)
+        change_dict = MemoChange(
+            seq=3, change_type=MemoChangeType.UPDATE, memo_id=1, memo=memo
+        ).to_dict()
+        self.assertEqual(change_dict["seq"], 3)
+        self.assertEqual(change_dict["change_type"], "update")
+        self.assertEqual(change_dict["memo_id"], 1)
+        self.assertEqual(change_dict["memo"], memo.to_dict())
+
+    def test_to_dict_deleted_memo(self):
+        change_dict = MemoChange(
+            seq=4, change_type=MemoChangeType.DELETE, memo_id=1
+        ).to_dict()
+        self.assertEqual(change_dict["change_type"], "delete")
+        self.assertIsNone(change_dict["memo"])
+
+
+class TestMemoQuery(unittest.TestCase):
+
+    def test_default_query(self):
+        query = MemoQuery()
+
+        self.assertEqual(query.date_field, MemoDateField.CREATE_DATE)
+        self.assertIsNone(query.since)
+        self.assertIsNone(query.until)
+
+    def test_date_bucket_prefix_length(self):
+        date_text = "2024-01-02T03:04:05"
+
+        self.assertEqual(date_text[: DateBucket.DAY.get_prefix_length()], "2024-01-02")
+        self.assertEqual(date_text[: DateBucket.MONTH.get_prefix_length()], "2024-01")
+        self.assertEqual(date_text[: DateBucket.YEAR.get_prefix_length()], "2024")
 
 
 if __name__ == "__main__":
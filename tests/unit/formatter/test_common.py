@@ -1,5 +1,7 @@
 import datetime
+import threading
 import unittest
+from dataclasses import dataclass
 from enum import Enum
 from typing import List
 from unittest.mock import MagicMock, Mock, patch
@@ -7,6 +9,7 @@ from unittest.mock import MagicMock, Mock, patch
 from src.formatter.common import (
     CreateFieldFormatter,
     DateFormatter,
+    DatetimeFormatter,
     EnumFormatter,
     Formatter,
     FormatterError,
@@ -14,7 +17,12 @@ from src.formatter.common import (
     FormatterFactory,
     FormatterHelper,
     IntegerFormatter,
+    OptionalFormatter,
+    ParseCache,
+    RecordFormatter,
     StringFormatter,
+    SubsetFormatter,
+    get_parse_cache_stats,
 )
 
 
@@ -78,6 +86,25 @@ class TestFormatterHelper(unittest.TestCase):
             context.exception.code, FormatterErrorCode.INVALID_FIELD_FORMAT
         )
 
+        data["field"] = 123
+        with self.assertRaises(FormatterError) as context:
+            FormatterHelper.validate_field_format_with_regex(data, "field", regex)
+
+        self.assertEqual(
+            context.exception.code, FormatterErrorCode.INVALID_FIELD_FORMAT
+        )
+
+    def test_create_field_error(self):
+        original_exception = ValueError("Original exception")
+
+        error = FormatterHelper.create_field_error(
+            "field", FormatterErrorCode.INVALID_FIELD_VALUE, original_exception
+        )
+
+        self.assertEqual(error.code, FormatterErrorCode.INVALID_FIELD_VALUE)
+        self.assertEqual(str(error), "Error in field [field]: Invalid field value.")
+        self.assertEqual(error.original_exception, original_exception)
+
     def test_raise_field_error(self):
         with self.assertRaises(FormatterError) as context:
             FormatterHelper.raise_field_error(
@@ -112,10 +139,107 @@ class TestFormatter(unittest.TestCase):
         result = empty_formatter.handle({})
 
         self.assertTrue(result["handled"])
+        self.assertEqual(empty_formatter.get_next(), handled_formatter)
+        self.assertIsNone(handled_formatter.get_next())
+
+    def test_handle_many(self):
+        class FailingFormatter(Formatter):
+            def format(self, data: dict) -> dict:
+                if data["fail"]:
+                    FormatterHelper.raise_field_error(
+                        "fail", FormatterErrorCode.INVALID_FIELD_VALUE
+                    )
+                return data
+
+        class HandledFormatter(Formatter):
+            def format(self, data: dict) -> dict:
+                data["handled"] = True
+                return data
+
+        failing_formatter = FailingFormatter()
+        handled_formatter = HandledFormatter()
+        failing_formatter.set_next(handled_formatter)
+
+        result = failing_formatter.handle_many(
+            [{"fail": False}, {"fail": True}, {"fail": False}]
+        )
+
+        self.assertEqual(
+            result.records,
+            [{"fail": False, "handled": True}, {"fail": False, "handled": True}],
+        )
+        self.assertEqual(list(result.errors), [1])
+        self.assertEqual(result.errors[1].code, FormatterErrorCode.INVALID_FIELD_VALUE)
+
+
+class TestParseCache(unittest.TestCase):
+
+    def test_get_and_set(self):
+        parse_cache = ParseCache(maxsize=2)
+
+        self.assertIsNone(parse_cache.get("a"))
+        parse_cache.set("a", 1)
+        self.assertEqual(parse_cache.get("a"), 1)
+
+        stats = parse_cache.get_stats()
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.size, 1)
+        self.assertEqual(stats.maxsize, 2)
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_set_evicts_least_recently_used_entry(self):
+        parse_cache = ParseCache(maxsize=2)
+
+        parse_cache.set("a", 1)
+        parse_cache.set("b", 2)
+        parse_cache.set("a", 3)
+        parse_cache.set("c", 4)
+        self.assertEqual(parse_cache.entries, {"a": 3, "c": 4})
+
+        # a hit makes the entry the most recently used
+        parse_cache.get("a")
+        parse_cache.set("d", 5)
+        self.assertEqual(list(parse_cache.entries), ["a", "d"])
+
+    def test_counters_across_threads(self):
+        parse_cache = ParseCache(maxsize=2)
+        parse_cache.set("a", 1)
+
+        def lookup():
+            for _ in range(1000):
+                parse_cache.get("a")
+                parse_cache.get("b")
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = parse_cache.get_stats()
+        self.assertEqual((stats.hits, stats.misses), (8000, 8000))
+
+    def test_clear(self):
+        parse_cache = ParseCache(maxsize=2)
+        parse_cache.set("a", 1)
+        parse_cache.get("a")
+
+        parse_cache.clear()
+
+        self.assertEqual(parse_cache.entries, {})
+        self.assertEqual(parse_cache.get_stats().hits, 0)
+        self.assertEqual(parse_cache.get_stats().hit_rate, 0.0)
 
 
 class TestDateFormatter(unittest.TestCase):
 
+    def setUp(self):
+        DateFormatter.PARSE_CACHE.clear()
+
+    def tearDown(self):
+        DateFormatter.PARSE_CACHE.clear()
+
     @patch("src.formatter.common.FormatterHelper")
     def test_format(self, mock_formatter_helper):
         data = {"date_field": "2021-01-01"}
@@ -154,6 +278,29 @@ class TestDateFormatter(unittest.TestCase):
         self.assertEqual(args[0], "date_field")
         self.assertEqual(args[1], FormatterErrorCode.INVALID_FIELD_VALUE)
         self.assertIsInstance(args[2], ValueError)
+        self.assertEqual(DateFormatter.PARSE_CACHE.entries, {})
+
+    @patch("src.formatter.common.datetime")
+    def test_format_cached_value(self, mock_datetime):
+        mock_datetime.strptime.return_value = datetime.datetime(2021, 1, 1)
+        date_formatter = DateFormatter("date_field")
+
+        first = date_formatter.format({"date_field": "2021-01-01"})
+        second = date_formatter.format({"date_field": "2021-01-01"})
+
+        self.assertEqual(first["date_field"], datetime.date(2021, 1, 1))
+        self.assertEqual(second["date_field"], datetime.date(2021, 1, 1))
+        mock_datetime.strptime.assert_called_once()
+        self.assertEqual(get_parse_cache_stats()["DateFormatter"].hits, 1)
+        self.assertEqual(get_parse_cache_stats()["DateFormatter"].misses, 1)
+
+    def test_format_invalid_field_format(self):
+        with self.assertRaises(FormatterError) as context:
+            DateFormatter("date_field").format({"date_field": 20210101})
+
+        self.assertEqual(
+            context.exception.code, FormatterErrorCode.INVALID_FIELD_FORMAT
+        )
 
 
 class TestIntegerFormatter(unittest.TestCase):
@@ -188,6 +335,110 @@ class TestIntegerFormatter(unittest.TestCase):
         self.assertEqual(args[1], FormatterErrorCode.INVALID_FIELD_VALUE)
         self.assertIsInstance(args[2], ValueError)
 
+    @patch("src.formatter.common.FormatterHelper")
+    def test_format_int_value(self, mock_formatter_helper):
+        data = {"integer_field": 123}
+
+        result = IntegerFormatter("integer_field").format(data)
+
+        self.assertEqual(result["integer_field"], 123)
+        mock_formatter_helper.validate_field_format_with_regex.assert_not_called()
+
+    def test_format_invalid_int_value(self):
+        for value in (-1, True, 1.5):
+            with self.assertRaises(FormatterError) as context:
+                IntegerFormatter("integer_field").format({"integer_field": value})
+
+            self.assertEqual(
+                context.exception.code, FormatterErrorCode.INVALID_FIELD_FORMAT
+            )
+
+    def test_format_maximum(self):
+        integer_formatter = IntegerFormatter("integer_field", maximum=10)
+
+        self.assertEqual(integer_formatter.read({"integer_field": "10"}), 10)
+        for value in ("11", 11):
+            with self.assertRaises(FormatterError) as context:
+                integer_formatter.read({"integer_field": value})
+
+            self.assertEqual(
+                context.exception.code, FormatterErrorCode.INVALID_FIELD_VALUE
+            )
+
+
+class TestDatetimeFormatter(unittest.TestCase):
+
+    def test_read(self):
+        value = datetime.datetime(2024, 1, 1, 12, 0)
+        datetime_formatter = DatetimeFormatter("datetime_field")
+
+        self.assertEqual(
+            datetime_formatter.read({"datetime_field": "2024-01-01T12:00:00"}), value
+        )
+        self.assertIs(datetime_formatter.read({"datetime_field": value}), value)
+        for data in ({"datetime_field": "2024-13-01"}, {"datetime_field": 1}):
+            with self.assertRaises(FormatterError) as context:
+                datetime_formatter.read(data)
+
+            self.assertEqual(
+                context.exception.code, FormatterErrorCode.INVALID_FIELD_VALUE
+            )
+
+
+class TestIntegerFormatterMany(unittest.TestCase):
+
+    def test_format_many(self):
+        records = [
+            {"int_field": "1"},
+            {},
+            {"int_field": "abc"},
+            {"int_field": "2"},
+            {"int_field": 5},
+            {"int_field": -5},
+        ]
+        errors = {3: FormatterError(FormatterErrorCode.INVALID_FIELD_VALUE, "", None)}
+
+        IntegerFormatter("int_field").format_many(records, errors)
+
+        self.assertEqual(records[0], {"int_field": 1})
+        self.assertEqual(records[3], {"int_field": "2"})
+        self.assertEqual(records[4], {"int_field": 5})
+        self.assertEqual(errors[1].code, FormatterErrorCode.MISSING_REQUIRED_FIELD)
+        self.assertEqual(errors[2].code, FormatterErrorCode.INVALID_FIELD_FORMAT)
+        self.assertEqual(errors[5].code, FormatterErrorCode.INVALID_FIELD_FORMAT)
+
+    def test_format_many_maximum(self):
+        records = [{"int_field": "10"}, {"int_field": "11"}, {"int_field": 11}]
+        errors = {}
+
+        IntegerFormatter("int_field", maximum=10).format_many(records, errors)
+
+        self.assertEqual(records[0], {"int_field": 10})
+        self.assertEqual(list(errors), [1, 2])
+        self.assertEqual(errors[1].code, FormatterErrorCode.INVALID_FIELD_VALUE)
+
+    def test_format_many_invalid_field_value(self):
+        records = [{"int_field": "12abc"}]
+        errors = {}
+
+        IntegerFormatter("int_field").format_many(records, errors)
+
+        self.assertEqual(errors[0].code, FormatterErrorCode.INVALID_FIELD_VALUE)
+        self.assertIsInstance(errors[0].original_exception, ValueError)
+
+
+class TestStringFormatterMany(unittest.TestCase):
+
+    def test_format_many(self):
+        records = [{"str_field": "text"}, {"str_field": 1}, {}]
+        errors = {}
+
+        StringFormatter("str_field").format_many(records, errors)
+
+        self.assertEqual(records[:2], [{"str_field": "text"}, {"str_field": "1"}])
+        self.assertEqual(list(errors), [2])
+        self.assertEqual(errors[2].code, FormatterErrorCode.MISSING_REQUIRED_FIELD)
+
 
 class TestStringFormatter(unittest.TestCase):
 
@@ -253,6 +504,43 @@ class TestEnumFormatter(unittest.TestCase):
         self.assertEqual(args[1], FormatterErrorCode.INVALID_FIELD_VALUE)
 
 
+class TestSubsetFormatter(unittest.TestCase):
+
+    def setUp(self):
+        self.subset_formatter = SubsetFormatter("fields", ["id", "title", "version"])
+
+    def test_format(self):
+        result = self.subset_formatter.format({"fields": ["title", "id", "title"]})
+
+        self.assertEqual(result["fields"], ("id", "title"))
+
+    def test_format_missing_field(self):
+        with self.assertRaises(FormatterError) as context:
+            self.subset_formatter.format({})
+
+        self.assertEqual(
+            context.exception.code, FormatterErrorCode.MISSING_REQUIRED_FIELD
+        )
+
+    def test_format_invalid_field_format(self):
+        for value in ["id,title", [1], None]:
+            with self.assertRaises(FormatterError) as context:
+                self.subset_formatter.format({"fields": value})
+
+            self.assertEqual(
+                context.exception.code, FormatterErrorCode.INVALID_FIELD_FORMAT
+            )
+
+    def test_format_invalid_field_value(self):
+        for value in [[], ["id", "unknown"]]:
+            with self.assertRaises(FormatterError) as context:
+                self.subset_formatter.format({"fields": value})
+
+            self.assertEqual(
+                context.exception.code, FormatterErrorCode.INVALID_FIELD_VALUE
+            )
+
+
 class TestCreateFieldFormatter(unittest.TestCase):
 
     def test_format(self):
@@ -266,6 +554,81 @@ class TestCreateFieldFormatter(unittest.TestCase):
         self.assertEqual(result[field_name], field_value)
 
 
+class TestOptionalFormatter(unittest.TestCase):
+
+    def test_format(self):
+        optional_formatter = OptionalFormatter(IntegerFormatter("int_field"))
+
+        result = optional_formatter.format({"int_field": "123"})
+
+        self.assertEqual(result["int_field"], 123)
+
+    def test_format_missing_field(self):
+        optional_formatter = OptionalFormatter(IntegerFormatter("int_field"))
+
+        self.assertEqual(optional_formatter.format({}), {"int_field": None})
+        self.assertEqual(
+            optional_formatter.format({"int_field": None}), {"int_field": None}
+        )
+
+    def test_format_missing_field_default(self):
+        optional_formatter = OptionalFormatter(IntegerFormatter("int_field"), 7)
+
+        self.assertEqual(optional_formatter.format({}), {"int_field": 7})
+
+    def test_format_invalid_field_value(self):
+        optional_formatter = OptionalFormatter(IntegerFormatter("int_field"))
+
+        with self.assertRaises(FormatterError) as context:
+            optional_formatter.format({"int_field": "abc"})
+
+        self.assertEqual(
+            context.exception.code, FormatterErrorCode.INVALID_FIELD_FORMAT
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SampleRecord:
+    int_field: int
+    str_field: str
+
+
+class TestRecordFormatter(unittest.TestCase):
+
+    def setUp(self):
+        self.record_formatter = RecordFormatter(
+            SampleRecord, [IntegerFormatter("int_field"), StringFormatter("str_field")]
+        )
+
+    def test_handle(self):
+        data = {"int_field": "1", "str_field": 2}
+
+        record = self.record_formatter.handle(data)
+
+        self.assertEqual(record, SampleRecord(int_field=1, str_field="2"))
+        self.assertEqual(data, {"int_field": "1", "str_field": 2})
+
+    def test_handle_error(self):
+        with self.assertRaises(FormatterError) as context:
+            self.record_formatter.handle({"int_field": "1"})
+
+        self.assertEqual(
+            context.exception.code, FormatterErrorCode.MISSING_REQUIRED_FIELD
+        )
+
+    def test_handle_many(self):
+        result = self.record_formatter.handle_many(
+            [{"int_field": "1", "str_field": "a"}, {"int_field": "b"}]
+        )
+
+        self.assertEqual(result.records, [SampleRecord(int_field=1, str_field="a")])
+        self.assertEqual(list(result.errors), [1])
+
+    def test_mismatched_fields(self):
+        with self.assertRaises(ValueError):
+            RecordFormatter(SampleRecord, [IntegerFormatter("int_field")])
+
+
 class TestFormatterFactory(unittest.TestCase):
 
     def test_create(self):
@@ -277,6 +640,9 @@ class TestFormatterFactory(unittest.TestCase):
             def get_formatters(self) -> List[Formatter]:
                 return [formatter1, formatter2, formatter3]
 
+            def get_record_class(self) -> type:
+                return SampleRecord
+
         test_formatter_factory = TestFormatterFactorySubClass()
         formatter = test_formatter_factory.create()
 
@@ -285,6 +651,54 @@ class TestFormatterFactory(unittest.TestCase):
         formatter2.set_next.assert_called_once_with(formatter3)
         self.assertFalse(formatter3.set_next.called)
 
+    def test_handle_many(self):
+        class TestFormatterFactorySubClass(FormatterFactory):
+            def get_formatters(self) -> List[Formatter]:
+                return [IntegerFormatter("id"), StringFormatter("title")]
+
+            def get_record_class(self) -> type:
+                return SampleRecord
+
+        result = TestFormatterFactorySubClass().handle_many(
+            [{"id": "1", "title": "Memo"}, {"id": "1"}]
+        )
+
+        self.assertEqual(result.records, [{"id": 1, "title": "Memo"}])
+        self.assertEqual(
+            result.errors[1].code, FormatterErrorCode.MISSING_REQUIRED_FIELD
+        )
+
+    def test_get_record_formatter(self):
+        class TestFormatterFactorySubClass(FormatterFactory):
+            def get_formatters(self) -> List[Formatter]:
+                return [IntegerFormatter("int_field"), StringFormatter("str_field")]
+
+            def get_record_class(self) -> type:
+                return SampleRecord
+
+        class OtherFormatterFactorySubClass(TestFormatterFactorySubClass):
+            def get_formatters(self) -> List[Formatter]:
+                return [IntegerFormatter("int_field"), IntegerFormatter("str_field")]
+
+        record_formatter = TestFormatterFactorySubClass().get_record_formatter()
+        other_record_formatter = OtherFormatterFactorySubClass().get_record_formatter()
+
+        self.assertIsInstance(record_formatter, RecordFormatter)
+        self.assertIs(
+            TestFormatterFactorySubClass().get_record_formatter(), record_formatter
+        )
+        self.assertIsNot(other_record_formatter, record_formatter)
+        self.assertEqual(
+            other_record_formatter.handle({"int_field": "1", "str_field": "2"}),
+            SampleRecord(int_field=1, str_field=2),
+        )
+
+    def test_get_record_class_required(self):
+        self.assertEqual(
+            FormatterFactory.__abstractmethods__,
+            frozenset({"get_formatters", "get_record_class"}),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,53 +1,110 @@
+import datetime
 import unittest
 from unittest.mock import Mock, patch
 
-from src.formatter.common import Formatter
+from src.entity.memo import MEMO_FIELDS, DateBucket, MemoDateField, MemoQuery
+from src.formatter.common import Formatter, FormatterError, FormatterErrorCode
 from src.formatter.memo_formatter import (
+    MAX_TTL,
     AddMemoFormatterFactory,
+    AddMemoRecord,
+    CountMemosByDateFormatterFactory,
+    CountMemosByDateRecord,
     DeleteMemoFormatterFactory,
+    DeleteMemoRecord,
+    GetChangesFormatterFactory,
+    GetChangesRecord,
     GetMemoFormatterFactory,
+    GetMemoRecord,
+    GetMemosFormatterFactory,
+    GetMemosRecord,
+    ImportMemoFormatterFactory,
+    ImportMemoRecord,
+    MemoQueryFormatterFactory,
+    SearchMemosFormatterFactory,
+    SearchMemosRecord,
+    SuggestTitlesFormatterFactory,
+    SuggestTitlesRecord,
     UpdateMemoFormatterFactory,
+    UpdateMemoRecord,
 )
 
 
 class TestAddMemoFormatterFactory(unittest.TestCase):
 
+    @patch("src.formatter.memo_formatter.OptionalFormatter")
+    @patch("src.formatter.memo_formatter.IntegerFormatter")
     @patch("src.formatter.memo_formatter.StringFormatter")
-    def test_get_formatters(self, mock_string_formatter):
+    def test_get_formatters(
+        self, mock_string_formatter, mock_integer_formatter, mock_optional_formatter
+    ):
 
         mock_string_formatter_instance = Mock(spec=Formatter)
         mock_string_formatter.return_value = mock_string_formatter_instance
+        mock_integer_formatter_instance = Mock(spec=Formatter)
+        mock_integer_formatter.return_value = mock_integer_formatter_instance
+        mock_optional_formatter_instance = Mock(spec=Formatter)
+        mock_optional_formatter.return_value = mock_optional_formatter_instance
         formatter_factory = AddMemoFormatterFactory()
         formatters = formatter_factory.get_formatters()
 
-        self.assertEqual(formatters, [mock_string_formatter_instance])
+        self.assertEqual(
+            formatters,
+            [
+                mock_string_formatter_instance,
+                mock_optional_formatter_instance,
+                mock_optional_formatter_instance,
+            ],
+        )
         mock_string_formatter.assert_any_call("title")
+        mock_string_formatter.assert_any_call("idempotency_key")
+        mock_integer_formatter.assert_called_once_with("ttl", MAX_TTL)
+        mock_optional_formatter.assert_any_call(mock_integer_formatter_instance)
+        mock_optional_formatter.assert_any_call(mock_string_formatter_instance)
 
 
 class TestGetMemoFormatterFactory(unittest.TestCase):
 
+    @patch("src.formatter.memo_formatter.OptionalFormatter")
+    @patch("src.formatter.memo_formatter.StringFormatter")
     @patch("src.formatter.memo_formatter.IntegerFormatter")
-    def test_get_formatters(self, mock_integer_formatter):
+    def test_get_formatters(
+        self, mock_integer_formatter, mock_string_formatter, mock_optional_formatter
+    ):
 
         mock_integer_formatter_instance = Mock(spec=Formatter)
         mock_integer_formatter.return_value = mock_integer_formatter_instance
+        mock_string_formatter_instance = Mock(spec=Formatter)
+        mock_string_formatter.return_value = mock_string_formatter_instance
+        mock_optional_formatter_instance = Mock(spec=Formatter)
+        mock_optional_formatter.return_value = mock_optional_formatter_instance
         formatter_factory = GetMemoFormatterFactory()
         formatters = formatter_factory.get_formatters()
 
-        self.assertEqual(formatters, [mock_integer_formatter_instance])
+        self.assertEqual(
+            formatters,
+            [mock_integer_formatter_instance, mock_optional_formatter_instance],
+        )
         mock_integer_formatter.assert_any_call("id")
+        mock_string_formatter.assert_any_call("validator")
+        mock_optional_formatter.assert_called_once_with(mock_string_formatter_instance)
 
 
 class TestUpdateMemoFormatterFactory(unittest.TestCase):
 
+    @patch("src.formatter.memo_formatter.OptionalFormatter")
     @patch("src.formatter.memo_formatter.IntegerFormatter")
     @patch("src.formatter.memo_formatter.StringFormatter")
-    def test_get_formatters(self, mock_string_formatter, mock_integer_formatter):
+    def test_get_formatters(
+        self, mock_string_formatter, mock_integer_formatter, mock_optional_formatter
+    ):
 
         mock_integer_formatter_instance = Mock(spec=Formatter)
         mock_integer_formatter.return_value = mock_integer_formatter_instance
         mock_string_formatter_instance = Mock(spec=Formatter)
         mock_string_formatter.return_value = mock_string_formatter_instance
+        mock_optional_formatter_instance = Mock(spec=Formatter)
+        mock_optional_formatter.return_value = mock_optional_formatter_instance
         formatter_factory = UpdateMemoFormatterFactory()
         formatters = formatter_factory.get_formatters()
 
@@ -56,10 +113,15 @@ class TestUpdateMemoFormatterFactory(unittest.TestCase):
             [
                 mock_integer_formatter_instance,
                 mock_string_formatter_instance,
+                mock_optional_formatter_instance,
+                mock_optional_formatter_instance,
             ],
         )
         mock_integer_formatter.assert_any_call("id")
         mock_string_formatter.assert_any_call("title")
+        mock_integer_formatter.assert_any_call("version")
+        mock_integer_formatter.assert_any_call("ttl", MAX_TTL)
+        mock_optional_formatter.assert_called_with(mock_integer_formatter_instance)
 
 
 class TestDeleteMemoFormatterFactory(unittest.TestCase):
@@ -76,5 +138,172 @@ class TestDeleteMemoFormatterFactory(unittest.TestCase):
         mock_integer_formatter.assert_any_call("id")
 
 
+class TestGetChangesFormatterFactory(unittest.TestCase):
+
+    @patch("src.formatter.memo_formatter.IntegerFormatter")
+    def test_get_formatters(self, mock_integer_formatter):
+
+        mock_integer_formatter_instance = Mock(spec=Formatter)
+        mock_integer_formatter.return_value = mock_integer_formatter_instance
+        formatter_factory = GetChangesFormatterFactory()
+        formatters = formatter_factory.get_formatters()
+
+        self.assertEqual(
+            formatters,
+            [mock_integer_formatter_instance, mock_integer_formatter_instance],
+        )
+        mock_integer_formatter.assert_any_call("seq")
+        mock_integer_formatter.assert_any_call("limit")
+
+
+class TestGetMemosFormatterFactory(unittest.TestCase):
+
+    @patch("src.formatter.memo_formatter.OptionalFormatter")
+    @patch("src.formatter.memo_formatter.SubsetFormatter")
+    @patch("src.formatter.memo_formatter.StringFormatter")
+    def test_get_formatters(
+        self, mock_string_formatter, mock_subset_formatter, mock_optional_formatter
+    ):
+
+        mock_optional_formatter_instance = Mock(spec=Formatter)
+        mock_optional_formatter.return_value = mock_optional_formatter_instance
+        formatter_factory = GetMemosFormatterFactory()
+        formatters = formatter_factory.get_formatters()
+
+        self.assertEqual(
+            formatters,
+            [mock_optional_formatter_instance, mock_optional_formatter_instance],
+        )
+        mock_string_formatter.assert_called_once_with("validator")
+        mock_subset_formatter.assert_called_once_with("fields", MEMO_FIELDS)
+        mock_optional_formatter.assert_any_call(mock_string_formatter.return_value)
+        mock_optional_formatter.assert_any_call(mock_subset_formatter.return_value)
+
+
+class TestRecordFormatters(unittest.TestCase):
+
+    def test_ttl_limit(self):
+        for factory in (AddMemoFormatterFactory(), UpdateMemoFormatterFactory()):
+            formatter = factory.create_record_formatter()
+            data = {"id": 1, "title": "Memo", "ttl": MAX_TTL}
+            self.assertEqual(formatter.handle(data).ttl, MAX_TTL)
+
+            for ttl in (MAX_TTL + 1, 10**12, str(10**12)):
+                with self.assertRaises(FormatterError) as context:
+                    formatter.handle(dict(data, ttl=ttl))
+                self.assertEqual(
+                    context.exception.code, FormatterErrorCode.INVALID_FIELD_VALUE
+                )
+
+    def test_record_formatters(self):
+        self.assertEqual(
+            AddMemoFormatterFactory().create_record_formatter().handle({"title": 1}),
+            AddMemoRecord(title="1", ttl=None, idempotency_key=None),
+        )
+        self.assertEqual(
+            AddMemoFormatterFactory()
+            .create_record_formatter()
+            .handle({"title": "Memo", "ttl": "60", "idempotency_key": "key-1"}),
+            AddMemoRecord(title="Memo", ttl=60, idempotency_key="key-1"),
+        )
+        self.assertEqual(
+            ImportMemoFormatterFactory()
+            .create_record_formatter()
+            .handle({"title": "Memo", "id": 1, "expires_at": "2024-01-01T12:00:00"}),
+            ImportMemoRecord(
+                title="Memo",
+                ttl=None,
+                expires_at=datetime.datetime(2024, 1, 1, 12, 0),
+            ),
+        )
+        self.assertEqual(
+            GetMemoFormatterFactory().create_record_formatter().handle({"id": "1"}),
+            GetMemoRecord(id=1, validator=None),
+        )
+        self.assertEqual(
+            GetMemosFormatterFactory().create_record_formatter().handle({}),
+            GetMemosRecord(validator=None, fields=None),
+        )
+        self.assertEqual(
+            GetMemosFormatterFactory()
+            .create_record_formatter()
+            .handle({"validator": "1", "fields": ["title", "id"]}),
+            GetMemosRecord(validator="1", fields=("id", "title")),
+        )
+        self.assertEqual(
+            UpdateMemoFormatterFactory()
+            .create_record_formatter()
+            .handle({"id": "1", "title": "Memo", "version": "2"}),
+            UpdateMemoRecord(id=1, title="Memo", version=2, ttl=None),
+        )
+        self.assertEqual(
+            DeleteMemoFormatterFactory().create_record_formatter().handle({"id": "1"}),
+            DeleteMemoRecord(id=1),
+        )
+        self.assertEqual(
+            GetChangesFormatterFactory()
+            .create_record_formatter()
+            .handle({"seq": "0", "limit": "10"}),
+            GetChangesRecord(seq=0, limit=10),
+        )
+
+    def test_memo_query_record_formatters(self):
+        self.assertEqual(
+            MemoQueryFormatterFactory().create_record_formatter().handle({}),
+            MemoQuery(),
+        )
+        self.assertEqual(
+            MemoQueryFormatterFactory()
+            .create_record_formatter()
+            .handle({"date_field": "update_date", "since": "2024-01-01"}),
+            MemoQuery(MemoDateField.UPDATE_DATE, datetime.date(2024, 1, 1)),
+        )
+        self.assertEqual(
+            CountMemosByDateFormatterFactory()
+            .create_record_formatter()
+            .handle({"until": "2024-01-31", "bucket": "month"}),
+            CountMemosByDateRecord(
+                MemoDateField.CREATE_DATE,
+                None,
+                datetime.date(2024, 1, 31),
+                DateBucket.MONTH,
+            ),
+        )
+        self.assertEqual(
+            CountMemosByDateFormatterFactory()
+            .create_record_formatter()
+            .handle({})
+            .bucket,
+            DateBucket.DAY,
+        )
+
+    def test_search_memos_record_formatter(self):
+        formatter = SearchMemosFormatterFactory().create_record_formatter()
+
+        self.assertEqual(
+            formatter.handle({"query": "memo"}), SearchMemosRecord("memo", 10)
+        )
+        self.assertEqual(
+            formatter.handle({"query": "memo", "limit": "3"}),
+            SearchMemosRecord("memo", 3),
+        )
+
+    def test_suggest_titles_record_formatter(self):
+        formatter = SuggestTitlesFormatterFactory().create_record_formatter()
+
+        self.assertEqual(
+            formatter.handle({"prefix": "me"}), SuggestTitlesRecord("me", 10)
+        )
+        self.assertEqual(
+            formatter.handle({"prefix": "me", "limit": "3"}),
+            SuggestTitlesRecord("me", 3),
+        )
+
+    def test_records_use_slots(self):
+        record = AddMemoRecord(title="Memo", ttl=None, idempotency_key=None)
+
+        self.assertFalse(hasattr(record, "__dict__"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -11,6 +11,24 @@ class TestRepositoryErrorCode(unittest.TestCase):
         self.assertEqual(RepositoryErrorCode.FAILED_TO_DELETE_MEMO.value, 103)
         self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_MEMO.value, 104)
         self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_ALL_MEMOS.value, 105)
+        self.assertEqual(RepositoryErrorCode.MEMO_VERSION_CONFLICT.value, 106)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_CHANGE_COUNTER.value, 107)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_CHANGES.value, 108)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_CREATE_MEMOS.value, 109)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_SNAPSHOT.value, 110)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_RESTORE.value, 111)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_MAINTAIN.value, 112)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_COUNT_MEMOS.value, 113)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_DATE_RANGE.value, 114)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_SEARCH_MEMOS.value, 115)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_LAST_CHANGE_SEQ.value, 116)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_GET_NEXT_EXPIRY.value, 117)
+        self.assertEqual(RepositoryErrorCode.FAILED_TO_PURGE_MEMOS.value, 118)
+        self.assertEqual(
+            RepositoryErrorCode.FAILED_TO_PURGE_IDEMPOTENCY_KEYS.value, 119
+        )
+        self.assertEqual(RepositoryErrorCode.IDEMPOTENCY_KEY_REUSED.value, 123)
+        self.assertEqual(RepositoryErrorCode.CREATED_MEMO_DELETED.value, 124)
 
     def test_get_message(self):
         for code in RepositoryErrorCode:
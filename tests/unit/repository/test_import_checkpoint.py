@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from src.entity.memo import Memo
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.import_checkpoint import (
+    ImportPosition,
+    SQLiteImportCheckpoint,
+    get_source_key,
+)
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.repository.split_memo_repository import connect_split_database
+
+
+class TestSQLiteImportCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        self.database_path = os.path.join(directory.name, "memo.db")
+        self.source_path = os.path.join(directory.name, "memos.ndjson")
+        with open(self.source_path, "w", encoding="utf-8") as file:
+            file.write('{"title": "Memo"}\n')
+        self.repository = SQLiteMemoRepository(
+            connect_split_database(self.database_path, False)
+        )
+        self.addCleanup(self.repository.connect.close)
+        self.repository.create_table_if_not_exists()
+
+    def test_get_source_key(self):
+        key = get_source_key(self.source_path)
+
+        self.assertIn(os.path.abspath(self.source_path), key)
+        with open(self.source_path, "a", encoding="utf-8") as file:
+            file.write('{"title": "Memo 2"}\n')
+        self.assertNotEqual(get_source_key(self.source_path), key)
+
+    def test_position_saved_with_batch(self):
+        checkpoint = SQLiteImportCheckpoint(self.database_path, self.source_path)
+
+        self.assertEqual(checkpoint.load(), 0)
+        self.assertEqual(
+            checkpoint.at(2), ImportPosition(get_source_key(self.source_path), 2)
+        )
+        self.repository.create_many(
+            [Memo(title="A"), Memo(title="B")], checkpoint.at(2)
+        )
+        self.assertEqual(checkpoint.load(), 2)
+        self.repository.create_many([], checkpoint.at(3))
+        self.assertEqual(checkpoint.load(), 3)
+
+    def test_position_rolled_back_with_batch(self):
+        checkpoint = SQLiteImportCheckpoint(self.database_path, self.source_path)
+        self.repository.create_many([Memo(title="A")], checkpoint.at(1))
+
+        # a NULL title fails the batch, which must not move the position
+        with self.assertRaises(RepositoryError):
+            self.repository.create_many(
+                [Memo(title="B"), Memo(title=None)], checkpoint.at(3)
+            )
+
+        self.assertEqual(checkpoint.load(), 1)
+        self.assertEqual(self.repository.count(), 1)
+
+    def test_other_source_starts_over(self):
+        checkpoint = SQLiteImportCheckpoint(self.database_path, self.source_path)
+        self.repository.create_many([Memo(title="A")], checkpoint.at(1))
+        with open(self.source_path, "w", encoding="utf-8") as file:
+            file.write('{"title": "Other memo"}\n{"title": "Memo"}\n')
+
+        self.assertEqual(
+            SQLiteImportCheckpoint(self.database_path, self.source_path).load(), 0
+        )
+
+    def test_load_error(self):
+        checkpoint = SQLiteImportCheckpoint(self.database_path, self.source_path)
+        checkpoint.database_path = os.path.join(self.database_path, "missing.db")
+
+        with self.assertRaises(RepositoryError) as context:
+            checkpoint.load()
+
+        self.assertIs(
+            context.exception.code, RepositoryErrorCode.FAILED_TO_LOAD_IMPORT_POSITION
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
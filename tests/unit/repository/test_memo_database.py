@@ -0,0 +1,353 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+
+from src.entity.memo import Memo, MemoChangeType
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.memo_database import SNAPSHOT_MAX_RESTARTS, SQLiteMemoDatabase
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.service.memo_autocomplete import TitleIndex
+from src.service.memo_cache import MemoListCache
+from src.service.memo_service import MemoService
+
+
+class TestSQLiteMemoDatabase(unittest.TestCase):
+
+    def setUp(self):
+        # MagicMock support the context manager protocol
+        self.mock_connection = MagicMock()
+        self.cursor_mock = Mock()
+        self.mock_connection.cursor.return_value = self.cursor_mock
+        self.database = SQLiteMemoDatabase(self.mock_connection)
+
+    def mock_database(self, path, journal_mode):
+        self.cursor_mock.execute.return_value.fetchone.side_effect = [
+            (0, "main", path),
+            (journal_mode,),
+        ]
+
+    @patch("src.repository.memo_database.os.replace")
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_snapshot(self, mock_connect, mock_replace):
+        self.mock_database("", "memory")
+        progress = Mock()
+
+        def backup(_target, progress, **_kwargs):
+            progress(0, 5, 10)
+            progress(0, 0, 10)
+
+        self.mock_connection.backup.side_effect = backup
+
+        self.database.snapshot("backup.db", 5, progress)
+
+        mock_connect.assert_called_once_with("backup.db.tmp")
+        target = mock_connect.return_value
+        self.assertIs(self.mock_connection.backup.call_args[0][0], target)
+        self.assertEqual(self.mock_connection.backup.call_args[1]["pages"], 5)
+        progress.assert_any_call(5, 10)
+        progress.assert_called_with(0, 10)
+        target.close.assert_called_once()
+        mock_replace.assert_called_once_with("backup.db.tmp", "backup.db")
+
+    @patch("src.repository.memo_database.time.sleep")
+    @patch("src.repository.memo_database.os.replace")
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_snapshot_pause(self, _mock_connect, _mock_replace, mock_sleep):
+        self.mock_database("", "memory")
+
+        def backup(_target, progress, **_kwargs):
+            progress(0, 5, 10)
+            progress(0, 0, 10)
+
+        self.mock_connection.backup.side_effect = backup
+
+        self.database.snapshot("backup.db", 5, pause=0.5)
+
+        mock_sleep.assert_called_once_with(0.5)
+
+    @patch("src.repository.memo_database.os.replace")
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_snapshot_wal(self, mock_connect, _mock_replace):
+        self.mock_database("/data/memo.db", "wal")
+        source = Mock()
+        target = Mock()
+        mock_connect.side_effect = [source, target]
+
+        self.database.snapshot("backup.db", 5)
+
+        self.assertEqual(mock_connect.call_args_list[0][0], ("/data/memo.db",))
+        source.execute.assert_any_call("BEGIN")
+        self.assertIs(source.backup.call_args[0][0], target)
+        self.assertEqual(source.backup.call_args[1]["pages"], 5)
+        self.mock_connection.backup.assert_not_called()
+        source.close.assert_called_once()
+
+    @patch("src.repository.memo_database.os.replace")
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_snapshot_rollback_journal(self, _mock_connect, _mock_replace):
+        self.mock_database("/data/memo.db", "delete")
+
+        self.database.snapshot("backup.db", 5)
+
+        # stepped as in WAL mode, so writers only wait for a step
+        self.assertEqual(self.mock_connection.backup.call_args[1]["pages"], 5)
+
+    def test_snapshot_rollback_journal_lets_writers_in(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "memo.db")
+        connection = sqlite3.connect(path)
+        self.addCleanup(connection.close)
+        memo_repo = SQLiteMemoRepository(connection)
+        memo_repo.create_table_if_not_exists()
+        memo_repo.create_many([Memo(title="Memo " * 200) for _ in range(20)])
+        writer = SQLiteMemoRepository(sqlite3.connect(path, timeout=0))
+        self.addCleanup(writer.connect.close)
+        steps = []
+
+        def progress(remaining, total):
+            if not steps:
+                # a writer waiting for the whole copy would fail at once
+                writer.create(Memo(title="Written during the snapshot"))
+            steps.append((remaining, total))
+
+        dest = os.path.join(directory.name, "snapshot.db")
+        SQLiteMemoDatabase(connection).snapshot(dest, 2, progress)
+
+        self.assertGreater(len(steps), 2)
+        snapshot = sqlite3.connect(dest)
+        self.addCleanup(snapshot.close)
+        self.assertEqual(
+            snapshot.execute("SELECT count(*) FROM memos").fetchone(), (21,)
+        )
+
+    def test_snapshot_gives_up_under_steady_writes(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "memo.db")
+        connection = sqlite3.connect(path)
+        self.addCleanup(connection.close)
+        memo_repo = SQLiteMemoRepository(connection)
+        memo_repo.create_table_if_not_exists()
+        memo_repo.create_many([Memo(title="Memo " * 200) for _ in range(20)])
+        writer = SQLiteMemoRepository(sqlite3.connect(path, timeout=0))
+        self.addCleanup(writer.connect.close)
+        steps = []
+
+        def progress(remaining, total):
+            # a write after every step restarts the copy every time
+            writer.create(Memo(title="Written during the snapshot"))
+            steps.append((remaining, total))
+
+        dest = os.path.join(directory.name, "snapshot.db")
+        with self.assertRaises(RepositoryError) as context:
+            SQLiteMemoDatabase(connection).snapshot(dest, 2, progress)
+
+        self.assertEqual(context.exception.code, RepositoryErrorCode.FAILED_TO_SNAPSHOT)
+        self.assertIn("restarted", str(context.exception.original_exception))
+        self.assertEqual(len(steps), SNAPSHOT_MAX_RESTARTS + 1)
+        self.assertFalse(os.path.exists(dest))
+
+    @patch("src.repository.memo_database.os.replace")
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_snapshot_error(self, _mock_connect, mock_replace):
+        self.mock_database("", "memory")
+        original_exception = Exception("Database error")
+        self.mock_connection.backup.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.database.snapshot("backup.db")
+
+        self.assertEqual(str(context.exception), "Failed to snapshot")
+        self.assertEqual(context.exception.original_exception, original_exception)
+        mock_replace.assert_not_called()
+
+    @patch("src.repository.memo_database.os.path.isfile", return_value=True)
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_restore(self, mock_connect, _mock_isfile):
+        progress = Mock()
+        snapshot = mock_connect.return_value
+        snapshot.backup.side_effect = lambda _target, pages, progress: progress(
+            0, 0, 10
+        )
+        # the change counter, last change seq and last memo ID before the restore
+        self.cursor_mock.execute.return_value.fetchone.side_effect = [(7,), (9,), (4,)]
+        self.cursor_mock.rowcount = 1
+
+        self.database.restore("backup.db", 5, progress)
+
+        mock_connect.assert_called_once_with("backup.db")
+        self.assertIs(snapshot.backup.call_args[0][0], self.mock_connection)
+        self.assertEqual(snapshot.backup.call_args[1]["pages"], 5)
+        progress.assert_called_once_with(0, 10)
+        snapshot.close.assert_called_once()
+        bump_calls = self.cursor_mock.execute.call_args_list[3:]
+        self.assertEqual([call[0][1] for call in bump_calls], [(7,), (9,), (4,)])
+        self.assertIn("'reset'", bump_calls[1][0][0])
+
+    def test_restore_moves_past_previous_state(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        connection = sqlite3.connect(os.path.join(directory.name, "memo.db"))
+        self.addCleanup(connection.close)
+        memo_repo = SQLiteMemoRepository(connection)
+        memo_repo.create_table_if_not_exists()
+        database = SQLiteMemoDatabase(connection)
+        memo_service = MemoService(
+            memo_repo, MemoListCache(), TitleIndex(sync_interval=0)
+        )
+        output = Mock()
+        memo_service.set_output(output)
+
+        def get_memos(validator=None):
+            memo_service.get_memos(
+                {} if validator is None else {"validator": validator}
+            )
+            return output.output.call_args[0][0]["list"]
+
+        memo_repo.create(Memo(title="a"))
+        snapshot = os.path.join(directory.name, "snapshot.db")
+        database.snapshot(snapshot)
+        memo_repo.create(Memo(title="b"))
+        memo_repo.create(Memo(title="c"))
+        self.assertEqual([memo["title"] for memo in get_memos()], ["a", "b", "c"])
+        validator = memo_service.get_list_validator()
+        last_seq = memo_repo.get_last_change_seq()
+        self.assertEqual(
+            memo_service.title_index.suggest(memo_repo, "", 10), ["a", "b", "c"]
+        )
+
+        database.restore(snapshot)
+        x_id = memo_repo.create(Memo(title="x"))
+        memo_repo.create(Memo(title="y"))
+
+        output.reset_mock()
+        self.assertEqual(
+            [memo["title"] for memo in get_memos(validator)], ["a", "x", "y"]
+        )
+        output.not_modified.assert_not_called()
+        self.assertGreater(x_id, 3)
+        changes = memo_repo.changes_since(last_seq, 10)
+        self.assertEqual(
+            [change.change_type for change in changes],
+            [MemoChangeType.RESET, MemoChangeType.CREATE, MemoChangeType.CREATE],
+        )
+        self.assertEqual(
+            memo_service.title_index.suggest(memo_repo, "", 10), ["a", "x", "y"]
+        )
+
+    @patch("src.repository.memo_database.os.path.isfile", return_value=False)
+    @patch("src.repository.memo_database.sqlite3.connect")
+    def test_restore_missing_snapshot(self, mock_connect, _mock_isfile):
+        with self.assertRaises(RepositoryError) as context:
+            self.database.restore("backup.db")
+
+        self.assertEqual(str(context.exception), "Failed to restore")
+        self.assertIsInstance(context.exception.original_exception, FileNotFoundError)
+        mock_connect.assert_not_called()
+
+    def test_optimize(self):
+        self.database.optimize()
+
+        executed_sqls = [call[0][0] for call in self.cursor_mock.execute.call_args_list]
+        self.assertEqual(
+            executed_sqls, ["PRAGMA analysis_limit = 400", "PRAGMA optimize"]
+        )
+
+    def test_optimize_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.database.optimize()
+
+        self.assertEqual(str(context.exception), "Failed to maintain")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_incremental_vacuum(self):
+        self.cursor_mock.fetchone.side_effect = [(50,), (20,)]
+
+        released_pages = self.database.incremental_vacuum(30)
+
+        executed_sqls = [call[0][0] for call in self.cursor_mock.execute.call_args_list]
+        self.assertEqual(
+            executed_sqls, ["PRAGMA freelist_count", "PRAGMA freelist_count"]
+        )
+        self.cursor_mock.executescript.assert_called_once_with(
+            "PRAGMA incremental_vacuum(30)"
+        )
+        self.assertEqual(released_pages, 30)
+
+    def test_incremental_vacuum_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.database.incremental_vacuum(30)
+
+        self.assertEqual(str(context.exception), "Failed to maintain")
+
+    def test_prune_changes(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        memo_repo = SQLiteMemoRepository(connection)
+        memo_repo.create_table_if_not_exists()
+        database = SQLiteMemoDatabase(connection)
+        title_index = TitleIndex(sync_interval=0)
+        for title in ("a", "b", "c"):
+            memo_repo.create(Memo(title=title))
+        title_index.sync(memo_repo)
+        memo_repo.create(Memo(title="d"))
+        memo_repo.create(Memo(title="e"))
+
+        pruned_changes = database.prune_changes(5)
+
+        self.assertEqual(pruned_changes, 3)
+        changes = memo_repo.changes_since(0, 10)
+        self.assertEqual([change.seq for change in changes], [4, 5])
+        self.assertEqual(changes[0].change_type, MemoChangeType.RESET)
+        self.assertEqual(memo_repo.changes_since(4, 10), changes[1:])
+        # the index had not read the pruned change 4, so it reads the memos again
+        self.assertEqual(
+            title_index.suggest(memo_repo, "", 10), ["a", "b", "c", "d", "e"]
+        )
+        self.assertEqual(database.prune_changes(5), 0)
+
+    def test_prune_changes_nothing_below(self):
+        self.cursor_mock.fetchone.return_value = (None,)
+
+        self.assertEqual(self.database.prune_changes(1), 0)
+
+        self.cursor_mock.execute.assert_called_once()
+
+    def test_prune_changes_error(self):
+        self.cursor_mock.execute.side_effect = Exception("Database error")
+
+        with self.assertRaises(RepositoryError) as context:
+            self.database.prune_changes(10)
+
+        self.assertEqual(str(context.exception), "Failed to maintain")
+
+    def test_checkpoint(self):
+        self.cursor_mock.fetchone.return_value = (0, 120, 100)
+
+        result = self.database.checkpoint("TRUNCATE")
+
+        sql = self.cursor_mock.execute.call_args[0][0]
+        self.assertEqual(sql, "PRAGMA wal_checkpoint(TRUNCATE)")
+        self.assertEqual(result, (120, 100))
+
+    def test_checkpoint_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.database.checkpoint()
+
+        self.assertEqual(str(context.exception), "Failed to maintain")
+
+
+if __name__ == "__main__":
+    unittest.main()
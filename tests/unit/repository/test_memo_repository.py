@@ -1,19 +1,53 @@
 import datetime
+import json
+import sqlite3
+import threading
 import unittest
-from unittest.mock import MagicMock, Mock
-
-from src.entity.memo import Memo
-from src.repository.common import RepositoryError
-from src.repository.memo_repository import SQLiteMemoRepository
-
-
-class TestSQLiteMemoRepository(unittest.TestCase):
+from unittest.mock import MagicMock, Mock, patch
+
+from src.entity.memo import (
+    DateBucket,
+    Memo,
+    MemoChange,
+    MemoChangeType,
+    MemoDateField,
+    MemoQuery,
+)
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.import_checkpoint import CREATE_IMPORT_POSITIONS_SQL
+from src.repository.memo_repository import (
+    CREATE_CHANGE_COUNTER_SQLS,
+    CREATE_CHANGE_LOG_SQLS,
+    CREATE_DATE_INDEX_SQLS,
+    CREATE_EXPIRES_AT_INDEX_SQL,
+    CREATE_IDEMPOTENCY_KEYS_SQLS,
+    SQLiteMemoRepository,
+    build_query_filter,
+    memo_change_row_factory,
+    memo_row_factory,
+)
+from src.repository.title_search import (
+    CREATE_TITLE_TRIGRAMS_SQLS,
+    REBUILD_TITLE_TRIGRAMS_SQL,
+    SELECT_TITLE_TRIGRAMS_EXISTS_SQL,
+)
+
+NOW = "2024-06-01T12:00:00"
+
+
+class MockConnectionTestCase(unittest.TestCase):
+    """A repository over a mock connection, whose calls share a single mock cursor."""
 
     def setUp(self):
         # MagicMock support the context manager protocol
         self.mock_connection = MagicMock()
+        self.cursor_mock = Mock()
+        self.mock_connection.cursor.return_value = self.cursor_mock
         self.repository = SQLiteMemoRepository(self.mock_connection)
         self.now = datetime.datetime.now()
+        patcher = patch("src.repository.memo_repository.get_now", return_value=NOW)
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.tolerance = datetime.timedelta(seconds=1)
 
     def assert_time_almost_equal(self, expected_time, actual_time):
@@ -22,29 +56,27 @@ class TestSQLiteMemoRepository(unittest.TestCase):
             f"Expected time: {expected_time}, but got: {actual_time}",
         )
 
+
+class TestSQLiteMemoRepository(MockConnectionTestCase):
+
     def test_create_memo(self):
         memo = Memo(title="New Memo")
 
-        cursor_mock = Mock()
+        cursor_mock = self.cursor_mock
         cursor_mock.lastrowid = 1
-        self.mock_connection.cursor.return_value = cursor_mock
 
         new_id = self.repository.create(memo)
 
-        self.mock_connection.cursor.assert_called_once()
         cursor_mock.execute.assert_called_once()
 
         sql, params = cursor_mock.execute.call_args[0]
         expected_sql = (
-            "INSERT INTO memos (title, create_date, update_date) VALUES (?, ?, ?)"
-        )
-        expected_params = (
-            memo.title,
-            self.now.isoformat(),
-            self.now.isoformat(),
+            "INSERT INTO memos (title, create_date, update_date, expires_at) "
+            "VALUES (?, ?, ?, ?)"
         )
         self.assertEqual(sql, expected_sql)
-        self.assertEqual(params[0], expected_params[0])
+        self.assertEqual(params[0], memo.title)
+        self.assertIsNone(params[3])
 
         create_date = datetime.datetime.fromisoformat(params[1])
         update_date = datetime.datetime.fromisoformat(params[2])
@@ -52,11 +84,19 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         self.assert_time_almost_equal(self.now, update_date)
         self.assertEqual(new_id, 1)
 
+    def test_create_memo_expires_at(self):
+        expires_at = datetime.datetime(2024, 6, 2, 12, 0)
+
+        self.repository.create(Memo(title="New Memo", expires_at=expires_at))
+
+        params = self.cursor_mock.execute.call_args[0][1]
+        self.assertEqual(params[3], "2024-06-02T12:00:00")
+
     def test_create_memo_error(self):
         memo = Memo(title="New Memo")
 
         original_exception = Exception("Database error")
-        self.mock_connection.cursor.side_effect = original_exception
+        self.cursor_mock.execute.side_effect = original_exception
 
         with self.assertRaises(RepositoryError) as context:
             self.repository.create(memo)
@@ -65,35 +105,63 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         self.assertEqual(context.exception.original_exception, original_exception)
 
     def test_update_memo(self):
-        memo = Memo(title="Updated Memo", id=1)
+        memo = Memo(title="Updated Memo", id=1, version=2)
 
-        cursor_mock = Mock()
-        self.mock_connection.cursor.return_value = cursor_mock
+        cursor_mock = self.cursor_mock
+        updated_memo = Memo(title="Updated Memo", id=1, version=3)
+        cursor_mock.fetchone.return_value = updated_memo
 
-        self.repository.update(memo)
+        result = self.repository.update(memo)
 
-        self.mock_connection.cursor.assert_called_once()
         cursor_mock.execute.assert_called_once()
 
         sql, params = cursor_mock.execute.call_args[0]
-        expected_sql = "UPDATE memos SET title = ?, update_date = ? WHERE id = ?"
-        expected_params = (
-            memo.title,
-            self.now.isoformat(),
-            memo.id,
+        expected_sql = (
+            "UPDATE memos SET title = ?, update_date = ?, "
+            "expires_at = coalesce(?, expires_at), version = version + 1 "
+            "WHERE id = ? AND (expires_at IS NULL OR expires_at > ?) "
+            "AND (? IS NULL OR version = ?) "
+            "RETURNING id, title, create_date, update_date, version, expires_at"
         )
         self.assertEqual(sql, expected_sql)
-        self.assertEqual(params[0], expected_params[0])
-        self.assertEqual(params[2], expected_params[2])
+        self.assertEqual(
+            params,
+            (memo.title, NOW, None, memo.id, NOW, memo.version, memo.version),
+        )
+        self.assertEqual(result, updated_memo)
 
-        update_date = datetime.datetime.fromisoformat(params[1])
-        self.assert_time_almost_equal(self.now, update_date)
+    def test_update_memo_not_found(self):
+        cursor_mock = self.cursor_mock
+        cursor_mock.fetchone.return_value = None
+
+        self.assertIsNone(self.repository.update(Memo(title="Memo", id=1)))
+        cursor_mock.execute.assert_called_once()
+
+        self.assertIsNone(self.repository.update(Memo(title="Memo", id=1, version=2)))
+        sql, params = cursor_mock.execute.call_args[0]
+        self.assertEqual(
+            sql,
+            "SELECT 1 FROM memos WHERE id = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+        )
+        self.assertEqual(params, (1, NOW))
+
+    def test_update_memo_version_conflict(self):
+        self.cursor_mock.fetchone.side_effect = [None, (1,)]
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.update(Memo(title="Memo", id=1, version=2))
+
+        self.assertEqual(
+            context.exception.code, RepositoryErrorCode.MEMO_VERSION_CONFLICT
+        )
+        self.assertIsNone(context.exception.original_exception)
 
     def test_update_memo_error(self):
         memo = Memo(title="Updated Memo", id=1)
 
         original_exception = Exception("Database error")
-        self.mock_connection.cursor.side_effect = original_exception
+        self.cursor_mock.execute.side_effect = original_exception
 
         with self.assertRaises(RepositoryError) as context:
             self.repository.update(memo)
@@ -109,12 +177,10 @@ class TestSQLiteMemoRepository(unittest.TestCase):
             update_date=datetime.datetime.now(),
         )
 
-        cursor_mock = Mock()
-        self.mock_connection.cursor.return_value = cursor_mock
+        cursor_mock = self.cursor_mock
 
         self.repository.delete(memo)
 
-        self.mock_connection.cursor.assert_called_once()
         cursor_mock.execute.assert_called_once()
 
         sql, params = cursor_mock.execute.call_args[0]
@@ -132,7 +198,7 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         )
 
         original_exception = Exception("Database error")
-        self.mock_connection.cursor.side_effect = original_exception
+        self.cursor_mock.execute.side_effect = original_exception
 
         with self.assertRaises(RepositoryError) as context:
             self.repository.delete(memo)
@@ -141,23 +207,19 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         self.assertEqual(context.exception.original_exception, original_exception)
 
     def test_get_memo(self):
-        cursor_mock = Mock()
-        self.mock_connection.cursor.return_value = cursor_mock
-        cursor_mock.fetchone.return_value = (
-            1,
-            "Sample Memo",
-            datetime.datetime.now().isoformat(),
-            datetime.datetime.now().isoformat(),
-        )
+        cursor_mock = self.cursor_mock
+        cursor_mock.fetchone.return_value = Memo(id=1, title="Sample Memo")
 
         memo = self.repository.get(1)
 
-        self.mock_connection.cursor.assert_called_once()
         cursor_mock.execute.assert_called_once()
 
         sql, params = cursor_mock.execute.call_args[0]
-        expected_sql = "SELECT * FROM memos WHERE id = ?"
-        expected_params = (1,)
+        expected_sql = (
+            "SELECT id, title, create_date, update_date, version, expires_at "
+            "FROM memos WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)"
+        )
+        expected_params = (1, NOW)
         self.assertEqual(sql, expected_sql)
         self.assertEqual(params, expected_params)
 
@@ -165,18 +227,19 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         self.assertEqual(memo.title, "Sample Memo")
 
     def test_get_memo_not_found(self):
-        cursor_mock = Mock()
-        self.mock_connection.cursor.return_value = cursor_mock
+        cursor_mock = self.cursor_mock
         cursor_mock.fetchone.return_value = None
 
         memo = self.repository.get(1)
 
-        self.mock_connection.cursor.assert_called_once()
         cursor_mock.execute.assert_called_once()
 
         sql, params = cursor_mock.execute.call_args[0]
-        expected_sql = "SELECT * FROM memos WHERE id = ?"
-        expected_params = (1,)
+        expected_sql = (
+            "SELECT id, title, create_date, update_date, version, expires_at "
+            "FROM memos WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)"
+        )
+        expected_params = (1, NOW)
         self.assertEqual(sql, expected_sql)
         self.assertEqual(params, expected_params)
 
@@ -184,7 +247,7 @@ class TestSQLiteMemoRepository(unittest.TestCase):
 
     def test_get_memo_error(self):
         original_exception = Exception("Database error")
-        self.mock_connection.cursor.side_effect = original_exception
+        self.cursor_mock.execute.side_effect = original_exception
 
         with self.assertRaises(RepositoryError) as context:
             self.repository.get(1)
@@ -193,37 +256,29 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         self.assertEqual(context.exception.original_exception, original_exception)
 
     def test_get_all_memos(self):
-        cursor_mock = Mock()
-        self.mock_connection.cursor.return_value = cursor_mock
+        cursor_mock = self.cursor_mock
         cursor_mock.fetchall.return_value = [
-            (
-                1,
-                "Memo 1",
-                datetime.datetime.now().isoformat(),
-                datetime.datetime.now().isoformat(),
-            ),
-            (
-                2,
-                "Memo 2",
-                datetime.datetime.now().isoformat(),
-                datetime.datetime.now().isoformat(),
-            ),
+            Memo(id=1, title="Memo 1"),
+            Memo(id=2, title="Memo 2"),
         ]
 
         memos = self.repository.get_all()
 
-        self.mock_connection.cursor.assert_called_once()
         cursor_mock.execute.assert_called_once()
 
-        sql = cursor_mock.execute.call_args[0][0]
-        expected_sql = "SELECT * FROM memos"
+        sql, params = cursor_mock.execute.call_args[0]
+        expected_sql = (
+            "SELECT id, title, create_date, update_date, version, expires_at "
+            "FROM memos WHERE (expires_at IS NULL OR expires_at > ?)"
+        )
         self.assertEqual(sql, expected_sql)
+        self.assertEqual(params, (NOW,))
 
         self.assertEqual(len(memos), 2)
 
     def test_get_all_memos_error(self):
         original_exception = Exception("Database error")
-        self.mock_connection.cursor.side_effect = original_exception
+        self.cursor_mock.execute.side_effect = original_exception
 
         with self.assertRaises(RepositoryError) as context:
             self.repository.get_all()
@@ -231,23 +286,659 @@ class TestSQLiteMemoRepository(unittest.TestCase):
         self.assertEqual(str(context.exception), "Failed to get all memos")
         self.assertEqual(context.exception.original_exception, original_exception)
 
+    def test_get_all_fields(self):
+        self.cursor_mock.fetchall.return_value = [(1, "Memo 1"), (2, "Memo 2")]
+
+        memos = self.repository.get_all_fields(("title", "id"))
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertEqual(
+            sql,
+            "SELECT id, title FROM memos WHERE (expires_at IS NULL OR expires_at > ?)",
+        )
+        self.assertEqual(params, (NOW,))
+        self.assertEqual(
+            memos, [{"id": 1, "title": "Memo 1"}, {"id": 2, "title": "Memo 2"}]
+        )
+
+    def test_get_all_fields_invalid(self):
+        for fields in [(), ("id", "title FROM memos; --")]:
+            with self.assertRaises(RepositoryError) as context:
+                self.repository.get_all_fields(fields)
+
+            self.assertEqual(
+                context.exception.code, RepositoryErrorCode.FAILED_TO_GET_ALL_MEMOS
+            )
+        self.cursor_mock.execute.assert_not_called()
+
+    def test_memo_row_factory(self):
+        memo = memo_row_factory(
+            None,
+            (1, "Sample Memo", self.now.isoformat(), self.now.isoformat(), 2, NOW),
+        )
+
+        self.assertEqual(memo.to_dict()["create_date"], self.now.isoformat())
+
+        self.assertEqual(memo.id, 1)
+        self.assertEqual(memo.title, "Sample Memo")
+        self.assertEqual(memo.create_date, self.now)
+        self.assertEqual(memo.update_date, self.now)
+        self.assertEqual(memo.version, 2)
+        self.assertEqual(memo.expires_at, datetime.datetime(2024, 6, 1, 12, 0))
+
+    def test_memo_row_factory_invalid_date(self):
+        memo = memo_row_factory(None, (1, "Sample Memo", "2024-13-01", None, 1, None))
+
+        self.assertEqual(memo.to_dict()["create_date"], "2024-13-01")
+        with self.assertRaises(RepositoryError) as context:
+            _ = memo.create_date
+
+        self.assertEqual(
+            context.exception.code, RepositoryErrorCode.INVALID_STORED_DATE
+        )
+        self.assertIsInstance(context.exception.original_exception, ValueError)
+
+    def test_cursor_per_call(self):
+        self.mock_connection.cursor.assert_not_called()
+
+        self.repository.get(1)
+        self.repository.get_all()
+        self.repository.changes_since(0, 10)
+
+        self.assertEqual(self.mock_connection.cursor.call_count, 3)
+
+    def test_shared_connection_threads(self):
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        repository.create_table_if_not_exists()
+        titles = {
+            repository.create(Memo(title=f"Memo {i}")): f"Memo {i}" for i in range(20)
+        }
+        mismatches = []
+
+        def read():
+            for _ in range(50):
+                for memo_id, title in titles.items():
+                    if repository.get(memo_id).title != title:
+                        mismatches.append(memo_id)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mismatches, [])
+
+
+class TestSQLiteMemoRepositoryBatches(MockConnectionTestCase):
+
+    def test_create_many(self):
+        memos = [Memo(title="Memo 1"), Memo(title="Memo 2")]
+
+        count = self.repository.create_many(memos)
+
+        sql, params = self.cursor_mock.executemany.call_args[0]
+        expected_sql = (
+            "INSERT INTO memos (title, create_date, update_date, expires_at) "
+            "VALUES (?, ?, ?, ?)"
+        )
+        self.assertEqual(sql, expected_sql)
+        self.assertEqual([param[0] for param in params], ["Memo 1", "Memo 2"])
+        create_date = datetime.datetime.fromisoformat(params[0][1])
+        self.assert_time_almost_equal(self.now, create_date)
+        self.assertEqual(count, 2)
+        self.mock_connection.__enter__.assert_called_once()
+
+    def test_create_many_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.executemany.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.create_many([Memo(title="Memo 1")])
+
+        self.assertEqual(str(context.exception), "Failed to create memos")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_iter_all(self):
+        batches = [[Memo(id=1, title="Memo 1"), Memo(id=2, title="Memo 2")], []]
+        self.cursor_mock.fetchmany.side_effect = batches
+
+        result = list(self.repository.iter_all(2))
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        expected_sql = (
+            "SELECT id, title, create_date, update_date, version, expires_at "
+            "FROM memos WHERE (expires_at IS NULL OR expires_at > ?)"
+        )
+        self.assertEqual(sql, expected_sql)
+        self.assertEqual(params, (NOW,))
+        self.cursor_mock.fetchmany.assert_called_with(2)
+        self.assertEqual(result, batches[:1])
+        self.assertIs(self.cursor_mock.row_factory, memo_row_factory)
+        self.cursor_mock.close.assert_called_once()
+
+    def test_iter_all_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            list(self.repository.iter_all(2))
+
+        self.assertEqual(str(context.exception), "Failed to get all memos")
+        self.assertEqual(context.exception.original_exception, original_exception)
+        self.cursor_mock.close.assert_called_once()
+
+
+class TestSQLiteMemoRepositorySchema(MockConnectionTestCase):
+
     def test_create_table_if_not_exists(self):
+        self.cursor_mock.fetchall.return_value = [
+            (0, "id"),
+            (1, "title"),
+            (2, "create_date"),
+            (3, "update_date"),
+            (4, "version"),
+            (5, "expires_at"),
+        ]
         self.repository.create_table_if_not_exists()
-        self.mock_connection.cursor.assert_called()
-        cursor_mock = self.mock_connection.cursor.return_value
-        cursor_mock.execute.assert_called()
-        sql = cursor_mock.execute.call_args[0][0]
+        self.cursor_mock.execute.assert_called()
+        sql = self.cursor_mock.execute.call_args_list[1][0][0]
         expected_sql = "".join(
             [
                 "CREATE TABLE IF NOT EXISTS memos (",
                 "id INTEGER PRIMARY KEY AUTOINCREMENT,",
                 "title TEXT NOT NULL,",
                 "create_date TEXT NOT NULL,",
-                "update_date TEXT NOT NULL",
+                "update_date TEXT NOT NULL,",
+                "version INTEGER NOT NULL DEFAULT 1,",
+                "expires_at TEXT",
                 ")",
             ]
         )
         self.assertEqual(sql, expected_sql)
+        executed_sqls = [call[0][0] for call in self.cursor_mock.execute.call_args_list]
+        self.assertEqual(executed_sqls[0], "PRAGMA auto_vacuum = INCREMENTAL")
+        self.assertEqual(executed_sqls[2], "PRAGMA table_info(memos)")
+        self.assertEqual(
+            executed_sqls[3:],
+            list(
+                CREATE_CHANGE_COUNTER_SQLS
+                + CREATE_CHANGE_LOG_SQLS
+                + CREATE_DATE_INDEX_SQLS
+                + (CREATE_EXPIRES_AT_INDEX_SQL,)
+                + CREATE_IDEMPOTENCY_KEYS_SQLS
+                + (CREATE_IMPORT_POSITIONS_SQL,)
+                + (SELECT_TITLE_TRIGRAMS_EXISTS_SQL,)
+                + CREATE_TITLE_TRIGRAMS_SQLS
+            ),
+        )
+
+    def test_create_table_if_not_exists_indexes_existing_titles(self):
+        self.cursor_mock.fetchall.return_value = []
+        self.cursor_mock.fetchone.return_value = None
+
+        self.repository.create_table_if_not_exists()
+
+        self.cursor_mock.execute.assert_called_with(REBUILD_TITLE_TRIGRAMS_SQL)
+
+    def test_create_table_if_not_exists_adds_missing_columns(self):
+        self.cursor_mock.fetchall.return_value = [
+            (0, "id"),
+            (1, "title"),
+            (2, "create_date"),
+            (3, "update_date"),
+        ]
+        self.repository.create_table_if_not_exists()
+        sql = self.cursor_mock.execute.call_args_list[3][0][0]
+        expected_sql = "ALTER TABLE memos ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        self.assertEqual(sql, expected_sql)
+        sql = self.cursor_mock.execute.call_args_list[4][0][0]
+        self.assertEqual(sql, "ALTER TABLE memos ADD COLUMN expires_at TEXT")
+
+
+class TestSQLiteMemoRepositoryChanges(MockConnectionTestCase):
+
+    def test_memo_change_row_factory(self):
+        change = memo_change_row_factory(
+            None,
+            (3, "update", 1, 1, "Memo", self.now.isoformat(), None, 2, None),
+        )
+
+        self.assertEqual(change.seq, 3)
+        self.assertEqual(change.change_type, MemoChangeType.UPDATE)
+        self.assertEqual(change.memo_id, 1)
+        self.assertEqual(change.memo.title, "Memo")
+        self.assertEqual(change.memo.version, 2)
+
+        change = memo_change_row_factory(
+            None, (4, "delete", 1, None, None, None, None, None, None)
+        )
+
+        self.assertEqual(change.change_type, MemoChangeType.DELETE)
+        self.assertIsNone(change.memo)
+
+    def test_changes_since(self):
+        changes = [MemoChange(seq=4, change_type=MemoChangeType.DELETE, memo_id=1)]
+        self.cursor_mock.fetchall.return_value = changes
+
+        result = self.repository.changes_since(3, 10)
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        expected_sql = (
+            "SELECT c.seq, c.change_type, c.memo_id, "
+            "m.id, m.title, m.create_date, m.update_date, m.version, m.expires_at "
+            "FROM memo_changes c LEFT JOIN memos m ON m.id = c.memo_id "
+            "WHERE c.seq > ? ORDER BY c.seq LIMIT ?"
+        )
+        self.assertEqual(sql, expected_sql)
+        self.assertEqual(params, (3, 10))
+        self.assertEqual(result, changes)
+
+    def test_changes_since_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.changes_since(3, 10)
+
+        self.assertEqual(str(context.exception), "Failed to get changes")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_get_change_counter(self):
+        self.cursor_mock.fetchone.return_value = (7,)
+
+        counter = self.repository.get_change_counter()
+
+        sql = self.cursor_mock.execute.call_args[0][0]
+        expected_sql = "SELECT counter FROM memos_change_counter WHERE id = 0"
+        self.assertEqual(sql, expected_sql)
+        self.assertEqual(counter, 7)
+
+    def test_get_change_counter_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.get_change_counter()
+
+        self.assertEqual(str(context.exception), "Failed to get change counter")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_get_last_change_seq(self):
+        self.cursor_mock.fetchone.return_value = (12,)
+
+        seq = self.repository.get_last_change_seq()
+
+        sql = self.cursor_mock.execute.call_args[0][0]
+        self.assertEqual(sql, "SELECT coalesce(max(seq), 0) FROM memo_changes")
+        self.assertEqual(seq, 12)
+
+    def test_get_last_change_seq_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.get_last_change_seq()
+
+        self.assertEqual(str(context.exception), "Failed to get last change seq")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+
+class TestSQLiteMemoRepositoryExpiry(MockConnectionTestCase):
+
+    def test_get_next_expiry(self):
+        self.cursor_mock.fetchone.return_value = ("2024-06-02T12:00:00",)
+
+        next_expiry = self.repository.get_next_expiry()
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertEqual(sql, "SELECT min(expires_at) FROM memos WHERE expires_at > ?")
+        self.assertEqual(params, (NOW,))
+        self.assertEqual(next_expiry, "2024-06-02T12:00:00")
+
+    def test_get_next_expiry_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.get_next_expiry()
+
+        self.assertEqual(str(context.exception), "Failed to get next expiry")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_purge_expired(self):
+        self.cursor_mock.rowcount = 3
+
+        deleted = self.repository.purge_expired(100)
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertEqual(
+            sql,
+            "DELETE FROM memos WHERE id IN (SELECT id FROM memos "
+            "WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)",
+        )
+        self.assertEqual(params, (NOW, 100))
+        self.assertEqual(deleted, 3)
+
+    def test_purge_expired_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.purge_expired(100)
+
+        self.assertEqual(str(context.exception), "Failed to purge memos")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_expired_memos_are_not_read(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        repository.create_table_if_not_exists()
+        expired = Memo(title="Expired", expires_at="2024-06-01T11:00:00")
+        expiring = Memo(title="Expiring", expires_at="2024-06-01T13:00:00")
+        expired_id = repository.create(expired)
+        expiring_id = repository.create(expiring)
+        kept_id = repository.create(Memo(title="Kept"))
+
+        self.assertIsNone(repository.get(expired_id))
+        self.assertIsNone(repository.update(Memo(id=expired_id, title="Back")))
+        self.assertEqual(
+            [memo.id for memo in repository.get_all()], [expiring_id, kept_id]
+        )
+        self.assertEqual(repository.count(MemoQuery()), 2)
+        self.assertEqual(repository.get_next_expiry(), "2024-06-01T13:00:00")
+
+        self.assertEqual(repository.purge_expired(10), 1)
+        self.assertEqual(repository.purge_expired(10), 0)
+        self.assertEqual(repository.count(MemoQuery()), 2)
+
+
+class TestSQLiteMemoRepositoryIdempotency(MockConnectionTestCase):
+
+    def test_create_idempotent(self):
+        self.cursor_mock.rowcount = 1
+        self.cursor_mock.lastrowid = 7
+        key_expires_at = datetime.datetime(2024, 6, 2, 12, 0)
+
+        memo, created = self.repository.create_idempotent(
+            Memo(title="New Memo"), "key-1", key_expires_at, "hash-1"
+        )
+
+        calls = self.cursor_mock.execute.call_args_list
+        self.assertEqual(
+            calls[0][0],
+            (
+                "INSERT INTO memo_idempotency_keys "
+                "(key, memo_id, expires_at, request_hash) VALUES (?, NULL, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET memo_id = NULL, "
+                "expires_at = excluded.expires_at, "
+                "request_hash = excluded.request_hash "
+                "WHERE memo_idempotency_keys.expires_at <= ?",
+                ("key-1", "2024-06-02T12:00:00", "hash-1", NOW),
+            ),
+        )
+        self.assertEqual(calls[1][0][1], ("New Memo", NOW, NOW, None))
+        self.assertEqual(
+            calls[2][0],
+            (
+                "UPDATE memo_idempotency_keys SET memo_id = ?, memo = ? WHERE key = ?",
+                (7, json.dumps(memo.to_dict()), "key-1"),
+            ),
+        )
+        self.assertTrue(created)
+        self.assertEqual(
+            memo,
+            Memo(id=7, title="New Memo", create_date=NOW, update_date=NOW, version=1),
+        )
+
+    def test_create_idempotent_retry(self):
+        stored = Memo(id=7, title="New Memo", create_date=NOW, update_date=NOW)
+        self.cursor_mock.rowcount = 0
+        self.cursor_mock.fetchone.side_effect = [
+            (7, "hash-1", json.dumps(stored.to_dict())),
+            (1,),
+        ]
+
+        memo, created = self.repository.create_idempotent(
+            Memo(title="New Memo"),
+            "key-1",
+            datetime.datetime(2024, 6, 2, 12, 0),
+            "hash-1",
+        )
+
+        calls = self.cursor_mock.execute.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(
+            calls[1][0],
+            (
+                "SELECT memo_id, request_hash, memo "
+                "FROM memo_idempotency_keys WHERE key = ?",
+                ("key-1",),
+            ),
+        )
+        self.assertEqual(calls[2][0][1], (7, NOW))
+        self.assertFalse(created)
+        self.assertEqual(memo, stored)
+
+    def test_create_idempotent_retry_errors(self):
+        stored = json.dumps(Memo(id=7, title="New Memo").to_dict())
+        for fetched, error_code in (
+            ([(7, "hash-2", stored)], RepositoryErrorCode.IDEMPOTENCY_KEY_REUSED),
+            ([(7, "hash-1", stored), None], RepositoryErrorCode.CREATED_MEMO_DELETED),
+        ):
+            with self.subTest(error_code=error_code):
+                self.cursor_mock.rowcount = 0
+                self.cursor_mock.fetchone.side_effect = fetched
+
+                with self.assertRaises(RepositoryError) as context:
+                    self.repository.create_idempotent(
+                        Memo(title="New Memo"),
+                        "key-1",
+                        datetime.datetime.now(),
+                        "hash-1",
+                    )
+
+                self.assertEqual(context.exception.code, error_code)
+                self.assertIsNone(context.exception.original_exception)
+
+    def test_create_idempotent_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.create_idempotent(
+                Memo(title="New Memo"), "key-1", datetime.datetime.now(), "hash-1"
+            )
+
+        self.assertEqual(str(context.exception), "Failed to create memo")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_create_idempotent_once_per_key(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        repository.create_table_if_not_exists()
+        kept = datetime.datetime(2024, 6, 1, 13, 0)
+        expired = datetime.datetime(2024, 6, 1, 11, 0)
+
+        memo, created = repository.create_idempotent(Memo(title="A"), "a", kept, "A")
+        self.assertTrue(created)
+        repository.update(Memo(id=memo.id, title="A2"))
+        # the retry returns the memo as created, not as updated since
+        self.assertEqual(
+            repository.create_idempotent(Memo(title="A"), "a", kept, "A"),
+            (memo, False),
+        )
+        self.assertEqual(repository.count(MemoQuery()), 1)
+
+        with self.assertRaises(RepositoryError) as context:
+            repository.create_idempotent(Memo(title="C"), "a", kept, "C")
+        self.assertEqual(
+            context.exception.code, RepositoryErrorCode.IDEMPOTENCY_KEY_REUSED
+        )
+
+        repository.delete(memo)
+        with self.assertRaises(RepositoryError) as context:
+            repository.create_idempotent(Memo(title="A"), "a", kept, "A")
+        self.assertEqual(
+            context.exception.code, RepositoryErrorCode.CREATED_MEMO_DELETED
+        )
+
+        # an expired key is claimed again, for a new memo
+        other, _ = repository.create_idempotent(Memo(title="B"), "b", expired, "B")
+        memo, created = repository.create_idempotent(Memo(title="B"), "b", kept, "B")
+        self.assertEqual((memo.id, created), (other.id + 1, True))
+
+        self.assertEqual(repository.purge_idempotency_keys(10), 0)
+        with patch(
+            "src.repository.memo_repository.get_now",
+            return_value="2024-06-01T14:00:00",
+        ):
+            self.assertEqual(repository.purge_idempotency_keys(10), 2)
+
+    def test_purge_idempotency_keys(self):
+        self.cursor_mock.rowcount = 2
+
+        deleted = self.repository.purge_idempotency_keys(100)
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertEqual(
+            sql,
+            "DELETE FROM memo_idempotency_keys WHERE key IN (SELECT key "
+            "FROM memo_idempotency_keys WHERE expires_at <= ? "
+            "ORDER BY expires_at LIMIT ?)",
+        )
+        self.assertEqual(params, (NOW, 100))
+        self.assertEqual(deleted, 2)
+
+    def test_purge_idempotency_keys_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.purge_idempotency_keys(100)
+
+        self.assertEqual(str(context.exception), "Failed to purge idempotency keys")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+
+class TestSQLiteMemoRepositoryAggregates(MockConnectionTestCase):
+
+    def test_count(self):
+        self.cursor_mock.fetchone.return_value = (3,)
+
+        count = self.repository.count()
+
+        self.cursor_mock.execute.assert_called_once_with(
+            "SELECT (SELECT count(*) FROM memos) - "
+            "(SELECT count(*) FROM memos WHERE expires_at <= ?)",
+            (NOW,),
+        )
+        self.assertEqual(count, 3)
+
+    def test_count_query(self):
+        self.cursor_mock.fetchone.return_value = (1,)
+        query = MemoQuery(since=datetime.date(2024, 1, 1))
+
+        self.repository.count(query)
+
+        self.cursor_mock.execute.assert_called_once_with(
+            "SELECT (SELECT count(*) FROM memos WHERE create_date >= ?) - "
+            "(SELECT count(*) FROM memos "
+            "WHERE expires_at <= ? AND create_date >= ?)",
+            ("2024-01-01", NOW, "2024-01-01"),
+        )
+
+    def test_count_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.count()
+
+        self.assertEqual(str(context.exception), "Failed to count memos")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_count_by_date(self):
+        self.cursor_mock.fetchall.return_value = [("2024-01", 2), ("2024-02", 1)]
+        query = MemoQuery(MemoDateField.UPDATE_DATE, until=datetime.date(2024, 2, 29))
+
+        counts = self.repository.count_by_date(query, DateBucket.MONTH)
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertEqual(
+            sql,
+            "SELECT period, sum(n) FROM ("
+            "SELECT substr(update_date, 1, 7) AS period, count(*) AS n "
+            "FROM memos WHERE update_date < ? GROUP BY period UNION ALL "
+            "SELECT substr(update_date, 1, 7) AS period, -count(*) AS n "
+            "FROM memos WHERE expires_at <= ? AND update_date < ? GROUP BY period"
+            ") GROUP BY period HAVING sum(n) > 0 ORDER BY period",
+        )
+        self.assertEqual(params, ("2024-03-01", NOW, "2024-03-01"))
+        self.assertEqual(counts, [("2024-01", 2), ("2024-02", 1)])
+
+    def test_count_by_date_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.count_by_date(None, DateBucket.DAY)
+
+        self.assertEqual(str(context.exception), "Failed to count memos")
+
+    def test_get_date_range(self):
+        self.cursor_mock.fetchone.return_value = ("2024-01-01T00:00:00", None)
+        query = MemoQuery(since=datetime.date(2024, 1, 1))
+
+        date_range = self.repository.get_date_range(query)
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertEqual(
+            sql,
+            "SELECT (SELECT min(create_date) FROM memos WHERE "
+            "(expires_at IS NULL OR expires_at > ?) AND create_date >= ?), "
+            "(SELECT max(create_date) FROM memos WHERE "
+            "(expires_at IS NULL OR expires_at > ?) AND create_date >= ?)",
+        )
+        self.assertEqual(params, (NOW, "2024-01-01", NOW, "2024-01-01"))
+        self.assertEqual(date_range, ("2024-01-01T00:00:00", None))
+
+    def test_get_date_range_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.get_date_range()
+
+        self.assertEqual(str(context.exception), "Failed to get date range")
+
+    def test_build_query_filter(self):
+        self.assertEqual(build_query_filter(MemoQuery()), ("", ()))
+        self.assertEqual(
+            build_query_filter(
+                MemoQuery(
+                    MemoDateField.UPDATE_DATE,
+                    datetime.date(2024, 1, 1),
+                    datetime.date(2024, 12, 31),
+                )
+            ),
+            (
+                " WHERE update_date >= ? AND update_date < ?",
+                ("2024-01-01", "2025-01-01"),
+            ),
+        )
+        self.assertEqual(
+            build_query_filter(MemoQuery(), NOW),
+            (" WHERE (expires_at IS NULL OR expires_at > ?)", (NOW,)),
+        )
+        self.assertEqual(
+            build_query_filter(MemoQuery(), NOW, True),
+            (" WHERE expires_at <= ?", (NOW,)),
+        )
 
 
 if __name__ == "__main__":
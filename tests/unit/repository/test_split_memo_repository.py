@@ -0,0 +1,207 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+from src.entity.memo import Memo, MemoQuery
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.repository.split_memo_repository import SplitSQLiteMemoRepository
+
+
+class TestSplitSQLiteMemoRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = Mock(spec=SQLiteMemoRepository)
+        self.writer.connect = Mock()
+        self.reader = Mock(spec=SQLiteMemoRepository)
+        self.reader.connect = Mock()
+        self.iter_reader = Mock(spec=SQLiteMemoRepository)
+        self.iter_reader.connect = Mock()
+        self.repository = SplitSQLiteMemoRepository(
+            self.writer, [self.reader], Mock(return_value=self.iter_reader)
+        )
+        self.addCleanup(self.repository.close)
+
+    def test_write_on_writer_thread(self):
+        threads = []
+
+        def create(_memo):
+            threads.append(threading.current_thread().name)
+            return 1
+
+        self.writer.create.side_effect = create
+        memo = Memo(title="Memo")
+
+        self.assertEqual(self.repository.create(memo), 1)
+        self.assertEqual(threads, ["memo-writer"])
+        self.writer.create.assert_called_once_with(memo)
+        self.reader.create.assert_not_called()
+
+    def test_write_error(self):
+        error_code = RepositoryErrorCode.FAILED_TO_UPDATE_MEMO
+        self.writer.update.side_effect = RepositoryError(
+            error_code, error_code.get_message(), None
+        )
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.update(Memo(id=1, title="Memo"))
+
+        self.assertIs(context.exception.code, error_code)
+        # the writer thread keeps running the next writes
+        self.repository.delete(Memo(id=1, title="Memo"))
+        self.writer.delete.assert_called_once()
+
+    def test_read_on_reader(self):
+        memo = Memo(id=1, title="Memo")
+        self.reader.get.return_value = memo
+
+        self.assertIs(self.repository.get(1), memo)
+        self.reader.get.assert_called_once_with(1)
+        self.writer.get.assert_not_called()
+
+    def test_read_error_returns_reader(self):
+        error_code = RepositoryErrorCode.FAILED_TO_GET_ALL_MEMOS
+        self.reader.get_all.side_effect = RepositoryError(
+            error_code, error_code.get_message(), None
+        )
+
+        with self.assertRaises(RepositoryError):
+            self.repository.get_all()
+
+        self.reader.count.return_value = 0
+        self.assertEqual(self.repository.count(), 0)
+
+    def test_iter_all_on_own_connection(self):
+        self.iter_reader.iter_all.return_value = iter([[Memo(title="Memo")]])
+        idle_readers = self.repository._idle_readers  # pylint: disable=protected-access
+
+        batches = self.repository.iter_all(10)
+        next(batches)
+
+        self.assertFalse(idle_readers.empty())
+        self.reader.iter_all.assert_not_called()
+        self.iter_reader.connect.close.assert_not_called()
+        self.assertEqual(list(batches), [])
+        self.iter_reader.connect.close.assert_called_once()
+
+    def test_iter_all_closed_early(self):
+        self.iter_reader.iter_all.return_value = iter([[Memo(title="Memo")]] * 2)
+
+        batches = self.repository.iter_all(10)
+        next(batches)
+        batches.close()
+
+        self.iter_reader.connect.close.assert_called_once()
+
+    def test_read_during_slow_write(self):
+        write_started = threading.Event()
+        write_done = threading.Event()
+
+        def create(_memo):
+            write_started.set()
+            write_done.wait(5)
+            return 1
+
+        self.writer.create.side_effect = create
+        self.reader.get_change_counter.return_value = 3
+        thread = threading.Thread(target=self.repository.create, args=(Memo("A"),))
+        thread.start()
+        write_started.wait(5)
+
+        self.assertEqual(self.repository.get_change_counter(), 3)
+
+        write_done.set()
+        thread.join()
+
+    def test_closed(self):
+        self.repository.close()
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.create(Memo(title="Memo"))
+        self.assertIs(context.exception.code, RepositoryErrorCode.REPOSITORY_CLOSED)
+        self.writer.connect.close.assert_called_once()
+        self.reader.connect.close.assert_called_once()
+
+    def test_write_racing_close(self):
+        self.writer.create.return_value = 1
+        barrier = threading.Barrier(9)
+        results = []
+
+        def create():
+            barrier.wait()
+            try:
+                results.append(self.repository.create(Memo(title="Memo")))
+            except RepositoryError as error:
+                results.append(error.code)
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        self.repository.close()
+        for thread in threads:
+            thread.join(5)
+
+        # every write was either run before the writer stopped or refused
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(len(results), 8)
+        self.assertTrue(
+            set(results) <= {1, RepositoryErrorCode.REPOSITORY_CLOSED}, results
+        )
+        self.assertEqual(self.writer.create.call_count, results.count(1))
+
+
+class TestSplitSQLiteMemoRepositoryFile(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "memo.db")
+        self.repository = SplitSQLiteMemoRepository.open(self.path, 2)
+        self.addCleanup(self.repository.close)
+
+    def test_read_own_writes(self):
+        memo_id = self.repository.create(Memo(title="Memo"))
+        self.repository.update(Memo(id=memo_id, title="Updated"))
+
+        self.assertEqual(self.repository.get(memo_id).title, "Updated")
+        self.assertEqual(self.repository.count(MemoQuery()), 1)
+        self.assertEqual(self.repository.get_change_counter(), 2)
+
+    def test_readers_are_read_only(self):
+        reader = self.repository.readers[0]
+
+        with self.assertRaises(RepositoryError):
+            reader.create(Memo(title="Memo"))
+
+    def test_read_during_export_with_one_reader(self):
+        repository = SplitSQLiteMemoRepository.open(self.path, 1)
+        self.addCleanup(repository.close)
+        memo_id = repository.create(Memo(title="Memo"))
+        repository.create(Memo(title="Other"))
+
+        batches = repository.iter_all(1)
+        first_batch = next(batches)
+        titles = []
+        thread = threading.Thread(
+            target=lambda: titles.append(repository.get(memo_id).title), daemon=True
+        )
+        thread.start()
+        thread.join(5)
+
+        # the only pooled reader is idle, so the read does not wait for the export
+        self.assertEqual(titles, ["Memo"])
+        self.assertEqual(
+            [[memo.title for memo in batch] for batch in [first_batch, *batches]],
+            [["Memo"], ["Other"]],
+        )
+
+    def test_memory_database(self):
+        with self.assertRaises(ValueError):
+            SplitSQLiteMemoRepository.open(":memory:", 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
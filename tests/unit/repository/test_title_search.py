@@ -0,0 +1,217 @@
+import sqlite3
+import time
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+
+from src.entity.memo import Memo
+from src.repository.common import RepositoryError
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.repository.title_search import (
+    FUZZY_SEARCH_MAX_CANDIDATES,
+    build_substring_match,
+    build_trigram_match,
+    get_min_shared_trigrams,
+    get_trigrams,
+    rank_by_similarity,
+    select_rarest_trigrams,
+)
+
+NOW = "2024-06-01T12:00:00"
+
+
+class TestTitleSearch(unittest.TestCase):
+
+    def test_get_trigrams(self):
+        self.assertEqual(get_trigrams("Memo"), frozenset({"mem", "emo"}))
+        self.assertEqual(get_trigrams("ab"), frozenset())
+
+    def test_build_trigram_match(self):
+        self.assertEqual(
+            build_trigram_match(frozenset({"b c", 'a"b'})), '"a""b" OR "b c"'
+        )
+
+    def test_rank_by_similarity(self):
+        memos = [
+            Memo(id=1, title="Weekly meeting notes"),
+            Memo(id=2, title="Meeting"),
+            Memo(id=3, title="Meating"),
+            Memo(id=4, title="Shopping list"),
+        ]
+
+        results = rank_by_similarity(get_trigrams("meeting"), memos, 10)
+
+        self.assertEqual([memo.id for memo, _ in results], [2, 1, 3])
+        self.assertEqual([similarity for _, similarity in results], [1.0, 1.0, 0.4])
+
+    def test_rank_by_similarity_limit(self):
+        memos = [Memo(id=1, title="Memo 1"), Memo(id=2, title="Memo 2")]
+
+        results = rank_by_similarity(get_trigrams("memo"), memos, 1)
+
+        self.assertEqual([memo.id for memo, _ in results], [1])
+
+    def test_build_substring_match(self):
+        self.assertEqual(build_substring_match('a "b"'), '"a ""b"""')
+
+    def test_get_min_shared_trigrams(self):
+        self.assertEqual(
+            [get_min_shared_trigrams(count) for count in (1, 2, 5, 10)], [1, 1, 2, 3]
+        )
+
+    def test_select_rarest_trigrams(self):
+        cursor = Mock()
+        cursor.fetchall.return_value = [("mee", 3), ("eet", 2), ("eti", 2), ("ing", 90)]
+
+        rarest = select_rarest_trigrams(cursor, get_trigrams("meeting"))
+
+        # 2 of the 5 trigrams must be shared, so any 4 of them hold every result
+        self.assertEqual(rarest, frozenset({"tin", "eet", "eti", "mee"}))
+        sql, params = cursor.execute.call_args[0]
+        self.assertIn("IN (?, ?, ?, ?, ?)", sql)
+        self.assertEqual(params, ["eet", "eti", "ing", "mee", "tin"])
+
+
+class TestSQLiteMemoRepositorySearch(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_connection = MagicMock()
+        self.cursor_mock = Mock()
+        self.mock_connection.cursor.return_value = self.cursor_mock
+        self.repository = SQLiteMemoRepository(self.mock_connection)
+        patcher = patch("src.repository.memo_repository.get_now", return_value=NOW)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fuzzy_search(self):
+        self.cursor_mock.fetchall.side_effect = [
+            [Memo(id=1, title="Memo")],
+            [Memo(id=1, title="Memo"), Memo(id=2, title="Mema")],
+        ]
+        counts_cursor = self.cursor_mock.connection.cursor.return_value
+        counts_cursor.fetchall.return_value = [("mem", 2), ("emo", 1)]
+
+        results = self.repository.fuzzy_search("memo", 5)
+
+        self.assertEqual(self.cursor_mock.execute.call_count, 2)
+        substring_call, trigram_call = self.cursor_mock.execute.call_args_list
+        self.assertEqual(substring_call[0][1], ('"memo"', NOW, 50))
+        self.assertNotIn("rank", trigram_call[0][0])
+        self.assertIn("ORDER BY memos_title_trigrams.rowid LIMIT", trigram_call[0][0])
+        self.assertEqual(
+            trigram_call[0][1],
+            ('"emo" OR "mem"', NOW, FUZZY_SEARCH_MAX_CANDIDATES),
+        )
+        self.assertEqual(
+            results,
+            [(Memo(id=1, title="Memo"), 1.0), (Memo(id=2, title="Mema"), 0.5)],
+        )
+
+    def test_fuzzy_search_enough_substring_matches(self):
+        self.cursor_mock.fetchall.return_value = [
+            Memo(id=1, title="Memo list"),
+            Memo(id=2, title="Memo"),
+        ]
+
+        results = self.repository.fuzzy_search("memo", 2)
+
+        self.cursor_mock.execute.assert_called_once()
+        self.assertEqual([memo.id for memo, _ in results], [2, 1])
+
+    def test_fuzzy_search_short_query(self):
+        self.cursor_mock.fetchall.return_value = [Memo(id=1, title="Memo")]
+
+        results = self.repository.fuzzy_search("ME", 5)
+
+        sql, params = self.cursor_mock.execute.call_args[0]
+        self.assertIn("instr(lower(title), ?)", sql)
+        self.assertEqual(params, ("me", NOW, 5))
+        self.assertEqual(results, [(Memo(id=1, title="Memo"), 1.0)])
+
+    def test_fuzzy_search_empty_query(self):
+        self.assertEqual(self.repository.fuzzy_search("", 5), [])
+        self.cursor_mock.execute.assert_not_called()
+
+    def test_fuzzy_search_error(self):
+        original_exception = Exception("Database error")
+        self.cursor_mock.execute.side_effect = original_exception
+
+        with self.assertRaises(RepositoryError) as context:
+            self.repository.fuzzy_search("memo", 5)
+
+        self.assertEqual(str(context.exception), "Failed to search memos")
+        self.assertEqual(context.exception.original_exception, original_exception)
+
+    def test_fuzzy_search_follows_writes(self):
+        # the trigram table is kept in sync by triggers, so run them on a real database
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        connection.execute(
+            "CREATE TABLE memos (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "title TEXT NOT NULL, create_date TEXT NOT NULL, update_date TEXT NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO memos (title, create_date, update_date) "
+            "VALUES ('Old grocery list', '', '')"
+        )
+        repository.create_table_if_not_exists()
+        memo_id = repository.create(Memo(title="Team meeting"))
+
+        def search(query):
+            return [memo.id for memo, _ in repository.fuzzy_search(query, 10)]
+
+        self.assertEqual(search("grocery"), [1])
+        self.assertEqual(search("meetign"), [memo_id])
+
+        repository.update(Memo(id=memo_id, title="Team lunch"))
+        self.assertEqual(search("meeting"), [])
+        self.assertEqual(search("lunch"), [memo_id])
+
+        repository.delete(Memo(id=memo_id, title="Team lunch"))
+        self.assertEqual(search("lunch"), [])
+
+    def test_fuzzy_search_bounded_by_rare_trigrams(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        repository.create_table_if_not_exists()
+        repository.create_many(
+            [Memo(title=f"Project report {index}") for index in range(5000)]
+        )
+        memo_id = repository.create(Memo(title="Quarterly budget report"))
+
+        with patch(
+            "src.repository.title_search.rank_by_similarity", wraps=rank_by_similarity
+        ) as mock_rank:
+            start = time.perf_counter()
+            results = repository.fuzzy_search("report quartely budgte", 10)
+            seconds = time.perf_counter() - start
+
+        # the trigrams of "report", in every title, are left out of the lookup
+        self.assertEqual([memo.id for memo, _ in results], [memo_id])
+        self.assertEqual(len(mock_rank.call_args[0][1]), 1)
+        self.assertLess(seconds, 1.0)
+
+    def test_fuzzy_search_keeps_substring_matches(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        repository.create_table_if_not_exists()
+        repository.create_many(
+            [Memo(title=f"Budget plab {index}") for index in range(1500)]
+        )
+        memo_id = repository.create(Memo(title="Budget plan"))
+
+        results = repository.fuzzy_search("budget plan", 5)
+
+        # the exact match is past the capped fuzzy lookup, in rowid order
+        self.assertEqual(
+            [(memo.id, similarity) for memo, similarity in results[:2]],
+            [(memo_id, 1.0), (1, 0.8889)],
+        )
+        self.assertEqual([memo.id for memo, _ in results[2:]], [2, 3, 4])
+        self.assertEqual(results, repository.fuzzy_search("budget plan", 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from src.interaction import MemoNest, MemoryOutput
+from src.service.memo_admission import (
+    AdmissionErrorCode,
+    AdmissionLimiter,
+    AdmissionMemoNest,
+    AdmissionPolicy,
+    MemoAdmission,
+)
+
+
+class TestAdmissionErrorCode(unittest.TestCase):
+
+    def test_values(self):
+        self.assertEqual(AdmissionErrorCode.QUEUE_FULL.value, 200)
+        self.assertEqual(AdmissionErrorCode.QUEUE_TIMEOUT.value, 201)
+
+    def test_get_message(self):
+        self.assertEqual(AdmissionErrorCode.QUEUE_FULL.get_message(), "Queue full")
+
+
+class TestAdmissionLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = AdmissionLimiter(limit=1, max_queue=1)
+
+    def test_acquire_and_release(self):
+        self.assertIsNone(self.limiter.acquire(0))
+        self.assertEqual(self.limiter.active, 1)
+
+        self.limiter.release()
+
+        self.assertEqual(self.limiter.active, 0)
+        self.assertEqual(self.limiter.admitted_count, 1)
+
+    def test_queue_timeout(self):
+        self.limiter.acquire(0)
+
+        self.assertIs(self.limiter.acquire(0.01), AdmissionErrorCode.QUEUE_TIMEOUT)
+
+        self.assertEqual(self.limiter.waiting, 0)
+        self.assertEqual(self.limiter.max_waiting, 1)
+        self.assertEqual(self.limiter.timeout_count, 1)
+
+    def test_queue_full(self):
+        self.limiter.acquire(0)
+        results = []
+
+        thread = threading.Thread(
+            target=lambda: results.append(self.limiter.acquire(5))
+        )
+        thread.start()
+        while self.limiter.waiting == 0:
+            time.sleep(0.001)
+
+        self.assertIs(self.limiter.acquire(5), AdmissionErrorCode.QUEUE_FULL)
+        self.assertEqual(self.limiter.rejected_count, 1)
+
+        # the waiting caller takes the released slot
+        self.limiter.release()
+        thread.join()
+        self.assertEqual(results, [None])
+        self.assertEqual(self.limiter.active, 1)
+
+    def test_get_metrics(self):
+        self.limiter.acquire(0)
+        self.limiter.acquire(0)
+
+        self.assertEqual(
+            self.limiter.get_metrics(),
+            {
+                "limit": 1,
+                "active": 1,
+                "waiting": 0,
+                "max_waiting": 1,
+                "admitted": 1,
+                "rejected": 0,
+                "timed_out": 1,
+            },
+        )
+
+
+class TestMemoAdmission(unittest.TestCase):
+
+    def test_get_limiter(self):
+        admission = MemoAdmission(AdmissionPolicy(read_limit=4, write_limit=2))
+
+        self.assertIs(admission.get_limiter("create_memo"), admission.write_limiter)
+        self.assertIs(admission.get_limiter("get_memos"), admission.read_limiter)
+        self.assertEqual(admission.get_metrics()["read"]["limit"], 4)
+        self.assertEqual(admission.get_metrics()["write"]["limit"], 2)
+
+    def test_default_policy(self):
+        self.assertEqual(MemoAdmission().policy, AdmissionPolicy())
+
+
+class TestAdmissionMemoNest(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_nest = Mock(spec=MemoNest)
+        self.memo_nest.output_handler = MemoryOutput()
+        policy = AdmissionPolicy(write_limit=1, write_queue=0, timeout=0)
+        self.admission = MemoAdmission(policy)
+        self.admission_memo_nest = AdmissionMemoNest(self.memo_nest, self.admission)
+
+    def test_output_handler(self):
+        self.assertIs(
+            self.admission_memo_nest.output_handler, self.memo_nest.output_handler
+        )
+
+        output_handler = MemoryOutput()
+        self.admission_memo_nest.set_output(output_handler)
+
+        self.assertIs(self.admission_memo_nest.output_handler, output_handler)
+        self.memo_nest.set_output.assert_called_once_with(output_handler)
+
+    def test_use_cases(self):
+        data = {"id": 1}
+        self.admission_memo_nest.update_memo(data)
+        self.admission_memo_nest.get_memos()
+
+        self.memo_nest.update_memo.assert_called_once_with(data)
+        self.memo_nest.get_memos.assert_called_once_with()
+        self.assertEqual(self.admission.write_limiter.active, 0)
+        self.assertEqual(self.admission.read_limiter.active, 0)
+
+    def test_use_case_error_releases_slot(self):
+        self.memo_nest.delete_memo.side_effect = ValueError
+
+        with self.assertRaises(ValueError):
+            self.admission_memo_nest.delete_memo({"id": 1})
+
+        self.assertEqual(self.admission.write_limiter.active, 0)
+
+    def test_rejected(self):
+        self.admission.write_limiter.acquire(0)
+        output_handler = MemoryOutput()
+
+        with self.admission_memo_nest.output_to(output_handler):
+            self.admission_memo_nest.create_memo({"title": "Memo"})
+
+        self.memo_nest.create_memo.assert_not_called()
+        self.assertEqual(output_handler.error_code, 200)
+        self.assertEqual(output_handler.data, {"error": "Error code 200: Queue full"})
+
+        # reads have slots of their own
+        self.admission_memo_nest.get_memo({"id": 1})
+        self.memo_nest.get_memo.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
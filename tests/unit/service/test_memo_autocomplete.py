@@ -0,0 +1,183 @@
+import datetime
+import sqlite3
+import unittest
+from unittest.mock import Mock, patch
+
+from src.entity.memo import Memo, MemoChange, MemoChangeType
+from src.repository.memo_repository import MemoRepositoryInterface, SQLiteMemoRepository
+from src.service.memo_autocomplete import TitleIndex
+
+
+def create_change(seq, memo_id, title=None):
+    if title is None:
+        return MemoChange(seq, MemoChangeType.DELETE, memo_id)
+    return MemoChange(
+        seq, MemoChangeType.UPDATE, memo_id, Memo(id=memo_id, title=title)
+    )
+
+
+class TestTitleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_repo = Mock(spec=MemoRepositoryInterface)
+        self.memo_repo.get_last_change_seq.return_value = 3
+        self.memo_repo.get_all_fields.return_value = [
+            {"id": 1, "title": "Meeting notes", "expires_at": None},
+            {"id": 2, "title": "memo", "expires_at": None},
+            {"id": 3, "title": "Shopping", "expires_at": None},
+            {"id": 4, "title": "memo", "expires_at": None},
+        ]
+        self.memo_repo.changes_since.return_value = []
+        self.index = TitleIndex(sync_interval=0)
+
+    def test_suggest(self):
+        self.assertEqual(
+            self.index.suggest(self.memo_repo, "ME", 10), ["Meeting notes", "memo"]
+        )
+        self.assertEqual(
+            self.index.suggest(self.memo_repo, "meeting", 10), ["Meeting notes"]
+        )
+        self.assertEqual(self.index.suggest(self.memo_repo, "x", 10), [])
+
+    def test_suggest_limit(self):
+        self.assertEqual(
+            self.index.suggest(self.memo_repo, "", 2), ["Meeting notes", "memo"]
+        )
+
+    def test_build_once(self):
+        self.index.suggest(self.memo_repo, "m", 10)
+        self.index.suggest(self.memo_repo, "m", 10)
+
+        self.memo_repo.get_all_fields.assert_called_once_with(
+            ("id", "title", "expires_at")
+        )
+        self.memo_repo.changes_since.assert_called_with(3, 1000)
+
+    @patch("src.service.memo_autocomplete.time.monotonic")
+    def test_suggest_syncs_on_interval(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        self.index.sync_interval = 1.0
+        self.index.suggest(self.memo_repo, "m", 10)
+        self.memo_repo.changes_since.return_value = [create_change(4, 5, "Menu")]
+
+        mock_monotonic.return_value = 100.5
+        self.assertEqual(self.index.suggest(self.memo_repo, "men", 10), [])
+        self.memo_repo.changes_since.assert_called_once()
+
+        mock_monotonic.return_value = 101.0
+        self.assertEqual(self.index.suggest(self.memo_repo, "men", 10), ["Menu"])
+        self.assertEqual(self.memo_repo.changes_since.call_count, 2)
+
+    def test_sync_ignores_interval(self):
+        self.index.sync_interval = 60.0
+        self.index.suggest(self.memo_repo, "m", 10)
+        self.memo_repo.changes_since.return_value = [create_change(4, 5, "Menu")]
+
+        self.index.sync(self.memo_repo)
+
+        self.assertEqual(self.index.suggest(self.memo_repo, "men", 10), ["Menu"])
+
+    def test_sync_applies_changes(self):
+        self.index.sync(self.memo_repo)
+        self.memo_repo.changes_since.return_value = [
+            create_change(4, 2, "Memo 2"),
+            create_change(5, 1),
+            create_change(6, 5, "Menu"),
+        ]
+
+        titles = self.index.suggest(self.memo_repo, "me", 10)
+
+        self.assertEqual(titles, ["memo", "Memo 2", "Menu"])
+        self.assertEqual(self.index.last_seq, 6)
+
+    def test_sync_keeps_title_of_other_memos(self):
+        self.index.sync(self.memo_repo)
+        self.memo_repo.changes_since.return_value = [create_change(4, 2)]
+
+        self.assertEqual(self.index.suggest(self.memo_repo, "memo", 10), ["memo"])
+
+        self.memo_repo.changes_since.return_value = [create_change(5, 4)]
+
+        self.assertEqual(self.index.suggest(self.memo_repo, "memo", 10), [])
+
+    def test_sync_rebuilds_after_reset(self):
+        self.index.sync(self.memo_repo)
+        self.memo_repo.get_last_change_seq.return_value = 8
+        self.memo_repo.get_all_fields.return_value = [
+            {"id": 9, "title": "Restored", "expires_at": None}
+        ]
+        self.memo_repo.changes_since.side_effect = [
+            [create_change(4, 5, "a"), MemoChange(5, MemoChangeType.RESET, 0)],
+            [],
+        ]
+
+        self.assertEqual(self.index.suggest(self.memo_repo, "", 10), ["Restored"])
+        self.memo_repo.changes_since.assert_called_with(8, 1000)
+
+    @patch("src.service.memo_autocomplete.CHANGE_BATCH_SIZE", 2)
+    def test_sync_reads_changes_in_batches(self):
+        self.index.sync(self.memo_repo)
+        self.memo_repo.changes_since.side_effect = [
+            [create_change(4, 5, "a"), create_change(5, 6, "b")],
+            [create_change(6, 7, "c")],
+        ]
+
+        self.assertEqual(
+            self.index.suggest(self.memo_repo, "", 10)[:3], ["a", "b", "c"]
+        )
+
+        self.memo_repo.changes_since.assert_called_with(5, 2)
+        self.assertEqual(self.index.last_seq, 6)
+
+    @patch("src.service.memo_autocomplete.get_now")
+    def test_suggest_skips_expired_titles(self, mock_get_now):
+        mock_get_now.return_value = "2024-06-01T12:00:00"
+        memos = self.memo_repo.get_all_fields.return_value
+        memos[0]["expires_at"] = "2024-06-01"
+        memos[3]["expires_at"] = "2024-06-01T13:00:00"
+
+        self.assertEqual(self.index.suggest(self.memo_repo, "me", 1), ["memo"])
+
+        mock_get_now.return_value = "2024-06-01T14:00:00"
+
+        # memo 2 of the same title never expires
+        self.assertEqual(self.index.suggest(self.memo_repo, "me", 10), ["memo"])
+
+        self.memo_repo.changes_since.return_value = [create_change(4, 2)]
+
+        self.assertEqual(self.index.suggest(self.memo_repo, "me", 10), [])
+
+    def test_suggest_follows_writes(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        memo_repo = SQLiteMemoRepository(connection)
+        memo_repo.create_table_if_not_exists()
+        memo_id = memo_repo.create(Memo(title="Team meeting"))
+        self.assertEqual(self.index.suggest(memo_repo, "team", 10), ["Team meeting"])
+
+        memo_repo.update(Memo(id=memo_id, title="Team lunch"))
+        memo_repo.create(Memo(title="Teapot"))
+
+        self.assertEqual(
+            self.index.suggest(memo_repo, "tea", 10), ["Team lunch", "Teapot"]
+        )
+
+    def test_suggest_follows_expiry(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        memo_repo = SQLiteMemoRepository(connection)
+        memo_repo.create_table_if_not_exists()
+        expires_at = datetime.datetime.now() + datetime.timedelta(hours=1)
+        memo_repo.create(Memo(title="Groceries today", expires_at=expires_at))
+        self.assertEqual(self.index.suggest(memo_repo, "gro", 10), ["Groceries today"])
+
+        with patch("src.service.memo_autocomplete.get_now") as mock_get_now:
+            mock_get_now.return_value = (
+                expires_at + datetime.timedelta(seconds=1)
+            ).isoformat()
+
+            self.assertEqual(self.index.suggest(memo_repo, "gro", 10), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from types import SimpleNamespace
+
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.service.memo_background import BackgroundTask
+
+
+class CountingTask(BackgroundTask):
+
+    def __init__(self, results):
+        super().__init__(SimpleNamespace(interval=0))
+        self.results = list(results)
+        self.ticks = 0
+
+    def run_tick(self):
+        self.ticks += 1
+        result = self.results.pop(0)
+        if not self.results:
+            self.stop()
+        if isinstance(result, Exception):
+            raise result
+
+
+class TestBackgroundTask(unittest.TestCase):
+
+    def test_run_forever(self):
+        error_code = RepositoryErrorCode.FAILED_TO_MAINTAIN
+        error = RepositoryError(error_code, error_code.get_message(), None)
+        task = CountingTask([None, error, None])
+
+        task.run_forever()
+
+        self.assertEqual(task.ticks, 3)
+        self.assertEqual(task.error_count, 1)
+
+    def test_start_and_stop(self):
+        task = CountingTask([None] * 1000)
+        task.policy = SimpleNamespace(interval=0.001)
+
+        task.start()
+        task.start()
+        thread = task._thread  # pylint: disable=protected-access
+        task.stop()
+
+        self.assertEqual(thread.name, "memo-background")
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(task._thread)  # pylint: disable=protected-access
+
+
+if __name__ == "__main__":
+    unittest.main()
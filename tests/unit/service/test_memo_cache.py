@@ -0,0 +1,49 @@
+import unittest
+
+from src.service.memo_cache import MemoListCache
+
+
+class TestMemoListCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MemoListCache()
+        self.memos = [{"id": 1, "title": "Memo"}]
+
+    def test_get_empty(self):
+        self.assertIsNone(self.cache.get("1"))
+
+    def test_set_and_get(self):
+        self.cache.set("1", self.memos)
+
+        self.assertIs(self.cache.get("1"), self.memos)
+
+    def test_get_other_validator(self):
+        self.cache.set("1", self.memos)
+
+        self.assertIsNone(self.cache.get("2"))
+
+    def test_set_and_get_fields(self):
+        titles = [{"title": "Memo"}]
+        self.cache.set("1", self.memos)
+        self.cache.set("1", titles, ("title",))
+
+        self.assertIs(self.cache.get("1"), self.memos)
+        self.assertIs(self.cache.get("1", ("title",)), titles)
+        self.assertIsNone(self.cache.get("1", ("id",)))
+
+    def test_set_other_validator_drops_fields(self):
+        self.cache.set("1", self.memos, ("id", "title"))
+        self.cache.set("2", self.memos)
+
+        self.assertIsNone(self.cache.get("2", ("id", "title")))
+
+    def test_invalidate(self):
+        self.cache.set("1", self.memos)
+
+        self.cache.invalidate()
+
+        self.assertIsNone(self.cache.get("1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
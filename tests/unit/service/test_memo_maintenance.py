@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.memo_database import SQLiteMemoDatabase
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.service.memo_maintenance import (
+    MaintenancePolicy,
+    MaintenanceReport,
+    MemoMaintenance,
+)
+
+
+class TestMemoMaintenance(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_repo = Mock(spec=SQLiteMemoRepository)
+        self.memo_repo.get_last_change_seq.return_value = 250
+        self.database = Mock(spec=SQLiteMemoDatabase)
+        self.database.incremental_vacuum.return_value = 12
+        self.database.checkpoint.return_value = (30, 30)
+        self.database.prune_changes.return_value = 150
+        self.policy = MaintenancePolicy(
+            interval=0, vacuum_pages=100, wal_truncate_pages=50, change_log_size=100
+        )
+        self.maintenance = MemoMaintenance(self.memo_repo, self.database, self.policy)
+
+    def test_run_once(self):
+        report = self.maintenance.run_once()
+
+        self.database.optimize.assert_called_once()
+        self.database.prune_changes.assert_called_once_with(151)
+        self.database.incremental_vacuum.assert_called_once_with(100)
+        self.database.checkpoint.assert_called_once_with("PASSIVE")
+        self.assertEqual(report.vacuumed_pages, 12)
+        self.assertEqual(report.wal_pages, 30)
+        self.assertEqual(report.checkpointed_pages, 30)
+        self.assertEqual(report.pruned_changes, 150)
+        self.assertEqual(
+            set(report.durations),
+            {"optimize", "prune_changes", "incremental_vacuum", "checkpoint"},
+        )
+        self.assertIs(self.maintenance.last_report, report)
+        self.assertEqual(self.maintenance.run_count, 1)
+
+    def test_run_once_truncates_large_wal(self):
+        self.database.checkpoint.side_effect = [(80, 80), (0, 0)]
+
+        report = self.maintenance.run_once()
+
+        self.database.checkpoint.assert_called_with("TRUNCATE")
+        self.assertEqual(report.wal_pages, 0)
+
+    def test_run_once_error(self):
+        error_code = RepositoryErrorCode.FAILED_TO_MAINTAIN
+        self.database.optimize.side_effect = RepositoryError(
+            error_code, error_code.get_message(), None
+        )
+
+        with self.assertRaises(RepositoryError):
+            self.maintenance.run_once()
+
+        self.assertEqual(self.maintenance.run_count, 0)
+
+    def run_ticks(self, counters):
+        """Run the maintenance loop for one tick per change counter, or error to raise."""
+
+        ticks = list(counters)
+
+        def get_change_counter():
+            tick = ticks.pop(0)
+            if not ticks:
+                self.maintenance.stop()
+            if isinstance(tick, Exception):
+                raise tick
+            return tick
+
+        self.memo_repo.get_change_counter.side_effect = get_change_counter
+        self.maintenance.run_forever()
+
+    def test_run_forever_in_idle_windows(self):
+        self.run_ticks([1, 2, 2, 2, 3, 3])
+
+        self.assertEqual(self.maintenance.run_count, 2)
+
+    @patch("src.service.memo_maintenance.time.monotonic")
+    def test_run_forever_when_overdue(self, mock_monotonic):
+        mock_monotonic.side_effect = range(0, 1000, 10)
+        self.maintenance.policy = MaintenancePolicy(interval=0, max_interval=15)
+
+        self.run_ticks([1, 2, 3])
+
+        # not idle at any tick, but overdue at the second one
+        self.assertEqual(self.maintenance.run_count, 1)
+
+    def test_run_forever_error(self):
+        error_code = RepositoryErrorCode.FAILED_TO_GET_CHANGE_COUNTER
+        error = RepositoryError(error_code, error_code.get_message(), None)
+
+        self.run_ticks([1, error, 1])
+
+        self.assertEqual(self.maintenance.error_count, 1)
+        self.assertEqual(self.maintenance.run_count, 1)
+
+    def test_start_and_stop(self):
+        self.memo_repo.get_change_counter.return_value = 1
+        self.maintenance.policy = MaintenancePolicy(interval=0.001)
+
+        self.maintenance.start()
+        self.maintenance.stop()
+
+        self.assertIsNone(self.maintenance._thread)  # pylint: disable=protected-access
+
+
+class TestMaintenanceReport(unittest.TestCase):
+
+    def test_default_policy(self):
+        maintenance = MemoMaintenance(
+            Mock(spec=SQLiteMemoRepository), Mock(spec=SQLiteMemoDatabase)
+        )
+
+        self.assertEqual(maintenance.policy, MaintenancePolicy())
+
+    def test_to_dict(self):
+        report = MaintenanceReport({"optimize": 0.5}, 1, 2, 3, 4)
+
+        self.assertEqual(
+            report.to_dict(),
+            {
+                "durations": {"optimize": 0.5},
+                "vacuumed_pages": 1,
+                "wal_pages": 2,
+                "checkpointed_pages": 3,
+                "pruned_changes": 4,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+from concurrent.futures import Executor, Future
+from unittest.mock import Mock
+
+from src.interaction import MemoNest, MemoryOutput
+from src.service.memo_process_pool import (
+    WORKER_STATE,
+    ProcessPoolMemoNest,
+    RecordingOutput,
+    init_worker,
+    run_use_case,
+)
+
+
+def submit_inline(fn, *args):
+    future = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+class TestRecordingOutput(unittest.TestCase):
+
+    def test_events(self):
+        output_handler = RecordingOutput()
+
+        output_handler.validator_output("1")
+        output_handler.output({"memo": {"id": 1}})
+        output_handler.not_modified_output("1")
+        output_handler.error_output(101, "Error")
+
+        self.assertEqual(
+            output_handler.events,
+            [
+                ("validator", ("1",)),
+                ("output", ({"memo": {"id": 1}},)),
+                ("not_modified", ("1",)),
+                ("error", (101, "Error")),
+            ],
+        )
+
+
+class TestWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_nest = Mock(spec=MemoNest)
+        init_worker(lambda: self.memo_nest)
+
+    def tearDown(self):
+        WORKER_STATE.memo_nest = None
+
+    def test_run_use_case(self):
+        def get_memo(data):
+            output_handler = self.memo_nest.set_output.call_args[0][0]
+            output_handler.output({"memo": {"id": data["id"]}})
+
+        self.memo_nest.get_memo.side_effect = get_memo
+
+        events = run_use_case("get_memo", {"id": 1})
+
+        self.assertEqual(events, (("output", ({"memo": {"id": 1}},)),))
+
+    def test_run_use_case_without_data(self):
+        run_use_case("get_memos", None)
+
+        self.memo_nest.get_memos.assert_called_once_with()
+
+
+class TestProcessPoolMemoNest(unittest.TestCase):
+
+    def setUp(self):
+        self.worker_memo_nest = Mock(spec=MemoNest)
+        init_worker(lambda: self.worker_memo_nest)
+        executor = Mock(spec=Executor)
+        executor.submit.side_effect = submit_inline
+        self.memo_nest = ProcessPoolMemoNest(executor)
+        self.output_handler = MemoryOutput()
+        self.memo_nest.set_output(self.output_handler)
+
+    def tearDown(self):
+        WORKER_STATE.memo_nest = None
+
+    def test_replay_output(self):
+        def update_memo(_data):
+            output_handler = self.worker_memo_nest.set_output.call_args[0][0]
+            output_handler.validator_output("2")
+            output_handler.output({"memo": {"id": 1}})
+
+        self.worker_memo_nest.update_memo.side_effect = update_memo
+
+        self.memo_nest.update_memo({"id": 1, "title": "Memo"})
+
+        self.assertEqual(self.output_handler.validator, "2")
+        self.assertEqual(self.output_handler.data, {"memo": {"id": 1}})
+
+    def test_replay_error(self):
+        def delete_memo(_data):
+            output_handler = self.worker_memo_nest.set_output.call_args[0][0]
+            output_handler.error_output(104, "Failed to delete memo")
+
+        self.worker_memo_nest.delete_memo.side_effect = delete_memo
+
+        self.memo_nest.delete_memo({"id": 1})
+
+        self.assertEqual(self.output_handler.error_code, 104)
+
+    def test_use_cases(self):
+        self.memo_nest.create_memo({"title": "Memo"})
+        self.memo_nest.get_memo({"id": 1})
+        self.memo_nest.get_memos()
+        self.memo_nest.get_changes({"seq": 0, "limit": 10})
+        self.memo_nest.count_memos()
+        self.memo_nest.count_memos_by_date({"bucket": "month"})
+        self.memo_nest.get_memo_date_range()
+        self.memo_nest.search_memos({"query": "memo"})
+        self.memo_nest.suggest_titles({"prefix": "me"})
+
+        self.worker_memo_nest.create_memo.assert_called_once_with({"title": "Memo"})
+        self.worker_memo_nest.get_memo.assert_called_once_with({"id": 1})
+        self.worker_memo_nest.get_memos.assert_called_once_with()
+        self.worker_memo_nest.get_changes.assert_called_once_with(
+            {"seq": 0, "limit": 10}
+        )
+        self.worker_memo_nest.count_memos.assert_called_once_with()
+        self.worker_memo_nest.count_memos_by_date.assert_called_once_with(
+            {"bucket": "month"}
+        )
+        self.worker_memo_nest.get_memo_date_range.assert_called_once_with()
+        self.worker_memo_nest.search_memos.assert_called_once_with({"query": "memo"})
+        self.worker_memo_nest.suggest_titles.assert_called_once_with({"prefix": "me"})
+
+
+if __name__ == "__main__":
+    unittest.main()
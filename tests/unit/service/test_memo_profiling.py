@@ -0,0 +1,163 @@
+import os
+import pstats
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import Mock, patch
+
+from src.interaction import MemoNest, MemoryOutput
+from src.service.memo_profiling import (
+    MemoProfiler,
+    ProfilePolicy,
+    ProfileStore,
+    ProfilingMemoNest,
+)
+
+
+class TestProfileStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = ProfileStore(self.directory, max_captures=2)
+
+    def test_save(self):
+        metadata = self.store.save("get_memo", 0.5, None, None)
+
+        self.assertEqual(metadata["use_case"], "get_memo")
+        self.assertEqual(metadata["seconds"], 0.5)
+        self.assertEqual(metadata["files"], [])
+        self.assertEqual(self.store.list_captures(), [metadata])
+
+    def test_save_prunes_oldest(self):
+        for use_case in ("create_memo", "get_memo", "get_memos"):
+            self.store.save(use_case, 0.1, None, None)
+
+        captures = self.store.list_captures()
+
+        self.assertEqual(
+            [capture["use_case"] for capture in captures], ["get_memos", "get_memo"]
+        )
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+
+class TestMemoProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = ProfileStore(self.directory)
+        self.function = Mock(return_value="output")
+
+    def test_call_not_sampled(self):
+        profiler = MemoProfiler(self.store, ProfilePolicy(sample_rate=0.0))
+
+        self.assertEqual(profiler.call("get_memo", self.function, 1), "output")
+
+        self.function.assert_called_once_with(1)
+        self.assertEqual(profiler.capture_count, 0)
+        self.assertEqual(self.store.list_captures(), [])
+
+    def test_call_sampled(self):
+        profiler = MemoProfiler(self.store, ProfilePolicy(sample_rate=1.0))
+
+        self.assertEqual(profiler.call("get_memo", self.function, 1), "output")
+
+        self.function.assert_called_once_with(1)
+        self.assertEqual(profiler.capture_count, 1)
+        captures = self.store.list_captures()
+        self.assertEqual(len(captures), 1)
+        capture = captures[0]
+        self.assertEqual(capture["use_case"], "get_memo")
+        self.assertEqual(capture["files"], [f"{capture['id']}.prof"])
+        pstats.Stats(os.path.join(self.directory, capture["files"][0]))
+
+    def test_call_triggered_with_memory(self):
+        policy = ProfilePolicy(cpu=False, memory=True)
+        profiler = MemoProfiler(self.store, policy, trigger=lambda: True)
+
+        profiler.call("get_memos", self.function)
+
+        captures = self.store.list_captures()
+        self.assertEqual(len(captures), 1)
+        capture = captures[0]
+        self.assertEqual(capture["files"], [f"{capture['id']}.tracemalloc"])
+        tracemalloc.Snapshot.load(os.path.join(self.directory, capture["files"][0]))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_call_during_capture(self):
+        profiler = MemoProfiler(self.store, ProfilePolicy(sample_rate=1.0))
+        self.function.side_effect = lambda: profiler.call("get_memo", Mock())
+
+        profiler.call("get_memos", self.function)
+
+        self.assertEqual(profiler.capture_count, 1)
+        self.assertEqual(self.store.list_captures()[0]["use_case"], "get_memos")
+
+    def test_call_error(self):
+        profiler = MemoProfiler(self.store, ProfilePolicy(sample_rate=1.0))
+        self.function.side_effect = RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            profiler.call("get_memo", self.function, 1)
+
+        self.assertEqual(profiler.capture_count, 1)
+
+    @patch.object(ProfileStore, "save", side_effect=OSError)
+    def test_call_save_error(self, _):
+        profiler = MemoProfiler(self.store, ProfilePolicy(sample_rate=1.0))
+
+        self.assertEqual(profiler.call("get_memo", self.function, 1), "output")
+
+        self.assertEqual(profiler.error_count, 1)
+
+
+class TestProfilingMemoNest(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_nest = Mock(spec=MemoNest)
+        self.memo_nest.output_handler = MemoryOutput()
+        self.profiler = Mock(spec=MemoProfiler)
+        self.profiling_memo_nest = ProfilingMemoNest(self.memo_nest, self.profiler)
+
+    def test_output_handler(self):
+        self.assertIs(
+            self.profiling_memo_nest.output_handler, self.memo_nest.output_handler
+        )
+
+        output_handler = MemoryOutput()
+        self.profiling_memo_nest.set_output(output_handler)
+
+        self.assertIs(self.profiling_memo_nest.output_handler, output_handler)
+        self.memo_nest.set_output.assert_called_once_with(output_handler)
+
+    def test_use_cases(self):
+        data = {"id": 1}
+        for use_case in (
+            "create_memo",
+            "get_memo",
+            "update_memo",
+            "delete_memo",
+            "get_changes",
+            "count_memos_by_date",
+            "search_memos",
+            "suggest_titles",
+        ):
+            getattr(self.profiling_memo_nest, use_case)(data)
+
+            self.profiler.call.assert_called_with(
+                use_case, getattr(self.memo_nest, use_case), data
+            )
+
+    def test_use_cases_without_data(self):
+        for use_case in ("get_memos", "count_memos", "get_memo_date_range"):
+            getattr(self.profiling_memo_nest, use_case)()
+
+            self.profiler.call.assert_called_with(
+                use_case, getattr(self.memo_nest, use_case)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
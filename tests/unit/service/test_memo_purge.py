@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import Mock
+
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.memo_repository import SQLiteMemoRepository
+from src.service.memo_purge import MemoPurger, PurgePolicy, PurgeReport
+
+
+class TestMemoPurger(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_repo = Mock(spec=SQLiteMemoRepository)
+        self.memo_repo.purge_idempotency_keys.return_value = 0
+        self.policy = PurgePolicy(interval=0, batch_size=10, max_batches=3, pause=0)
+        self.purger = MemoPurger(self.memo_repo, self.policy)
+
+    def test_run_once(self):
+        self.memo_repo.purge_expired.side_effect = [10, 4]
+
+        report = self.purger.run_once()
+
+        self.memo_repo.purge_expired.assert_called_with(10)
+        self.assertEqual(report.deleted, 14)
+        self.assertEqual(report.deleted_keys, 0)
+        self.assertEqual(report.batches, 2)
+        # no key was left after the first batch
+        self.memo_repo.purge_idempotency_keys.assert_called_once_with(10)
+        self.assertIs(self.purger.last_report, report)
+        self.assertEqual(self.purger.run_count, 1)
+
+    def test_run_once_max_batches(self):
+        self.memo_repo.purge_expired.return_value = 10
+
+        report = self.purger.run_once()
+
+        self.assertEqual(self.memo_repo.purge_expired.call_count, 3)
+        self.assertEqual(report.deleted, 30)
+
+    def test_run_once_idempotency_keys(self):
+        self.memo_repo.purge_expired.return_value = 0
+        self.memo_repo.purge_idempotency_keys.side_effect = [10, 10, 2]
+
+        report = self.purger.run_once()
+
+        self.memo_repo.purge_expired.assert_called_once_with(10)
+        self.assertEqual(report.deleted_keys, 22)
+        self.assertEqual(report.batches, 3)
+
+    def test_run_once_nothing_expired(self):
+        self.memo_repo.purge_expired.return_value = 0
+
+        report = self.purger.run_once()
+
+        self.assertEqual(report.deleted, 0)
+        self.assertEqual(report.batches, 1)
+
+    def test_run_once_error(self):
+        error_code = RepositoryErrorCode.FAILED_TO_PURGE_MEMOS
+        self.memo_repo.purge_expired.side_effect = RepositoryError(
+            error_code, error_code.get_message(), None
+        )
+
+        with self.assertRaises(RepositoryError):
+            self.purger.run_once()
+
+        self.assertEqual(self.purger.run_count, 0)
+
+    def test_run_forever_error(self):
+        error_code = RepositoryErrorCode.FAILED_TO_PURGE_MEMOS
+        error = RepositoryError(error_code, error_code.get_message(), None)
+        results = [error, 0]
+
+        def purge_expired(_limit):
+            result = results.pop(0)
+            if not results:
+                self.purger.stop()
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        self.memo_repo.purge_expired.side_effect = purge_expired
+        self.purger.run_forever()
+
+        self.assertEqual(self.purger.error_count, 1)
+        self.assertEqual(self.purger.run_count, 1)
+
+    def test_start_and_stop(self):
+        self.memo_repo.purge_expired.return_value = 0
+        self.purger.policy = PurgePolicy(interval=0.001)
+
+        self.purger.start()
+        self.purger.stop()
+
+        self.assertIsNone(self.purger._thread)  # pylint: disable=protected-access
+
+
+class TestPurgeReport(unittest.TestCase):
+
+    def test_default_policy(self):
+        purger = MemoPurger(Mock(spec=SQLiteMemoRepository))
+
+        self.assertEqual(purger.policy, PurgePolicy())
+
+    def test_to_dict(self):
+        report = PurgeReport(5, 2, 1, 0.5)
+
+        self.assertEqual(
+            report.to_dict(),
+            {"deleted": 5, "deleted_keys": 2, "batches": 1, "duration": 0.5},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
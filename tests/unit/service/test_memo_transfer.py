@@ -0,0 +1,317 @@
+import datetime
+import io
+import sqlite3
+import unittest
+from unittest.mock import Mock
+
+from src.entity.memo import Memo
+from src.formatter.common import FormatterErrorCode
+from src.repository.common import RepositoryError, RepositoryErrorCode
+from src.repository.import_checkpoint import ImportPosition, SQLiteImportCheckpoint
+from src.repository.memo_repository import MemoRepositoryInterface, SQLiteMemoRepository
+from src.service.memo_transfer import (
+    MalformedRecord,
+    MemoTransfer,
+    TransferReport,
+    batched,
+    csv_writer,
+    ndjson_writer,
+    read_csv,
+    read_ndjson,
+)
+
+
+class TestFileFormats(unittest.TestCase):
+
+    def setUp(self):
+        self.memos = [
+            {
+                "id": 1,
+                "title": "Memo, 1",
+                "create_date": datetime.datetime(2024, 1, 1, 12, 0),
+                "update_date": datetime.datetime(2024, 1, 2, 12, 0),
+                "version": 1,
+            }
+        ]
+
+    def test_read_ndjson(self):
+        file = io.StringIO('{"title": "Memo 1"}\n\n{"title": "Memo 2"}\n')
+
+        self.assertEqual(
+            list(read_ndjson(file)), [{"title": "Memo 1"}, {"title": "Memo 2"}]
+        )
+
+    def test_read_ndjson_malformed_lines(self):
+        file = io.StringIO(
+            '{"title": "Memo 1"}\n{"title": \n[1]\n{"title": "Memo 2"}\n'
+        )
+
+        records = list(read_ndjson(file))
+
+        self.assertEqual(records[0], {"title": "Memo 1"})
+        self.assertIsInstance(records[1], MalformedRecord)
+        self.assertIn("Malformed JSON line", records[1].error)
+        self.assertEqual(
+            records[2], MalformedRecord("Malformed JSON line: not an object")
+        )
+        self.assertEqual(records[3], {"title": "Memo 2"})
+
+    def test_read_csv(self):
+        file = io.StringIO("title\nMemo 1\n")
+
+        self.assertEqual(list(read_csv(file)), [{"title": "Memo 1"}])
+
+    def test_read_csv_empty_optional_cells(self):
+        file = io.StringIO("title,ttl,expires_at\n,,\nMemo,60,2024-01-01T12:00:00\n")
+
+        self.assertEqual(
+            list(read_csv(file)),
+            [
+                {"title": ""},
+                {"title": "Memo", "ttl": "60", "expires_at": "2024-01-01T12:00:00"},
+            ],
+        )
+
+    def test_ndjson_round_trip(self):
+        file = io.StringIO()
+
+        ndjson_writer(file)(self.memos)
+
+        file.seek(0)
+        record = list(read_ndjson(file))[0]
+        self.assertEqual(record["title"], "Memo, 1")
+        self.assertEqual(record["create_date"], "2024-01-01T12:00:00")
+
+    def test_csv_round_trip(self):
+        file = io.StringIO()
+
+        csv_writer(file)(self.memos)
+
+        file.seek(0)
+        record = list(read_csv(file))[0]
+        self.assertEqual(record["title"], "Memo, 1")
+        self.assertEqual(record["update_date"], "2024-01-02T12:00:00")
+
+
+class TestTransferReport(unittest.TestCase):
+
+    def test_to_dict(self):
+        report = TransferReport(processed=10, written=9, seconds=2.0, rejected={3: ""})
+
+        self.assertEqual(report.throughput, 5.0)
+        self.assertEqual(
+            report.to_dict(),
+            {
+                "processed": 10,
+                "written": 9,
+                "rejected": 1,
+                "resumed_from": 0,
+                "seconds": 2.0,
+                "records_per_second": 5,
+            },
+        )
+
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+class TestMemoTransferImport(unittest.TestCase):
+
+    def setUp(self):
+        self.memo_repo = Mock(spec=MemoRepositoryInterface)
+        self.memo_repo.create_many.side_effect = lambda memos, _position: len(memos)
+        self.checkpoint = Mock(spec=SQLiteImportCheckpoint)
+        self.checkpoint.load.return_value = 0
+        self.checkpoint.at.side_effect = lambda position: ImportPosition("s", position)
+
+    def test_import_memos(self):
+        records = [{"title": "Memo 1"}, {}, {"title": "Memo 3"}]
+        transfer = MemoTransfer(self.memo_repo, 2)
+
+        report = transfer.import_memos(records, self.checkpoint)
+
+        self.assertEqual(
+            [call[0] for call in self.memo_repo.create_many.call_args_list],
+            [
+                ([Memo(title="Memo 1")], ImportPosition("s", 2)),
+                ([Memo(title="Memo 3")], ImportPosition("s", 3)),
+            ],
+        )
+        self.assertEqual(report.processed, 3)
+        self.assertEqual(report.written, 2)
+        self.assertEqual(list(report.rejected), [1])
+        self.assertIn(
+            FormatterErrorCode.MISSING_REQUIRED_FIELD.get_message(),
+            report.rejected[1],
+        )
+
+    def test_import_memos_ttl(self):
+        MemoTransfer(self.memo_repo).import_memos([{"title": "Memo", "ttl": "60"}])
+
+        memo = self.memo_repo.create_many.call_args[0][0][0]
+        self.assertIsNotNone(memo.expires_at)
+
+    def test_import_memos_ttl_too_long(self):
+        records = [{"title": "Memo", "ttl": str(10**12)}, {"title": "Memo", "ttl": 60}]
+
+        report = MemoTransfer(self.memo_repo).import_memos(records)
+
+        self.assertEqual(report.written, 1)
+        self.assertIn(
+            FormatterErrorCode.INVALID_FIELD_VALUE.get_message(), report.rejected[0]
+        )
+
+    def test_import_memos_expires_at(self):
+        expires_at = datetime.datetime(2100, 1, 1, 12, 0)
+        records = [
+            {"title": "Memo 1", "expires_at": expires_at.isoformat()},
+            {"title": "Memo 2", "expires_at": expires_at.isoformat(), "ttl": 60},
+            {"title": "Memo 3", "expires_at": "soon"},
+        ]
+
+        report = MemoTransfer(self.memo_repo).import_memos(records)
+
+        memos = self.memo_repo.create_many.call_args[0][0]
+        self.assertEqual(memos[0].expires_at, expires_at)
+        # a ttl given with the record takes precedence
+        self.assertLess(memos[1].expires_at, expires_at)
+        self.assertEqual(list(report.rejected), [2])
+
+    def test_import_memos_malformed_record(self):
+        records = [
+            {"title": "Memo 1"},
+            MalformedRecord("Malformed"),
+            {},
+            {"title": "M"},
+        ]
+
+        report = MemoTransfer(self.memo_repo, 3).import_memos(records, self.checkpoint)
+
+        self.assertEqual(
+            [call[0] for call in self.memo_repo.create_many.call_args_list],
+            [
+                ([Memo(title="Memo 1")], ImportPosition("s", 3)),
+                ([Memo(title="M")], ImportPosition("s", 4)),
+            ],
+        )
+        self.assertEqual(report.rejected[1], "Malformed")
+        self.assertIn(
+            FormatterErrorCode.MISSING_REQUIRED_FIELD.get_message(),
+            report.rejected[2],
+        )
+        self.assertEqual(report.written, 2)
+
+    def test_import_malformed_file_resumes_past_line(self):
+        file = io.StringIO('{"title": "Memo 1"}\n{"title": \n{"title": "Memo 2"}\n')
+        self.memo_repo.create_many.side_effect = [
+            1,
+            RepositoryError(RepositoryErrorCode.FAILED_TO_CREATE_MEMOS, "", None),
+        ]
+        transfer = MemoTransfer(self.memo_repo, 2)
+
+        with self.assertRaises(RepositoryError):
+            transfer.import_memos(read_ndjson(file), self.checkpoint)
+
+        # the batch with the malformed line was committed, so a resume goes past it
+        self.assertEqual(
+            self.memo_repo.create_many.call_args_list[0][0][1], ImportPosition("s", 2)
+        )
+        self.checkpoint.load.return_value = 2
+        self.memo_repo.create_many.side_effect = lambda memos, _position: len(memos)
+        file.seek(0)
+
+        report = transfer.import_memos(read_ndjson(file), self.checkpoint)
+
+        self.assertEqual(report.written, 1)
+        self.assertEqual(report.processed, 1)
+
+    def test_import_memos_resume(self):
+        self.checkpoint.load.return_value = 2
+        records = [{"title": "Memo 1"}, {"title": "Memo 2"}, {"title": "Memo 3"}]
+
+        transfer = MemoTransfer(self.memo_repo, 2)
+
+        report = transfer.import_memos(records, self.checkpoint)
+
+        self.memo_repo.create_many.assert_called_once_with(
+            [Memo(title="Memo 3")], ImportPosition("s", 3)
+        )
+        self.assertEqual(report.resumed_from, 2)
+        self.assertEqual(report.processed, 1)
+
+    def test_import_memos_error(self):
+        error_code = RepositoryErrorCode.FAILED_TO_CREATE_MEMOS
+        self.memo_repo.create_many.side_effect = [
+            1,
+            RepositoryError(error_code, error_code.get_message(), None),
+        ]
+        records = [{"title": "Memo 1"}, {"title": "Memo 2"}]
+
+        with self.assertRaises(RepositoryError):
+            MemoTransfer(self.memo_repo, 1).import_memos(records, self.checkpoint)
+
+        self.assertEqual(self.memo_repo.create_many.call_count, 2)
+
+    def test_import_memos_rejected_batch(self):
+        records = [{"title": "Memo 1"}, {}]
+
+        report = MemoTransfer(self.memo_repo, 1).import_memos(records, self.checkpoint)
+
+        # the position of a batch without memos is saved all the same
+        self.memo_repo.create_many.assert_called_with([], ImportPosition("s", 2))
+        self.assertEqual(report.written, 1)
+
+    def test_import_memos_without_checkpoint(self):
+        report = MemoTransfer(self.memo_repo).import_memos([{"title": "Memo 1"}, {}])
+
+        self.memo_repo.create_many.assert_called_once_with([Memo(title="Memo 1")], None)
+        self.assertEqual(report.written, 1)
+        self.assertEqual(report.resumed_from, 0)
+
+
+class TestMemoTransferExport(unittest.TestCase):
+
+    def test_export_memos(self):
+        memo_repo = Mock(spec=MemoRepositoryInterface)
+        memo_repo.iter_all.return_value = iter(
+            [[Memo(id=1, title="Memo 1"), Memo(id=2, title="Memo 2")]]
+        )
+        write = Mock()
+
+        report = MemoTransfer(memo_repo, 2).export_memos(write)
+
+        memo_repo.iter_all.assert_called_once_with(2)
+        write.assert_called_once()
+        self.assertEqual(
+            [memo["title"] for memo in write.call_args[0][0]], ["Memo 1", "Memo 2"]
+        )
+        self.assertEqual(report.written, 2)
+
+    def test_export_import_round_trip(self):
+        expires_at = datetime.datetime.now() + datetime.timedelta(days=1)
+        for writer, reader in ((ndjson_writer, read_ndjson), (csv_writer, read_csv)):
+            with self.subTest(writer=writer.__name__):
+                source, target = self.create_repository(), self.create_repository()
+                source.create(Memo(title="Expiring", expires_at=expires_at))
+                source.create(Memo(title="Permanent"))
+                file = io.StringIO()
+
+                MemoTransfer(source).export_memos(writer(file))
+                file.seek(0)
+                MemoTransfer(target).import_memos(reader(file))
+
+                self.assertEqual(
+                    [(memo.title, memo.expires_at) for memo in target.get_all()],
+                    [("Expiring", expires_at), ("Permanent", None)],
+                )
+
+    def create_repository(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        repository = SQLiteMemoRepository(connection)
+        repository.create_table_if_not_exists()
+        return repository
+
+
+if __name__ == "__main__":
+    unittest.main()
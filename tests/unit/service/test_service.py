@@ -1,12 +1,29 @@
+import datetime
 import unittest
 from unittest.mock import Mock, patch
 
-from src.entity.memo import Memo
+from src.entity.memo import (
+    DateBucket,
+    Memo,
+    MemoChange,
+    MemoChangeType,
+    MemoDateField,
+    MemoQuery,
+)
 from src.formatter.common import FormatterError, FormatterErrorCode
-from src.formatter.memo_formatter import AddMemoFormatterFactory
+from src.formatter.memo_formatter import (
+    AddMemoFormatterFactory,
+    AddMemoRecord,
+    DeleteMemoRecord,
+    GetChangesRecord,
+    GetMemoRecord,
+    UpdateMemoRecord,
+)
 from src.repository.common import RepositoryError, RepositoryErrorCode
 from src.repository.memo_repository import MemoRepositoryInterface
-from src.service.memo_service import MemoService
+from src.service.memo_autocomplete import TitleIndex
+from src.service.memo_cache import MemoListCache
+from src.service.memo_service import MemoService, get_request_hash
 
 
 class TestMemoService(unittest.TestCase):
@@ -14,10 +31,14 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.AddMemoFormatterFactory")
     def test_create_memo_success(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"title": "formatted title"}
+        mock_formatter.handle.return_value = AddMemoRecord(
+            title="formatted title", ttl=None, idempotency_key=None
+        )
 
         mock_formatter_factory_instance = Mock(spec=AddMemoFormatterFactory)
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -32,7 +53,7 @@ class TestMemoService(unittest.TestCase):
         memo_service.set_output(mock_output)
         memo_service.create_memo(data)
 
-        mock_formatter_factory_instance.create.assert_called_once()
+        mock_formatter_factory_instance.get_record_formatter.assert_called_once()
         mock_formatter.handle.assert_called_once_with(data)
         mock_repo.create.assert_called_once()
         args = mock_repo.create.call_args[0]
@@ -41,6 +62,79 @@ class TestMemoService(unittest.TestCase):
         mock_output.output.assert_called_once_with({"memo": return_memo.to_dict()})
         mock_output.error_output.assert_not_called()
 
+    def test_create_memo_idempotency_key(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        return_memo = Memo(id=1, title="Memo", version=1)
+        mock_repo.create_idempotent.side_effect = [
+            (return_memo, c) for c in (True, False)
+        ]
+        mock_memo_list_cache = Mock(spec=MemoListCache)
+
+        mock_output = Mock()
+
+        memo_service = MemoService(mock_repo, mock_memo_list_cache)
+        memo_service.set_output(mock_output)
+        data = {"title": "Memo", "idempotency_key": "key-1"}
+        before = datetime.datetime.now()
+        memo_service.create_memo(data)
+        memo_service.create_memo(data)
+
+        mock_repo.create.assert_not_called()
+        mock_repo.get.assert_not_called()
+        memo, key, key_expires_at, request_hash = mock_repo.create_idempotent.call_args[
+            0
+        ]
+        self.assertEqual(memo.title, "Memo")
+        self.assertEqual(key, "key-1")
+        self.assertGreaterEqual(key_expires_at, before + datetime.timedelta(days=1))
+        self.assertEqual(
+            request_hash, get_request_hash(AddMemoRecord("Memo", None, "key-1"))
+        )
+        # only the first attempt wrote, the retry returns the same memo
+        mock_memo_list_cache.invalidate.assert_called_once()
+        mock_output.output.assert_called_with({"memo": return_memo.to_dict()})
+        self.assertEqual(mock_output.output.call_count, 2)
+
+    def test_request_hash(self):
+        request_hash = get_request_hash(AddMemoRecord("Memo", 60, "key-1"))
+
+        # the key itself is not part of the request
+        self.assertEqual(
+            request_hash, get_request_hash(AddMemoRecord("Memo", 60, "key-2"))
+        )
+        for record in (AddMemoRecord("Memo", None, "1"), AddMemoRecord("O", 60, "1")):
+            self.assertNotEqual(request_hash, get_request_hash(record))
+
+    def test_create_memo_idempotency_key_error(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        error_code = RepositoryErrorCode.CREATED_MEMO_DELETED
+        mock_repo.create_idempotent.side_effect = RepositoryError(
+            error_code, error_code.get_message(), None
+        )
+
+        mock_output = Mock()
+        memo_service = MemoService(mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.create_memo({"title": "Memo", "idempotency_key": "key-1"})
+
+        mock_output.output.assert_not_called()
+        mock_output.error_output.assert_called_once_with(
+            error_code.value, "Created memo deleted"
+        )
+
+    def test_create_memo_ttl(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.create.return_value = 1
+        mock_repo.get.return_value = Memo(id=1, title="Memo", version=1)
+
+        before = datetime.datetime.now()
+        MemoService(mock_repo).create_memo({"title": "Memo", "ttl": "60"})
+
+        memo = mock_repo.create.call_args[0][0]
+        self.assertGreaterEqual(
+            memo.expires_at, before + datetime.timedelta(seconds=60)
+        )
+
     @patch("src.service.memo_service.AddMemoFormatterFactory")
     def test_create_memo_formatter_error(self, mock_formatter_factory):
         mock_formatter = Mock()
@@ -51,7 +145,9 @@ class TestMemoService(unittest.TestCase):
         )
 
         mock_formatter_factory_instance = Mock(spec=AddMemoFormatterFactory)
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_output = Mock()
@@ -69,10 +165,14 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.AddMemoFormatterFactory")
     def test_create_memo_repository_error(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"title": "formatted title"}
+        mock_formatter.handle.return_value = AddMemoRecord(
+            title="formatted title", ttl=None, idempotency_key=None
+        )
 
         mock_formatter_factory_instance = Mock(spec=AddMemoFormatterFactory)
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -97,14 +197,16 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.GetMemoFormatterFactory")
     def test_get_memo_success(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1}
+        mock_formatter.handle.return_value = GetMemoRecord(id=1, validator=None)
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
-        return_memo = Memo(title="return_memo title")
+        return_memo = Memo(id=1, title="return_memo title", version=2)
         mock_repo.get.return_value = return_memo
 
         mock_output = Mock()
@@ -113,12 +215,37 @@ class TestMemoService(unittest.TestCase):
         memo_service.set_output(mock_output)
         memo_service.get_memo({"id": 1})
 
-        mock_formatter_factory_instance.create.assert_called_once()
+        mock_formatter_factory_instance.get_record_formatter.assert_called_once()
         mock_formatter.handle.assert_called_once_with({"id": 1})
         mock_repo.get.assert_called_once_with(1)
+        mock_output.validator_output.assert_called_once_with("1-2")
         mock_output.output.assert_called_once_with({"memo": return_memo.to_dict()})
         mock_output.error_output.assert_not_called()
 
+    @patch("src.service.memo_service.GetMemoFormatterFactory")
+    def test_get_memo_not_modified(self, mock_formatter_factory):
+        mock_formatter = Mock()
+        mock_formatter.handle.return_value = GetMemoRecord(id=1, validator="1-2")
+
+        mock_formatter_factory_instance = Mock()
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
+        mock_formatter_factory.return_value = mock_formatter_factory_instance
+
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.get.return_value = Memo(id=1, title="return_memo title", version=2)
+
+        mock_output = Mock()
+
+        memo_service = MemoService(memo_repo=mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.get_memo({"id": 1, "validator": "1-2"})
+
+        mock_output.not_modified_output.assert_called_once_with("1-2")
+        mock_output.output.assert_not_called()
+        mock_output.error_output.assert_not_called()
+
     @patch("src.service.memo_service.GetMemoFormatterFactory")
     def test_get_memo_formatter_error(self, mock_formatter_factory):
         mock_formatter = Mock()
@@ -129,7 +256,9 @@ class TestMemoService(unittest.TestCase):
         )
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_output = Mock()
@@ -147,10 +276,12 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.GetMemoFormatterFactory")
     def test_get_memo_repository_error(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1}
+        mock_formatter.handle.return_value = GetMemoRecord(id=1, validator=None)
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -175,10 +306,12 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.GetMemoFormatterFactory")
     def test_get_memo_not_found(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1}
+        mock_formatter.handle.return_value = GetMemoRecord(id=1, validator=None)
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -193,6 +326,9 @@ class TestMemoService(unittest.TestCase):
         mock_output.output.assert_called_once_with({})
         mock_output.error_output.assert_not_called()
 
+
+class TestMemoServiceList(unittest.TestCase):
+
     def test_get_memos_success(self):
         mock_repo = Mock(spec=MemoRepositoryInterface)
         return_memos = [
@@ -200,16 +336,142 @@ class TestMemoService(unittest.TestCase):
             Memo(title="return_memo title 2"),
         ]
         mock_repo.get_all.return_value = return_memos
+        mock_repo.get_change_counter.return_value = 5
+        mock_repo.get_next_expiry.return_value = None
 
         mock_output = Mock()
 
         memo_service = MemoService(memo_repo=mock_repo)
         memo_service.set_output(mock_output)
+        memo_service.get_memos({"validator": "4"})
+
+        mock_repo.get_all.assert_called_once()
+        memos = [memo.to_dict() for memo in return_memos]
+        mock_output.validator_output.assert_called_once_with("5")
+        mock_output.output.assert_called_once_with({"list": memos})
+        mock_output.error_output.assert_not_called()
+
+    def test_get_memos_cached(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        return_memos = [Memo(title="return_memo title 1")]
+        mock_repo.get_all.return_value = return_memos
+        mock_repo.get_change_counter.return_value = 5
+        mock_repo.get_next_expiry.return_value = None
+        memo_list_cache = MemoListCache()
+
+        mock_output = Mock()
+
+        MemoService(mock_repo, memo_list_cache).get_memos()
+        memo_service = MemoService(mock_repo, memo_list_cache)
+        memo_service.set_output(mock_output)
         memo_service.get_memos()
 
         mock_repo.get_all.assert_called_once()
         memos = [memo.to_dict() for memo in return_memos]
         mock_output.output.assert_called_once_with({"list": memos})
+
+        mock_repo.get_change_counter.return_value = 6
+        memo_service.get_memos()
+
+        self.assertEqual(mock_repo.get_all.call_count, 2)
+
+    def test_get_memos_fields(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        return_memos = [{"id": 1, "title": "Memo"}]
+        mock_repo.get_all_fields.return_value = return_memos
+        mock_repo.get_change_counter.return_value = 5
+        mock_repo.get_next_expiry.return_value = None
+        memo_list_cache = MemoListCache()
+
+        mock_output = Mock()
+
+        memo_service = MemoService(mock_repo, memo_list_cache)
+        memo_service.set_output(mock_output)
+        memo_service.get_memos({"fields": ["title", "id"]})
+        memo_service.get_memos({"fields": ["id", "title"]})
+
+        mock_repo.get_all_fields.assert_called_once_with(("id", "title"))
+        mock_repo.get_all.assert_not_called()
+        mock_output.output.assert_called_with({"list": return_memos})
+        self.assertIs(memo_list_cache.get("5", ("id", "title")), return_memos)
+
+    def test_get_memos_formatter_error(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+
+        mock_output = Mock()
+
+        memo_service = MemoService(memo_repo=mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.get_memos({"fields": ["unknown"]})
+
+        mock_repo.get_change_counter.assert_not_called()
+        mock_output.output.assert_not_called()
+        mock_output.error_output.assert_called_once_with(
+            FormatterErrorCode.INVALID_FIELD_VALUE.value,
+            FormatterErrorCode.INVALID_FIELD_VALUE.get_message(),
+        )
+
+    def test_write_invalidates_memo_list_cache(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.create.return_value = 1
+        mock_repo.get.return_value = Memo(id=1, title="Memo", version=1)
+        mock_repo.update.return_value = Memo(id=1, title="Memo", version=2)
+        mock_memo_list_cache = Mock(spec=MemoListCache)
+
+        memo_service = MemoService(mock_repo, mock_memo_list_cache)
+        memo_service.create_memo({"title": "Memo"})
+        memo_service.update_memo({"id": "1", "title": "Memo"})
+        memo_service.delete_memo({"id": "1"})
+
+        self.assertEqual(mock_memo_list_cache.invalidate.call_count, 3)
+
+    def test_update_memo_ttl(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.update.return_value = None
+
+        memo_service = MemoService(mock_repo)
+        memo_service.update_memo({"id": "1", "title": "Memo"})
+        memo_service.update_memo({"id": "1", "title": "Memo", "ttl": "60"})
+
+        self.assertIsNone(mock_repo.update.call_args_list[0][0][0].expires_at)
+        self.assertIsNotNone(mock_repo.update.call_args_list[1][0][0].expires_at)
+
+    def test_get_memos_validator_with_next_expiry(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.get_all.return_value = []
+        mock_repo.get_change_counter.return_value = 5
+        mock_repo.get_next_expiry.return_value = "2024-06-01T12:00:00"
+        memo_list_cache = MemoListCache()
+
+        mock_output = Mock()
+
+        memo_service = MemoService(mock_repo, memo_list_cache)
+        memo_service.set_output(mock_output)
+        memo_service.get_memos()
+
+        mock_output.validator_output.assert_called_once_with("5-2024-06-01T12:00:00")
+
+        # the next memo to expire has expired, so the cached listing is stale
+        mock_repo.get_next_expiry.return_value = None
+        memo_service.get_memos()
+
+        self.assertEqual(mock_repo.get_all.call_count, 2)
+        mock_output.validator_output.assert_called_with("5")
+
+    def test_get_memos_not_modified(self):
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.get_change_counter.return_value = 5
+        mock_repo.get_next_expiry.return_value = None
+
+        mock_output = Mock()
+
+        memo_service = MemoService(memo_repo=mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.get_memos({"validator": "5"})
+
+        mock_repo.get_all.assert_not_called()
+        mock_output.not_modified_output.assert_called_once_with("5")
+        mock_output.output.assert_not_called()
         mock_output.error_output.assert_not_called()
 
     def test_get_memos_repository_error(self):
@@ -232,18 +494,25 @@ class TestMemoService(unittest.TestCase):
             "Failed to get all memos",
         )
 
+
+class TestMemoServiceUpdates(unittest.TestCase):
+
     @patch("src.service.memo_service.UpdateMemoFormatterFactory")
     def test_update_memo_success(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1, "title": "formatted title"}
+        mock_formatter.handle.return_value = UpdateMemoRecord(
+            id=1, title="formatted title", version=2, ttl=None
+        )
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
-        return_memo = Memo(id=1, title="return_memo title")
-        mock_repo.get.return_value = return_memo
+        return_memo = Memo(id=1, title="return_memo title", version=3)
+        mock_repo.update.return_value = return_memo
 
         mock_output = Mock()
 
@@ -251,13 +520,15 @@ class TestMemoService(unittest.TestCase):
         memo_service.set_output(mock_output)
         memo_service.update_memo({"id": 1, "title": "Test Memo"})
 
-        mock_formatter_factory_instance.create.assert_called_once()
+        mock_formatter_factory_instance.get_record_formatter.assert_called_once()
         mock_formatter.handle.assert_called_once_with({"id": 1, "title": "Test Memo"})
         mock_repo.update.assert_called_once()
         args = mock_repo.update.call_args[0]
         self.assertEqual(args[0].id, 1)
         self.assertEqual(args[0].title, "formatted title")
-        mock_repo.get.assert_called_once_with(1)
+        self.assertEqual(args[0].version, 2)
+        mock_repo.get.assert_not_called()
+        mock_output.validator_output.assert_called_once_with("1-3")
         mock_output.output.assert_called_once_with({"memo": return_memo.to_dict()})
         mock_output.error_output.assert_not_called()
 
@@ -271,7 +542,9 @@ class TestMemoService(unittest.TestCase):
         )
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_output = Mock()
@@ -289,10 +562,14 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.UpdateMemoFormatterFactory")
     def test_update_memo_repository_error(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1, "title": "formatted title"}
+        mock_formatter.handle.return_value = UpdateMemoRecord(
+            id=1, title="formatted title", version=None, ttl=None
+        )
 
         mock_formatter_factory_instance = mock_formatter
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -317,14 +594,18 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.UpdateMemoFormatterFactory")
     def test_update_memo_not_found(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1, "title": "formatted title"}
+        mock_formatter.handle.return_value = UpdateMemoRecord(
+            id=1, title="formatted title", version=None, ttl=None
+        )
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
-        mock_repo.get.return_value = None
+        mock_repo.update.return_value = None
 
         mock_output = Mock()
 
@@ -338,10 +619,12 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.DeleteMemoFormatterFactory")
     def test_delete_memo_success(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1}
+        mock_formatter.handle.return_value = DeleteMemoRecord(id=1)
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -354,7 +637,7 @@ class TestMemoService(unittest.TestCase):
         memo_service.set_output(mock_output)
         memo_service.delete_memo({"id": 1})
 
-        mock_formatter_factory_instance.create.assert_called_once()
+        mock_formatter_factory_instance.get_record_formatter.assert_called_once()
         mock_formatter.handle.assert_called_once_with({"id": 1})
         mock_repo.delete.assert_called_once_with(return_memo)
         mock_output.output.assert_not_called()
@@ -370,7 +653,9 @@ class TestMemoService(unittest.TestCase):
         )
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_output = Mock()
@@ -388,10 +673,12 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.DeleteMemoFormatterFactory")
     def test_delete_memo_repository_error(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1}
+        mock_formatter.handle.return_value = DeleteMemoRecord(id=1)
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -415,10 +702,12 @@ class TestMemoService(unittest.TestCase):
     @patch("src.service.memo_service.DeleteMemoFormatterFactory")
     def test_delete_memo_not_found(self, mock_formatter_factory):
         mock_formatter = Mock()
-        mock_formatter.handle.return_value = {"id": 1}
+        mock_formatter.handle.return_value = DeleteMemoRecord(id=1)
 
         mock_formatter_factory_instance = Mock()
-        mock_formatter_factory_instance.create.return_value = mock_formatter
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
         mock_formatter_factory.return_value = mock_formatter_factory_instance
 
         mock_repo = Mock(spec=MemoRepositoryInterface)
@@ -434,6 +723,277 @@ class TestMemoService(unittest.TestCase):
         mock_output.output.assert_not_called()
         mock_output.error_output.assert_not_called()
 
+    @patch("src.service.memo_service.GetChangesFormatterFactory")
+    def test_get_changes_success(self, mock_formatter_factory):
+        mock_formatter = Mock()
+        mock_formatter.handle.return_value = GetChangesRecord(seq=2, limit=10)
+
+        mock_formatter_factory_instance = Mock()
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
+        mock_formatter_factory.return_value = mock_formatter_factory_instance
+
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        return_changes = [
+            MemoChange(
+                seq=3,
+                change_type=MemoChangeType.CREATE,
+                memo_id=1,
+                memo=Memo(id=1, title="return_memo title"),
+            ),
+            MemoChange(seq=4, change_type=MemoChangeType.DELETE, memo_id=2),
+        ]
+        mock_repo.changes_since.return_value = return_changes
+
+        mock_output = Mock()
+
+        memo_service = MemoService(memo_repo=mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.get_changes({"seq": "2", "limit": "10"})
+
+        mock_repo.changes_since.assert_called_once_with(2, 10)
+        mock_output.output.assert_called_once_with(
+            {
+                "changes": [change.to_dict() for change in return_changes],
+                "last_seq": 4,
+            }
+        )
+        mock_output.error_output.assert_not_called()
+
+    @patch("src.service.memo_service.GetChangesFormatterFactory")
+    def test_get_changes_empty(self, mock_formatter_factory):
+        mock_formatter = Mock()
+        mock_formatter.handle.return_value = GetChangesRecord(seq=2, limit=10)
+
+        mock_formatter_factory_instance = Mock()
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
+        mock_formatter_factory.return_value = mock_formatter_factory_instance
+
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.changes_since.return_value = []
+
+        mock_output = Mock()
+
+        memo_service = MemoService(memo_repo=mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.get_changes({"seq": "2", "limit": "10"})
+
+        mock_output.output.assert_called_once_with({"changes": [], "last_seq": 2})
+
+    @patch("src.service.memo_service.GetChangesFormatterFactory")
+    def test_get_changes_repository_error(self, mock_formatter_factory):
+        mock_formatter = Mock()
+        mock_formatter.handle.return_value = GetChangesRecord(seq=2, limit=10)
+
+        mock_formatter_factory_instance = Mock()
+        mock_formatter_factory_instance.get_record_formatter.return_value = (
+            mock_formatter
+        )
+        mock_formatter_factory.return_value = mock_formatter_factory_instance
+
+        mock_repo = Mock(spec=MemoRepositoryInterface)
+        mock_repo.changes_since.side_effect = RepositoryError(
+            code=RepositoryErrorCode.FAILED_TO_GET_CHANGES,
+            message="Failed to get changes",
+            original_exception=None,
+        )
+
+        mock_output = Mock()
+
+        memo_service = MemoService(memo_repo=mock_repo)
+        memo_service.set_output(mock_output)
+        memo_service.get_changes({"seq": "2", "limit": "10"})
+
+        mock_output.output.assert_not_called()
+        mock_output.error_output.assert_called_once_with(
+            RepositoryErrorCode.FAILED_TO_GET_CHANGES.value,
+            "Failed to get changes",
+        )
+
+
+class TestMemoServiceAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_repo = Mock(spec=MemoRepositoryInterface)
+        self.mock_output = Mock()
+        self.memo_service = MemoService(memo_repo=self.mock_repo)
+        self.memo_service.set_output(self.mock_output)
+
+    def test_count_memos(self):
+        self.mock_repo.count.return_value = 3
+
+        self.memo_service.count_memos()
+
+        self.mock_repo.count.assert_called_once_with(MemoQuery())
+        self.mock_output.output.assert_called_once_with({"count": 3})
+
+    def test_count_memos_query(self):
+        self.mock_repo.count.return_value = 1
+
+        self.memo_service.count_memos(
+            {"date_field": "update_date", "since": "2024-01-01", "until": "2024-01-31"}
+        )
+
+        self.mock_repo.count.assert_called_once_with(
+            MemoQuery(
+                MemoDateField.UPDATE_DATE,
+                datetime.date(2024, 1, 1),
+                datetime.date(2024, 1, 31),
+            )
+        )
+
+    def test_count_memos_formatter_error(self):
+        self.memo_service.count_memos({"date_field": "title"})
+
+        self.mock_repo.count.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            FormatterErrorCode.INVALID_FIELD_VALUE.value, "Invalid field value"
+        )
+
+    def test_count_memos_repository_error(self):
+        self.mock_repo.count.side_effect = RepositoryError(
+            code=RepositoryErrorCode.FAILED_TO_COUNT_MEMOS,
+            message="Failed to count memos",
+            original_exception=None,
+        )
+
+        self.memo_service.count_memos()
+
+        self.mock_output.output.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            RepositoryErrorCode.FAILED_TO_COUNT_MEMOS.value, "Failed to count memos"
+        )
+
+    def test_count_memos_by_date(self):
+        self.mock_repo.count_by_date.return_value = [("2024-01", 2), ("2024-02", 1)]
+
+        self.memo_service.count_memos_by_date(
+            {"since": "2024-01-01", "bucket": "month"}
+        )
+
+        self.mock_repo.count_by_date.assert_called_once_with(
+            MemoQuery(since=datetime.date(2024, 1, 1)), DateBucket.MONTH
+        )
+        self.mock_output.output.assert_called_once_with(
+            {
+                "counts": [
+                    {"period": "2024-01", "count": 2},
+                    {"period": "2024-02", "count": 1},
+                ]
+            }
+        )
+
+    def test_count_memos_by_date_formatter_error(self):
+        self.memo_service.count_memos_by_date({"bucket": "week"})
+
+        self.mock_repo.count_by_date.assert_not_called()
+        self.mock_output.error_output.assert_called_once()
+
+    def test_get_memo_date_range(self):
+        self.mock_repo.get_date_range.return_value = (
+            "2024-01-01T00:00:00",
+            "2024-02-01T00:00:00",
+        )
+
+        self.memo_service.get_memo_date_range({"date_field": "update_date"})
+
+        self.mock_repo.get_date_range.assert_called_once_with(
+            MemoQuery(MemoDateField.UPDATE_DATE)
+        )
+        self.mock_output.output.assert_called_once_with(
+            {"min_date": "2024-01-01T00:00:00", "max_date": "2024-02-01T00:00:00"}
+        )
+
+    def test_get_memo_date_range_repository_error(self):
+        self.mock_repo.get_date_range.side_effect = RepositoryError(
+            code=RepositoryErrorCode.FAILED_TO_GET_DATE_RANGE,
+            message="Failed to get date range",
+            original_exception=None,
+        )
+
+        self.memo_service.get_memo_date_range()
+
+        self.mock_output.output.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            RepositoryErrorCode.FAILED_TO_GET_DATE_RANGE.value,
+            "Failed to get date range",
+        )
+
+    def test_search_memos(self):
+        memo = Memo(
+            id=1,
+            title="Team meeting",
+            create_date=datetime.datetime(2024, 1, 1),
+            update_date=datetime.datetime(2024, 1, 1),
+        )
+        self.mock_repo.fuzzy_search.return_value = [(memo, 0.8)]
+
+        self.memo_service.search_memos({"query": "meetign", "limit": "5"})
+
+        self.mock_repo.fuzzy_search.assert_called_once_with("meetign", 5)
+        self.mock_output.output.assert_called_once_with(
+            {"results": [{"memo": memo.to_dict(), "similarity": 0.8}]}
+        )
+
+    def test_search_memos_formatter_error(self):
+        self.memo_service.search_memos({})
+
+        self.mock_repo.fuzzy_search.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            FormatterErrorCode.MISSING_REQUIRED_FIELD.value, "Missing required field"
+        )
+
+    def test_search_memos_repository_error(self):
+        self.mock_repo.fuzzy_search.side_effect = RepositoryError(
+            code=RepositoryErrorCode.FAILED_TO_SEARCH_MEMOS,
+            message="Failed to search memos",
+            original_exception=None,
+        )
+
+        self.memo_service.search_memos({"query": "memo"})
+
+        self.mock_output.output.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            RepositoryErrorCode.FAILED_TO_SEARCH_MEMOS.value, "Failed to search memos"
+        )
+
+    def test_suggest_titles(self):
+        title_index = Mock(spec=TitleIndex)
+        title_index.suggest.return_value = ["Team meeting"]
+        memo_service = MemoService(memo_repo=self.mock_repo, title_index=title_index)
+        memo_service.set_output(self.mock_output)
+
+        memo_service.suggest_titles({"prefix": "tea", "limit": "5"})
+
+        title_index.suggest.assert_called_once_with(self.mock_repo, "tea", 5)
+        self.mock_output.output.assert_called_once_with({"titles": ["Team meeting"]})
+
+    def test_suggest_titles_formatter_error(self):
+        self.memo_service.suggest_titles({})
+
+        self.mock_repo.get_all_fields.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            FormatterErrorCode.MISSING_REQUIRED_FIELD.value, "Missing required field"
+        )
+
+    def test_suggest_titles_repository_error(self):
+        self.mock_repo.get_last_change_seq.side_effect = RepositoryError(
+            code=RepositoryErrorCode.FAILED_TO_GET_LAST_CHANGE_SEQ,
+            message="Failed to get last change seq",
+            original_exception=None,
+        )
+
+        self.memo_service.suggest_titles({"prefix": "tea"})
+
+        self.mock_output.output.assert_not_called()
+        self.mock_output.error_output.assert_called_once_with(
+            RepositoryErrorCode.FAILED_TO_GET_LAST_CHANGE_SEQ.value,
+            "Failed to get last change seq",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
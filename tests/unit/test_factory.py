@@ -0,0 +1,219 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Executor
+from unittest.mock import Mock, patch
+
+from src.factory import MemoNestFactory, MemoNestMode, SingletonRegistry
+from src.formatter.common import FormatterFactory
+from src.formatter.memo_formatter import RECORD_FORMATTER_FACTORIES
+from src.interaction import MemoryOutput
+from src.repository.split_memo_repository import SplitSQLiteMemoRepository
+from src.service.memo_admission import AdmissionMemoNest
+from src.service.memo_cache import MemoListCache
+
+
+def create_config(mode: MemoNestMode) -> dict:
+    return {
+        "sqlite": {
+            "mode": mode,
+            "fixed_path": ":memory:",
+            "isolated_path": lambda: ":memory:",
+        }
+    }
+
+
+class TestSingletonRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.singletons = SingletonRegistry()
+
+    def test_get_created_once(self):
+        barrier = threading.Barrier(8)
+        create = Mock(side_effect=MemoListCache)
+        results = []
+
+        def get():
+            barrier.wait()
+            results.append(self.singletons.get("memo_list_cache", create))
+
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        create.assert_called_once()
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_get_existing(self):
+        create = Mock()
+        memo_list_cache = self.singletons.get("memo_list_cache", MemoListCache)
+
+        self.assertIs(self.singletons.get("memo_list_cache", create), memo_list_cache)
+        self.assertIs(self.singletons.find("memo_list_cache"), memo_list_cache)
+        create.assert_not_called()
+
+    def test_get_error(self):
+        create = Mock(side_effect=[ValueError, MemoListCache()])
+
+        with self.assertRaises(ValueError):
+            self.singletons.get("memo_list_cache", create)
+
+        self.assertIsNone(self.singletons.find("memo_list_cache"))
+        self.assertIsNotNone(self.singletons.get("memo_list_cache", create))
+
+
+class TestMemoNestFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = MemoNestFactory(create_config(MemoNestMode.SINGLE_USER))
+
+    @patch.object(FormatterFactory, "get_record_formatter")
+    def test_warm_up_single_user(self, mock_get_record_formatter):
+        self.factory.warm_up()
+
+        self.assertIsNotNone(self.factory.singletons.find("memo_nest"))
+        self.assertIsNotNone(self.factory.singletons.find("memo_repo"))
+        self.assertIs(
+            self.factory.create_memo_nest(), self.factory.singletons.find("memo_nest")
+        )
+        self.assertEqual(
+            mock_get_record_formatter.call_count, len(RECORD_FORMATTER_FACTORIES)
+        )
+
+    def test_get_concurrent_memo_nest(self):
+        factory = MemoNestFactory(create_config(MemoNestMode.COLLABORATION))
+
+        memo_nest = factory.get_concurrent_memo_nest()
+
+        self.assertIs(factory.get_concurrent_memo_nest(), memo_nest)
+        self.assertIs(memo_nest.memo_repo, factory.singletons.find("memo_repo"))
+        self.assertIs(memo_nest.title_index, factory.singletons.find("title_index"))
+
+    def test_get_concurrent_memo_nest_threads(self):
+        factory = MemoNestFactory(create_config(MemoNestMode.COLLABORATION))
+        memo_nest = factory.get_concurrent_memo_nest()
+        errors = []
+        memo_ids = []
+
+        def run(name):
+            for index in range(25):
+                for _ in range(2):
+                    output = MemoryOutput()
+                    with memo_nest.output_to(output):
+                        memo_nest.create_memo(
+                            {"title": name, "idempotency_key": f"{name}-{index}"}
+                        )
+                    errors.append(output.error_code)
+                memo_ids.append(output.data["memo"]["id"])
+                output = MemoryOutput()
+                with memo_nest.output_to(output):
+                    memo_nest.update_memo({"id": memo_ids[-1], "title": f"{name}!"})
+                    memo_nest.get_memos()
+                errors.append(output.error_code)
+
+        threads = [
+            threading.Thread(target=run, args=(f"thread {index}",))
+            for index in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(set(errors), {None})
+        self.assertEqual(len(set(memo_ids)), 100)
+        self.assertEqual(factory.singletons.find("memo_repo").count(), 100)
+        titles = {memo.title for memo in factory.singletons.find("memo_repo").get_all()}
+        self.assertEqual(titles, {f"thread {index}!" for index in range(4)})
+
+    def test_get_concurrent_memo_nest_isolation(self):
+        factory = MemoNestFactory(create_config(MemoNestMode.ISOLATION))
+
+        self.assertIsNot(
+            factory.get_concurrent_memo_nest(), factory.get_concurrent_memo_nest()
+        )
+
+    def test_warm_up_collaboration(self):
+        factory = MemoNestFactory(create_config(MemoNestMode.COLLABORATION))
+
+        factory.warm_up()
+
+        self.assertIsNotNone(factory.singletons.find("memo_repo"))
+        self.assertIsNotNone(factory.singletons.find("memo_list_cache"))
+        self.assertEqual(factory.singletons.find("title_index").last_seq, 0)
+        self.assertIsNone(factory.singletons.find("memo_nest"))
+
+    def test_admission(self):
+        config = create_config(MemoNestMode.ISOLATION)
+        config["admission"] = {"read_limit": 2}
+        factory = MemoNestFactory(config)
+
+        factory.warm_up()
+        memo_nest = factory.create_memo_nest()
+
+        self.assertIsInstance(memo_nest, AdmissionMemoNest)
+        self.assertIs(memo_nest.admission, factory.singletons.find("admission"))
+        self.assertEqual(factory.singletons.find("admission").policy.read_limit, 2)
+        self.assertIs(
+            factory.create_memo_nest().admission, factory.singletons.find("admission")
+        )
+
+    def test_read_connections(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        config = create_config(MemoNestMode.COLLABORATION)
+        config["sqlite"]["fixed_path"] = os.path.join(directory.name, "memo.db")
+        config["sqlite"]["read_connections"] = 2
+        factory = MemoNestFactory(config)
+
+        memo_repo = factory.get_singleton_memo_repository()
+        self.addCleanup(memo_repo.close)
+
+        self.assertIsInstance(memo_repo, SplitSQLiteMemoRepository)
+        self.assertEqual(len(memo_repo.readers), 2)
+        self.assertIs(factory.get_singleton_memo_repository(), memo_repo)
+
+    def test_close(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        config = create_config(MemoNestMode.COLLABORATION)
+        config["sqlite"]["fixed_path"] = os.path.join(directory.name, "memo.db")
+        config["sqlite"]["read_connections"] = 1
+        factory = MemoNestFactory(config)
+        memo_repo = factory.get_singleton_memo_repository()
+        purger = factory.background.start_purger()
+        maintenance = factory.background.start_maintenance()
+        process_pool = Mock(spec=Executor)
+        factory.singletons.get("process_pool", lambda: process_pool)
+
+        factory.close()
+        factory.close()
+
+        # pylint: disable=protected-access
+        self.assertIsNone(purger._thread)
+        self.assertIsNone(maintenance._thread)
+        self.assertEqual(process_pool.shutdown.call_count, 2)
+        for connection in (
+            purger.memo_repo.connect,
+            maintenance.memo_repo.connect,
+            memo_repo.writer.connect,
+            memo_repo.readers[0].connect,
+        ):
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+
+    def test_warm_up_isolation(self):
+        factory = MemoNestFactory(create_config(MemoNestMode.ISOLATION))
+
+        factory.warm_up()
+
+        self.assertIsNone(factory.singletons.find("memo_repo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
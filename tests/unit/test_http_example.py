@@ -0,0 +1,175 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from example import http_example
+from src.factory import MemoNestFactory, MemoNestMode
+from src.repository.common import RepositoryErrorCode
+from src.service.memo_admission import AdmissionErrorCode
+
+
+class HttpExampleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        config = http_example.create_config(MemoNestMode.COLLABORATION, ":memory:")
+        config.update(self.get_config())
+        patcher = patch.object(http_example, "config", config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        factory = http_example.app.state.memo_nest_factory
+        self.addCleanup(setattr, http_example.app.state, "memo_nest_factory", factory)
+        http_example.app.state.memo_nest_factory = MemoNestFactory(config)
+        # one client, so every request is served by the same event loop
+        self.client = TestClient(http_example.app)
+        self.client.__enter__()  # pylint: disable=unnecessary-dunder-call
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def get_config(self) -> dict:
+        return {}
+
+    def send(self, method, url, data, **headers):
+        return self.client.request(method, url, json=data, headers=headers)
+
+
+class TestHttpAdmission(HttpExampleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admission = (
+            http_example.app.state.memo_nest_factory.get_singleton_admission()
+        )
+
+    def get_config(self) -> dict:
+        return {"admission": {"read_limit": 1, "read_queue": 1, "timeout": 0.5}}
+
+    def test_queue_full_and_timeout(self):
+        limiter = self.admission.get_limiter("get_memos")
+        # hold the only read slot, so the next request waits in the queue
+        self.assertIsNone(limiter.acquire(0))
+        responses = {}
+
+        def get_memos():
+            responses["queued"] = self.client.get("/memo/get_all")
+
+        thread = threading.Thread(target=get_memos)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while limiter.waiting == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # the event loop still serves requests while one waits for a slot
+        full = self.client.get("/memo/get_all")
+        metrics = self.client.get("/admission/metrics").json()
+        thread.join()
+        limiter.release()
+
+        self.assertEqual(full.status_code, 503)
+        self.assertEqual(full.headers["Retry-After"], "1")
+        self.assertIn(f"Error code {AdmissionErrorCode.QUEUE_FULL.value}", full.text)
+        self.assertEqual(metrics["read"]["waiting"], 1)
+        queued = responses["queued"]
+        self.assertEqual(queued.status_code, 503)
+        self.assertIn(
+            f"Error code {AdmissionErrorCode.QUEUE_TIMEOUT.value}", queued.text
+        )
+        self.assertEqual(self.client.get("/memo/get_all").json(), {"list": []})
+
+
+class TestHttpETag(HttpExampleTestCase):
+
+    def test_get_memo_not_modified(self):
+        for title in ("Memo 1", "Memo 2"):
+            self.send("POST", "/memo/create", {"title": title})
+        etag = self.send("GET", "/memo/get", {"id": 1}).headers["ETag"]
+
+        not_modified = self.send(
+            "GET", "/memo/get", {"id": 1}, **{"If-None-Match": etag}
+        )
+        # memo 2 has the same version, but not the same ETag
+        other = self.send("GET", "/memo/get", {"id": 2}, **{"If-None-Match": etag})
+
+        self.assertEqual(etag, '"1-1"')
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers["ETag"], etag)
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(other.headers["ETag"], '"2-1"')
+        self.assertEqual(other.json()["memo"]["title"], "Memo 2")
+
+    def test_update_memo_if_match(self):
+        for title in ("Memo 1", "Memo 2"):
+            self.send("POST", "/memo/create", {"title": title})
+
+        updated = self.send(
+            "PUT", "/memo/update", {"id": 1, "title": "A"}, **{"If-Match": '"1-1"'}
+        )
+        stale = self.send(
+            "PUT", "/memo/update", {"id": 1, "title": "B"}, **{"If-Match": '"1-1"'}
+        )
+        other = self.send(
+            "PUT", "/memo/update", {"id": 2, "title": "C"}, **{"If-Match": '"1-2"'}
+        )
+
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(updated.headers["ETag"], '"1-2"')
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(other.status_code, 412)
+        memo = self.send("GET", "/memo/get", {"id": 2}).json()["memo"]
+        self.assertEqual(memo["title"], "Memo 2")
+
+    def test_update_memo_if_match_precondition_failed(self):
+        self.send("POST", "/memo/create", {"title": "Memo 1"})
+
+        for memo_id, if_match in (
+            (1, '"1-1", "1-2"'),
+            (1, '"1"'),
+            (1, "1-1"),
+            (3, '"3-1"'),
+            (3, "*"),
+        ):
+            with self.subTest(memo_id=memo_id, if_match=if_match):
+                response = self.send(
+                    "PUT",
+                    "/memo/update",
+                    {"id": memo_id, "title": "B"},
+                    **{"If-Match": if_match},
+                )
+
+                self.assertEqual(response.status_code, 412)
+
+        # without If-Match, updating a missing memo is not a failed precondition
+        response = self.send("PUT", "/memo/update", {"id": 3, "title": "B"})
+        self.assertEqual((response.status_code, response.json()), (200, {}))
+        memo = self.send("GET", "/memo/get", {"id": 1}).json()["memo"]
+        self.assertEqual((memo["title"], memo["version"]), ("Memo 1", 1))
+
+
+class TestHttpIdempotency(HttpExampleTestCase):
+
+    def test_create_memo_replay(self):
+        key = {"Idempotency-Key": "key-1"}
+        created = self.send("POST", "/memo/create", {"title": "Memo"}, **key)
+        self.send("PUT", "/memo/update", {"id": 1, "title": "Updated"})
+
+        replayed = self.send("POST", "/memo/create", {"title": "Memo"}, **key)
+        reused = self.send("POST", "/memo/create", {"title": "Other"}, **key)
+        self.send("DELETE", "/memo/delete", {"id": 1})
+        deleted = self.send("POST", "/memo/create", {"title": "Memo"}, **key)
+
+        self.assertEqual(created.status_code, 200)
+        self.assertEqual(replayed.status_code, 200)
+        self.assertEqual(replayed.json(), created.json())
+        self.assertEqual(replayed.headers["ETag"], '"1-1"')
+        self.assertEqual(reused.status_code, 422)
+        self.assertIn(
+            f"Error code {RepositoryErrorCode.IDEMPOTENCY_KEY_REUSED.value}",
+            reused.text,
+        )
+        self.assertEqual(deleted.status_code, 410)
+        self.assertEqual(len(self.send("GET", "/memo/get_all", None).json()["list"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
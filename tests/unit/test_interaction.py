@@ -1,3 +1,4 @@
+import threading
 import unittest
 from io import StringIO
 from unittest.mock import Mock, patch
@@ -14,7 +15,7 @@ class TestMemoNest(unittest.TestCase):
             def get_memo(self, data: dict) -> None:
                 pass
 
-            def get_memos(self) -> None:
+            def get_memos(self, data: dict = None) -> None:
                 pass
 
             def update_memo(self, data: dict) -> None:
@@ -23,6 +24,24 @@ class TestMemoNest(unittest.TestCase):
             def delete_memo(self, data: dict) -> None:
                 pass
 
+            def get_changes(self, data: dict) -> None:
+                pass
+
+            def count_memos(self, data: dict = None) -> None:
+                pass
+
+            def count_memos_by_date(self, data: dict = None) -> None:
+                pass
+
+            def get_memo_date_range(self, data: dict = None) -> None:
+                pass
+
+            def search_memos(self, data: dict) -> None:
+                pass
+
+            def suggest_titles(self, data: dict) -> None:
+                pass
+
         self.memo_nest = PassImplMemoNest()
         self.mock_output_handler = Mock(spec=OutputHandler)
         self.memo_nest.set_output(self.mock_output_handler)
@@ -50,6 +69,54 @@ class TestMemoNest(unittest.TestCase):
         self.memo_nest.set_output(None)
         self.memo_nest.error(error_code, error_message)  # not raising an error
 
+    def test_validator(self):
+        self.memo_nest.validator("1")
+        self.mock_output_handler.validator_output.assert_called_once_with("1")
+
+        self.memo_nest.set_output(None)
+        self.memo_nest.validator("1")  # not raising an error
+
+    def test_not_modified(self):
+        self.memo_nest.not_modified("1")
+        self.mock_output_handler.not_modified_output.assert_called_once_with("1")
+
+        self.memo_nest.set_output(None)
+        self.memo_nest.not_modified("1")  # not raising an error
+
+    def test_output_to(self):
+        call_output_handler = MemoryOutput()
+
+        with self.memo_nest.output_to(call_output_handler) as output_handler:
+            self.memo_nest.output({"title": "Test Memo"})
+            self.memo_nest.validator("1")
+
+        self.assertIs(output_handler, call_output_handler)
+        self.assertEqual(call_output_handler.data, {"title": "Test Memo"})
+        self.assertEqual(call_output_handler.validator, "1")
+        self.mock_output_handler.output.assert_not_called()
+        self.assertIs(self.memo_nest.output_handler, self.mock_output_handler)
+
+        self.memo_nest.error(404, "Not Found")
+        self.mock_output_handler.error_output.assert_called_once_with(404, "Not Found")
+
+    def test_output_to_per_thread(self):
+        barrier = threading.Barrier(2)
+        output_handlers = [MemoryOutput(), MemoryOutput()]
+
+        def call(index):
+            with self.memo_nest.output_to(output_handlers[index]):
+                barrier.wait()
+                self.memo_nest.output({"id": index})
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(output_handlers[0].data, {"id": 0})
+        self.assertEqual(output_handlers[1].data, {"id": 1})
+
 
 class TestConsoleOutput(unittest.TestCase):
     @patch("sys.stdout", new_callable=StringIO)
@@ -93,6 +160,24 @@ class TestMemoryOutput(unittest.TestCase):
         self.assertEqual(
             memory_output.data, {"error": f"Error code {error_code}: {error_message}"}
         )
+        self.assertEqual(memory_output.error_code, error_code)
+
+    def test_validator_output(self):
+        memory_output = MemoryOutput()
+
+        memory_output.validator_output("1")
+
+        self.assertEqual(memory_output.validator, "1")
+        self.assertFalse(memory_output.not_modified)
+
+    def test_not_modified_output(self):
+        memory_output = MemoryOutput()
+
+        memory_output.not_modified_output("1")
+
+        self.assertEqual(memory_output.validator, "1")
+        self.assertTrue(memory_output.not_modified)
+        self.assertEqual(memory_output.data, {})
 
 
 if __name__ == "__main__":